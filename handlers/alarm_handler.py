@@ -12,6 +12,7 @@ from utils.apikey_utils import (
     cleanup_old_alarms
 )
 from utils.monitoring import telegram_alert
+from utils.storage import run_db
 
 LOG = logging.getLogger("alarm_handler")
 LOG.addHandler(logging.NullHandler())
@@ -72,11 +73,11 @@ async def _cmd_alarm(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if action == "add" and len(args) >= 3:
             alarm_type = args[1]
             value = args[2]
-            create_alarm(user_id, alarm_type, value)
+            await run_db(create_alarm, user_id, alarm_type, value)
             await update.message.reply_text(f"✅ Alarm eklendi: {alarm_type} = {value}")
 
         elif action == "list":
-            alarms = get_user_alarms(user_id)
+            alarms = await run_db(get_user_alarms, user_id)
             if not alarms:
                 await update.message.reply_text("ℹ️ Henüz kayıtlı alarmınız yok.")
                 return
@@ -87,7 +88,7 @@ async def _cmd_alarm(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
         elif action == "clean":
             days = int(args[1]) if len(args) >= 2 else 60
-            cleanup_old_alarms(days)
+            await run_db(cleanup_old_alarms, days)
             await update.message.reply_text(f"🧹 {days} günden eski alarmlar temizlendi.")
 
         else:
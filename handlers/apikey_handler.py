@@ -12,6 +12,7 @@ from utils.apikey_utils import (
     set_alarm_settings, get_alarm_settings,
     set_trade_settings, get_trade_settings
 )
+from utils.storage import run_db
 import os
 from dotenv import set_key, load_dotenv
 import json
@@ -29,7 +30,7 @@ async def apikey(update, context):
     api_key, secret_key = context.args
 
     # Kullanıcı bazlı kaydet
-    add_or_update_apikey(user_id, f"{api_key}:{secret_key}")
+    await run_db(add_or_update_apikey, user_id, f"{api_key}:{secret_key}")
 
     # Global key güncelleme yetkisi
     if user_id in AUTHORIZED_USERS:
@@ -53,7 +54,7 @@ async def set_alarm(update, context):
         return
     try:
         settings = json.loads(" ".join(context.args))
-        set_alarm_settings(user_id, settings)
+        await run_db(set_alarm_settings, user_id, settings)
         await update.message.reply_text("Alarm ayarları kaydedildi.")
     except json.JSONDecodeError:
         await update.message.reply_text("Geçersiz JSON formatı.")
@@ -61,7 +62,7 @@ async def set_alarm(update, context):
 
 async def get_alarm(update, context):
     user_id = update.effective_user.id
-    settings = get_alarm_settings(user_id)
+    settings = await run_db(get_alarm_settings, user_id)
     if settings:
         await update.message.reply_text(f"Alarm ayarları:\n{json.dumps(settings, indent=2)}")
     else:
@@ -76,7 +77,7 @@ async def set_trade(update, context):
         return
     try:
         settings = json.loads(" ".join(context.args))
-        set_trade_settings(user_id, settings)
+        await run_db(set_trade_settings, user_id, settings)
         await update.message.reply_text("Trade ayarları kaydedildi.")
     except json.JSONDecodeError:
         await update.message.reply_text("Geçersiz JSON formatı.")
@@ -84,7 +85,7 @@ async def set_trade(update, context):
 
 async def get_trade(update, context):
     user_id = update.effective_user.id
-    settings = get_trade_settings(user_id)
+    settings = await run_db(get_trade_settings, user_id)
     if settings:
         await update.message.reply_text(f"Trade ayarları:\n{json.dumps(settings, indent=2)}")
     else:
@@ -14,6 +14,8 @@ from telegram.ext import CommandHandler, ContextTypes
 from utils.config import CONFIG
 from utils.binance_api import get_binance_api
 from utils import io_utils
+from utils.io_fetch import IOFetchPlan
+from utils.io_snapshot import IOSnapshotService, staleness_label
 
 # =========================
 # --- Utils ---------------
@@ -93,38 +95,12 @@ async def _resolve_market_symbol_list(api) -> List[str]:
     return [s.upper() for s in raw]
 
 async def _fetch_symbol_pack(symbol: str) -> Dict[str, Any]:
-    api = get_binance_api()
-    kl = await api.get_klines(symbol, interval=CONFIG.BINANCE.STREAM_INTERVAL, limit=200)
-    ob = await api.get_order_book(symbol, limit=100)
-    tr = await api.get_recent_trades(symbol, limit=CONFIG.BINANCE.TRADES_LIMIT)
-    tk = await api.get_24h_ticker(symbol)
-
-    try:
-        fr = await api.get_funding_rate(symbol, limit=1)
-        funding = fr[0] if isinstance(fr, list) and fr else {"fundingRate": 0}
-    except Exception:
-        funding = {"fundingRate": 0}
-
-    now = _now_ms()
-    norm_trades = []
-    for t in tr:
-        t2 = dict(t)
-        t2.setdefault("ts", now)
-        norm_trades.append(t2)
-
-    return {
-        "klines": kl,
-        "order_book": ob,
-        "trades": norm_trades,
-        "ticker": tk,
-        "funding": funding,
-        "oi": None,
-        "liquidations": None,
-    }
+    packs = await IOFetchPlan(get_binance_api()).fetch([symbol])
+    return packs[symbol.upper()]
 
 async def _build_snapshot(symbol: str) -> Dict[str, Any]:
     data = await _fetch_symbol_pack(symbol)
-    return io_utils.build_io_snapshot(
+    snap = io_utils.build_io_snapshot(
         symbol=symbol,
         klines=data["klines"],
         order_book=data["order_book"],
@@ -135,14 +111,14 @@ async def _build_snapshot(symbol: str) -> Dict[str, Any]:
         liquidations=data["liquidations"],
         with_cashflow=True,
     )
+    snap["ticker"] = data["ticker"]
+    return snap
 
 async def _build_snapshots(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
-    api = get_binance_api()
-    packs: Dict[str, Dict[str, Any]] = await api.fetch_many(_fetch_symbol_pack, symbols)
+    # tüm semboller için tekilleştirilmiş, eşzamanlı çekim (toplu ticker + premiumIndex)
+    packs: Dict[str, Dict[str, Any]] = await IOFetchPlan(get_binance_api()).fetch(symbols)
     result: Dict[str, Dict[str, Any]] = {}
     for sym, dat in packs.items():
-        if isinstance(dat, Exception):
-            continue
         result[sym] = io_utils.build_io_snapshot(
             symbol=sym,
             klines=dat.get("klines", []),
@@ -154,8 +130,16 @@ async def _build_snapshots(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
             liquidations=dat.get("liquidations"),
             with_cashflow=True,
         )
+        # formatlayıcılar hacim payı için ticker'ı snapshot'tan okur
+        result[sym]["ticker"] = dat.get("ticker", {})
     return result
 
+# Arka planda yenilenen snapshot (main başlatır; başlatılmadıysa ilk /io çağrısında başlar)
+IO_SNAPSHOTS = IOSnapshotService(
+    builder=_build_snapshots,
+    resolver=lambda: _resolve_market_symbol_list(get_binance_api()),
+)
+
 # =========================
 # --- Formatting ----------
 # =========================
@@ -267,26 +251,23 @@ def _format_coin_report(symbol: str, snap: Dict[str, Any], group_snapshots: Dict
 
 async def io_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     try:
-        api = get_binance_api()
         target_symbol: Optional[str] = None
         if context.args:
             target_symbol = _symbolize(context.args[0])
-        symbols = await _resolve_market_symbol_list(api)
-        if not symbols:
+        current = await IO_SNAPSHOTS.get()
+        snaps = current.data
+        if not snaps:
             await update.message.reply_text("Uygun sembol bulunamadı.")
             return
-        snaps = await _build_snapshots(symbols)
         if target_symbol:
-            symbol = target_symbol
-            if symbol not in snaps:
-                snap = await _build_snapshot(symbol)
-                text = _format_coin_report(symbol, snap, snaps)
-            else:
-                text = _format_coin_report(symbol, snaps[symbol], snaps)
-            await update.message.reply_text("inOut Raporu (/io coin)\n\n" + text)
+            snap, ts = await IO_SNAPSHOTS.get_symbol(target_symbol, _build_snapshot)
+            text = _format_coin_report(target_symbol, snap, snaps)
+            footer = staleness_label(ts, version=current.version if target_symbol in snaps else None)
+            await update.message.reply_text("inOut Raporu (/io coin)\n\n" + text + "\n\n" + footer)
             return
         text = _format_market_report(snaps)
-        await update.message.reply_text("inOut Raporu (/io)\n\n" + text)
+        footer = staleness_label(current.ts, version=current.version)
+        await update.message.reply_text("inOut Raporu (/io)\n\n" + text + "\n\n" + footer)
     except Exception as e:
         await update.message.reply_text(f"IO raporu oluşturulamadı: {e}")
 
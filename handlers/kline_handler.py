@@ -4,12 +4,13 @@
 
 
 import asyncio
-from collections import deque
+import math
 from utils.ta_utils import rsi, macd
+from utils.ohlcv_buffer import OHLCVRing
 from handlers.signal_handler import publish_signal
 
 async def kline_worker(queue: asyncio.Queue, symbol: str, interval: str = "1m", lookback: int = 500):
-    closes = deque(maxlen=lookback)
+    bars = OHLCVRing(lookback)
     while True:
         data = await queue.get()
         try:
@@ -21,13 +22,12 @@ async def kline_worker(queue: asyncio.Queue, symbol: str, interval: str = "1m",
                 queue.task_done()
                 continue
             close = float(k.get("c"))
-            closes.append(close)
-            arr = list(closes)
-            rsi_list = indicators.rsi(arr, period=14)
-            rsi_val = rsi_list[-1] if rsi_list else None
-            macd_line, macd_signal, macd_hist = indicators.macd(arr)
-            macd_h = macd_hist[-1] if macd_hist else None
-            if rsi_val is not None and macd_h is not None:
+            bars.append_kline(k)
+            df = bars.frame(with_time=False)
+            rsi_val = float(rsi(df, period=14).iloc[-1])
+            _, _, macd_hist = macd(df)
+            macd_h = float(macd_hist.iloc[-1])
+            if not (math.isnan(rsi_val) or math.isnan(macd_h)):
                 if rsi_val < 30 and macd_h > 0:
                     await publish_signal("kline_rsi_macd", symbol, "BUY", strength=0.6, payload={"price": close, "rsi": rsi_val, "macd_h": macd_h})
                 elif rsi_val > 70 and macd_h < 0:
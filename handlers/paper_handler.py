@@ -3,6 +3,8 @@ import os
 from telegram import Update
 from telegram.ext import ContextTypes
 from utils.paper_utils import log_paper_trade, get_paper_trades
+from utils.paper_engine import PAPER
+from utils.storage import run_db
 
 PAPER_MODE = os.getenv("PAPER_MODE", "false").lower() == "true"
 
@@ -20,15 +22,32 @@ async def paper_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     action = args[0].lower()
     symbol = args[1].upper()
-    quantity = float(args[2])
-    price = 100  # Burada gerçek fiyat API'den çekilebilir
+    try:
+        quantity = float(args[2])
+    except ValueError:
+        await update.message.reply_text("Kullanım: /paper <buy/sell> <symbol> <miktar>")
+        return
+    if action not in ("buy", "sell") or quantity <= 0:
+        await update.message.reply_text("Kullanım: /paper <buy/sell> <symbol> <miktar>")
+        return
+
+    # Fiyat: güncel emir defterinde market emri yürütülerek (kayma dahil; motor durumu değişmez)
+    quote = await PAPER.aquote(symbol, action, quantity)
+    if not quote["filled"]:
+        await update.message.reply_text(f"❌ {symbol} için emir defteri alınamadı.")
+        return
+    quantity = round(quote["filled"], 8)   # defter derinliği yetmezse kısmi dolum
+    price = round(quote["avg_price"], 8)
 
-    log_paper_trade(user_id, action, symbol, quantity, price)
-    await update.message.reply_text(f"📄 Paper trade kaydedildi: {action.upper()} {quantity} {symbol} @ {price}")
+    await run_db(log_paper_trade, user_id, action, symbol, quantity, price)
+    await update.message.reply_text(
+        f"📄 Paper trade kaydedildi: {action.upper()} {quantity} {symbol} @ {price}"
+        f" (kayma {quote['slippage_bps']:.1f} bps, ücret {quote['fee']:.4f})"
+    )
 
 async def paper_log_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    trades = get_paper_trades(user_id)
+    trades = await run_db(get_paper_trades, user_id)
     if not trades:
         await update.message.reply_text("📭 Henüz paper trade kaydınız yok.")
         return
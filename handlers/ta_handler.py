@@ -1,6 +1,9 @@
 # handlers/ta_handler.py
 
 import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Tuple
+
 import pandas as pd
 from telegram import Update
 from telegram.ext import CommandHandler, CallbackContext
@@ -8,27 +11,56 @@ from telegram.ext import CommandHandler, CallbackContext
 from utils.binance_api import get_binance_api
 from utils.config import CONFIG
 from utils.ta_utils import alpha_signal, scan_market
+from utils.indicator_cache import interval_to_ms
+from utils.ohlcv_buffer import OHLCVRing
+from utils.resampler import RESAMPLERS
 
 
 # ------------------------------------------------------------
 # OHLCV Fetch
+# - Sadece kapanmış barlar döner (indikatör cache anahtarı son kapanmış bar)
+# - (symbol, interval, limit) bazında bir sonraki bar kapanışına kadar bellekte tutulur;
+#   /t <coin> her çağrıda BTC referansını yeniden indirmez.
+# - Akıştan beslenen semboller için önce yerel resampler (1m → interval) denenir;
+#   geçmiş yetersizse REST'ten indirilip resampler seed edilir, sonrası istek atmaz.
 # ------------------------------------------------------------
+_OHLCV_CACHE: Dict[Tuple[str, str, int], Tuple[int, pd.DataFrame]] = {}
+
+
 async def fetch_ohlcv(symbol: str, hours: int = 4, interval: str = "1h") -> pd.DataFrame:
-    client = get_binance_api()
     limit = max(hours * 3, 200)
-    kl = await client.get_klines(symbol, interval=interval, limit=limit)
-
-    df = pd.DataFrame(
-        kl,
-        columns=[
-            "open_time", "open", "high", "low", "close", "volume",
-            "close_time", "qav", "trades", "taker_base", "taker_quote", "ignore"
-        ]
-    )
-    df = df.astype({
-        "open": float, "high": float, "low": float,
-        "close": float, "volume": float
-    })
+    key = (symbol, interval, limit)
+    now = int(time.time() * 1000)
+    cached = _OHLCV_CACHE.get(key)
+    if cached and now < cached[0]:
+        return cached[1]
+
+    local = RESAMPLERS.frame(symbol, interval, limit)
+    if local is not None:
+        # frame halka tampon görünümü (sonraki append'e kadar geçerli); tarama await/thread boyunca tutar → kopya
+        return local.copy()
+
+    client = get_binance_api()
+    # +1: oluşmakta olan son bar atılınca kapanmış bar sayısı limit kalsın
+    kl = await client.get_klines(symbol, interval=interval, limit=min(limit + 1, 1000))
+
+    # Kapanmamış son bar (close_time gelecekte) → at; bir sonraki kapanışa kadar geçerli
+    expires = now + interval_to_ms(interval)
+    if kl and int(kl[-1][6]) >= now:
+        expires = int(kl[-1][6]) + 1
+        kl = kl[:-1]
+    kl = kl[-limit:]
+    if RESAMPLERS.supports(symbol, interval):
+        RESAMPLERS.seed(symbol, interval, kl, now)
+
+    # 12 object/string kolon yerine: open_time + OHLCV float64 (halka tampon üzerinden)
+    df = OHLCVRing.from_klines(kl, capacity=max(len(kl), 1)).frame()
+    df.attrs.update({"symbol": symbol, "interval": interval, "closed": True})
+
+    if len(_OHLCV_CACHE) > 512:
+        for k in [k for k, (exp, _) in _OHLCV_CACHE.items() if exp <= now]:
+            _OHLCV_CACHE.pop(k, None)
+    _OHLCV_CACHE[key] = (expires, df)
     return df
 
 
@@ -40,110 +72,127 @@ def regime_label(score: float) -> str:
     return "range"
 
 
+# ------------------------------------------------------------
+# /t raporu
+# - Hesap (scan_market / alpha_signal) thread'de: event loop (Telegram polling) beklemez
+# - Çok süreçli modda (supervisor.py) bot süreci raporu compute sürecinden ister: set_backend()
+# ------------------------------------------------------------
+async def build_ta_report(args: List[str]) -> str:
+    api = get_binance_api()
+    # ---------------------------------
+    # Market Scan
+    # ---------------------------------
+    if len(args) == 0 or (len(args) == 1 and (args[0].lower() == "all" or args[0].isdigit())):
+        mode = "config"
+        symbols = CONFIG.BINANCE.SCAN_SYMBOLS
+
+        # full scan
+        if len(args) == 1 and args[0].lower() == "all":
+            info = await api.exchange_info_details()
+            symbols = [s["symbol"] for s in info["symbols"] if s["quoteAsset"] == "USDT"]
+            mode = "all"
+
+        # top-N scan
+        elif len(args) == 1 and args[0].isdigit():
+            top_n = int(args[0])
+            tickers = await api.get_all_24h_tickers()
+            usdt_pairs = [t for t in tickers if t["symbol"].endswith("USDT")]
+            top_sorted = sorted(usdt_pairs, key=lambda x: float(x["quoteVolume"]), reverse=True)
+            symbols = [t["symbol"] for t in top_sorted[:top_n]]
+            mode = f"top{top_n}"
+
+        # veri çek
+        data = {}
+        for sym in symbols:
+            try:
+                df = await fetch_ohlcv(sym, hours=4, interval="1h")
+                data[sym] = df
+            except Exception:
+                continue
+
+        btc_ref = data.get("BTCUSDT", None)
+        ref_close = btc_ref["close"] if btc_ref is not None else None
+        results = await asyncio.to_thread(scan_market, data, ref_close=ref_close)
+
+        # /t için rapor formatı
+        # 📊 Market Scan (4h, mode={mode})
+        # <SYMBOL>: α={score} [<SIGNAL>] | Rejim={regime_label}
+        # YENİ2 <SYMBOL>:  <kalman_arrow>  α={score} | <regime_label>({regime_score}) | corr={correlation}
+
+        # Yeni format
+        text = f"📊 Market Scan (4h, mode={mode})\n"
+        for sym, res in results.items():
+            score = res.get("score", res.get("alpha_ta", {}).get("score", 0))
+            detail = res.get("detail", {})
+            regime = detail.get("regime_score", 0.0)
+            kalman = detail.get("kalman_score", 0.0)
+            kalman_arrow = "↑" if kalman > 0 else ("↓" if kalman < 0 else "→")
+            leadlag = detail.get("leadlag", {})
+            corr = round(leadlag.get("corr", 0.0), 2)
+        
+            # Sembol sadeleştirme (BTCUSDT → BTC)
+            clean_sym = sym.replace("USDT", "")
+        
+            text += f"{clean_sym}:  {kalman_arrow}  α= {round(score,2)} | {regime_label(regime)}({round(regime,2)}) | corr={corr}\n"
+
+        return text
+
+    # ---------------------------------
+    # Tek Coin Analizi
+    # ---------------------------------
+    coin = args[0].upper() + "USDT" if not args[0].upper().endswith("USDT") else args[0].upper()
+    hours = int(args[1]) if len(args) > 1 else 4
+    interval = "1h"
+
+    df = await fetch_ohlcv(coin, hours=hours, interval=interval)
+    btc_df = await fetch_ohlcv("BTCUSDT", hours=hours, interval=interval)
+    ref_close = btc_df["close"] if btc_df is not None else None
+
+    res = await asyncio.to_thread(alpha_signal, df, ref_series=ref_close)
+
+    score = res["score"]
+    sig = res["signal"]
+    sig_txt = "LONG" if sig == 1 else ("SHORT" if sig == -1 else "FLAT")
+    regime = res["detail"].get("regime_score", 0.0)
+
+    entropy = res["detail"].get("entropy_score", 0.0)
+    kalman = res["detail"].get("kalman_score", 0.0)
+    kalman_txt = "↑" if kalman > 0 else ("↓" if kalman < 0 else "→")
+    leadlag = res["detail"].get("leadlag", {})
+
+    # /t <coin> için rapor formatı
+
+    text = (
+        f"🔍 {coin} ({hours}h)\n"
+        f"α_skor: {round(score,2)} → {sig_txt}\n"
+        f"Rejim: {regime_label(regime)} ({round(regime,2)})\n"
+        f"Entropy: {round(entropy,2)}\n"
+        f"Kalman eğilim: {kalman_txt}\n"
+        f"Lead–Lag (BTC): {leadlag.get('lag',0)} bar | corr={round(leadlag.get('corr',0),2)}\n"
+    )
+    return text
+
+
+_BACKEND: Callable[[List[str]], Awaitable[str]] = build_ta_report
+
+
+def set_backend(fn: Callable[[List[str]], Awaitable[str]]) -> None:
+    """Rapor üreticisi (varsayılan: bu süreçte build_ta_report)."""
+    global _BACKEND
+    _BACKEND = fn
+
+
 # ------------------------------------------------------------
 # /t Komutu Handler
 # ------------------------------------------------------------
 def ta_handler(update: Update, context: CallbackContext) -> None:
-    args = context.args
+    args = list(context.args or [])
     chat_id = update.effective_chat.id
-    api = get_binance_api()
 
     async def _run():
         try:
-            # ---------------------------------
-            # Market Scan
-            # ---------------------------------
-            if len(args) == 0 or (len(args) == 1 and (args[0].lower() == "all" or args[0].isdigit())):
-                mode = "config"
-                symbols = CONFIG.BINANCE.SCAN_SYMBOLS
-
-                # full scan
-                if len(args) == 1 and args[0].lower() == "all":
-                    info = await api.exchange_info_details()
-                    symbols = [s["symbol"] for s in info["symbols"] if s["quoteAsset"] == "USDT"]
-                    mode = "all"
-
-                # top-N scan
-                elif len(args) == 1 and args[0].isdigit():
-                    top_n = int(args[0])
-                    tickers = await api.get_all_24h_tickers()
-                    usdt_pairs = [t for t in tickers if t["symbol"].endswith("USDT")]
-                    top_sorted = sorted(usdt_pairs, key=lambda x: float(x["quoteVolume"]), reverse=True)
-                    symbols = [t["symbol"] for t in top_sorted[:top_n]]
-                    mode = f"top{top_n}"
-
-                # veri çek
-                data = {}
-                for sym in symbols:
-                    try:
-                        df = await fetch_ohlcv(sym, hours=4, interval="1h")
-                        data[sym] = df
-                    except Exception:
-                        continue
-
-                btc_ref = data.get("BTCUSDT", None)
-                ref_close = btc_ref["close"] if btc_ref is not None else None
-                results = scan_market(data, ref_close=ref_close)
-
-                # /t için rapor formatı
-                # 📊 Market Scan (4h, mode={mode})
-                # <SYMBOL>: α={score} [<SIGNAL>] | Rejim={regime_label}
-                # YENİ2 <SYMBOL>:  <kalman_arrow>  α={score} | <regime_label>({regime_score}) | corr={correlation}
-
-                # Yeni format
-                text = f"📊 Market Scan (4h, mode={mode})\n"
-                for sym, res in results.items():
-                    score = res.get("score", res.get("alpha_ta", {}).get("score", 0))
-                    detail = res.get("detail", {})
-                    regime = detail.get("regime_score", 0.0)
-                    kalman = detail.get("kalman_score", 0.0)
-                    kalman_arrow = "↑" if kalman > 0 else ("↓" if kalman < 0 else "→")
-                    leadlag = detail.get("leadlag", {})
-                    corr = round(leadlag.get("corr", 0.0), 2)
-                
-                    # Sembol sadeleştirme (BTCUSDT → BTC)
-                    clean_sym = sym.replace("USDT", "")
-                
-                    text += f"{clean_sym}:  {kalman_arrow}  α= {round(score,2)} | {regime_label(regime)}({round(regime,2)}) | corr={corr}\n"
-
-                await context.bot.send_message(chat_id=chat_id, text=text)
-                return
-
-            # ---------------------------------
-            # Tek Coin Analizi
-            # ---------------------------------
-            coin = args[0].upper() + "USDT" if not args[0].upper().endswith("USDT") else args[0].upper()
-            hours = int(args[1]) if len(args) > 1 else 4
-            interval = "1h"
-
-            df = await fetch_ohlcv(coin, hours=hours, interval=interval)
-            btc_df = await fetch_ohlcv("BTCUSDT", hours=hours, interval=interval)
-            ref_close = btc_df["close"] if btc_df is not None else None
-
-            res = alpha_signal(df, ref_series=ref_close)
-
-            score = res["score"]
-            sig = res["signal"]
-            sig_txt = "LONG" if sig == 1 else ("SHORT" if sig == -1 else "FLAT")
-            regime = res["detail"].get("regime_score", 0.0)
-
-            entropy = res["detail"].get("entropy_score", 0.0)
-            kalman = res["detail"].get("kalman_score", 0.0)
-            kalman_txt = "↑" if kalman > 0 else ("↓" if kalman < 0 else "→")
-            leadlag = res["detail"].get("leadlag", {})
-
-            # /t <coin> için rapor formatı
-
-            text = (
-                f"🔍 {coin} ({hours}h)\n"
-                f"α_skor: {round(score,2)} → {sig_txt}\n"
-                f"Rejim: {regime_label(regime)} ({round(regime,2)})\n"
-                f"Entropy: {round(entropy,2)}\n"
-                f"Kalman eğilim: {kalman_txt}\n"
-                f"Lead–Lag (BTC): {leadlag.get('lag',0)} bar | corr={round(leadlag.get('corr',0),2)}\n"
-            )
+            text = await _BACKEND(args)
             await context.bot.send_message(chat_id=chat_id, text=text)
-
         except Exception as e:
             await context.bot.send_message(chat_id=chat_id, text=f"⚠️ Hata: {e}")
 
@@ -6,6 +6,7 @@
 # handlers/ticker_pubsub.py
 # Async pub/sub: dict + çoklu subscriber
 import asyncio
+from utils.market_state import PRICES
 
 # Global dict: en güncel fiyat/hacim
 market_data = {}
@@ -24,6 +25,8 @@ async def handle_ticker_data(data):
 
         # En güncel veri
         market_data[symbol] = {"price": last_price, "vol": vol}
+        # OrderManager fiyat durumu (son fiyat + best bid/ask)
+        PRICES.update(data)
 
         # Her subscriber'a async gönderim
         for queue in subscribers:
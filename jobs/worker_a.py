@@ -1,56 +1,91 @@
-
 import asyncio
-from typing import Dict, Any
+import logging
+import time
+from typing import Dict, Any, Optional
 from utils import cache
 from utils import config_worker
+from utils.scheduler import TaskScheduler
+from utils.binance_api import get_binance_api
+
+LOG = logging.getLogger("worker_a")
+LOG.addHandler(logging.NullHandler())
+
+# Cache değerleri sembol başına küçük sözlükler:
+#   ticker : {"BTCUSDT": {"price", "change_pct", "quote_volume", "ts"}}      ← /api/v3/ticker/24hr (tek istek)
+#   funding: {"BTCUSDT": {"rate", "mark", "next_funding", "ts"}}             ← /fapi/v1/premiumIndex (tek istek)
+#   oi     : {"BTCUSDT": {"oi", "ts"}}                                       ← /fapi/v1/openInterest (sembol başına,
+#            BinanceHTTPClient semaforu ile sınırlı)
+# İstek başarısız olursa cache'e yazılmaz: son geçerli değer kalır, worker_b boşuna uyanmaz.
 
-# Try to import your existing API utilities; fail gracefully if absent
-try:
-    from utils import binance_api
-except Exception as e:
-    binance_api = None
 
-try:
-    from utils import coinglass_utils
-except Exception as e:
-    coinglass_utils = None
+def _f(v: Any) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+async def _put(key: str, data: Dict[str, Any]) -> None:
+    await cache.aput(key, data, ttl=config_worker.CACHE_TTL_SECONDS.get(key, 60),
+                     max_rows=config_worker.CACHE_MAX_ROWS_PER_KEY)
+
 
 async def _task_ticker():
-    if not binance_api:
-        return
-    # Expecting your repo to have an async or sync function. Try both.
-    data: Dict[str, Any] = {}
     try:
-        # prefer async if present
-        if hasattr(binance_api, "async_get_tickers"):
-            data = await binance_api.async_get_tickers(symbols=config_worker.SYMBOLS)
-        elif hasattr(binance_api, "get_tickers"):
-            data = binance_api.get_tickers(symbols=config_worker.SYMBOLS)
-        elif hasattr(binance_api, "get_price"):
-            # fallback single-symbol; build dict
-            data = {sym: binance_api.get_price(sym) for sym in config_worker.SYMBOLS}
+        rows = await get_binance_api().get_24h_tickers(config_worker.SYMBOLS)
     except Exception as e:
-        data = {"error": str(e)}
-    cache.put("ticker", data, ttl=config_worker.CACHE_TTL_SECONDS.get("ticker", 20),
-              max_rows=config_worker.CACHE_MAX_ROWS_PER_KEY)
+        LOG.warning("ticker fetch failed: %s", e)
+        return
+    data = {
+        r["symbol"]: {
+            "price": _f(r.get("lastPrice")),
+            "change_pct": _f(r.get("priceChangePercent")),
+            "quote_volume": _f(r.get("quoteVolume")),
+            "ts": int(r.get("closeTime") or time.time() * 1000),
+        }
+        for r in rows or [] if isinstance(r, dict) and "symbol" in r
+    }
+    if data:
+        await _put("ticker", data)
+
 
 async def _task_funding():
-    if not coinglass_utils:
-        return
     try:
-        if hasattr(coinglass_utils, "get_funding_rates_async"):
-            data = await coinglass_utils.get_funding_rates_async(symbols=config_worker.SYMBOLS)
-        else:
-            data = coinglass_utils.get_funding_rates(symbols=config_worker.SYMBOLS)  # may not exist; adapt in repo
+        rows = await get_binance_api().get_premium_index()   # tüm perp'ler tek istekte
     except Exception as e:
-        data = {"error": str(e)}
-    cache.put("funding", data, ttl=config_worker.CACHE_TTL_SECONDS.get("funding", 180),
-              max_rows=config_worker.CACHE_MAX_ROWS_PER_KEY)
+        LOG.warning("premiumIndex fetch failed: %s", e)
+        return
+    wanted = set(config_worker.SYMBOLS)
+    data = {
+        r["symbol"]: {
+            "rate": _f(r.get("lastFundingRate")),
+            "mark": _f(r.get("markPrice")),
+            "next_funding": int(r.get("nextFundingTime") or 0),
+            "ts": int(r.get("time") or time.time() * 1000),
+        }
+        for r in rows or [] if isinstance(r, dict) and r.get("symbol") in wanted
+    }
+    if data:
+        await _put("funding", data)
+
+
+async def _task_oi():
+    api = get_binance_api()
+    results = await api.fetch_many(api.get_open_interest, config_worker.SYMBOLS)
+    data = {}
+    for sym, r in results.items():
+        if isinstance(r, Exception) or not isinstance(r, dict):
+            LOG.debug("openInterest %s failed: %s", sym, r)
+            continue
+        data[sym] = {"oi": _f(r.get("openInterest")), "ts": int(r.get("time") or time.time() * 1000)}
+    if data:
+        await _put("oi", data)
+
 
 TASK_MAP = {
     "ticker": _task_ticker,
     "funding": _task_funding,
-    # "oi": _task_oi,  # add similarly
+    "oi": _task_oi,
 }
 
 async def run_once():
@@ -64,19 +99,15 @@ async def run_once():
     if coros:
         await asyncio.gather(*coros)
 
+SCHEDULER: Optional[TaskScheduler] = None
+
 async def run_forever():
-    # naive scheduler: run tasks at their own intervals
-    last = {t["name"]: 0 for t in config_worker.WORKER_A_TASKS}
-    while True:
-        now = asyncio.get_event_loop().time()
-        runs = []
-        for t in config_worker.WORKER_A_TASKS:
-            name, interval = t["name"], t["interval"]
-            if now - last[name] >= interval:
-                last[name] = now
-                fn = TASK_MAP.get(name)
-                if fn:
-                    runs.append(fn())
-        if runs:
-            await asyncio.gather(*runs)
-        await asyncio.sleep(1)
+    # heap tabanlı zamanlayıcı: görev başına ritim, jitter, timeout, öncelik; çalışan görev tekrar başlatılmaz
+    global SCHEDULER
+    SCHEDULER = TaskScheduler.from_config(config_worker.WORKER_A_TASKS, TASK_MAP,
+                                          max_concurrent=config_worker.WORKER_A_MAX_CONCURRENCY)
+    await SCHEDULER.run()
+
+def stats() -> Dict[str, Any]:
+    """Görev başına süre histogramı, gecikme (lag), skip/timeout sayıları."""
+    return SCHEDULER.stats() if SCHEDULER else {}
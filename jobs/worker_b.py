@@ -21,8 +21,8 @@ except Exception:
 
 async def evaluate_and_trade():
     """Example decision loop: read latest cached data, evaluate, maybe place order."""
-    ticker = cache.get_latest("ticker") or {}
-    funding = cache.get_latest("funding") or {}
+    ticker = await cache.aget_latest("ticker") or {}
+    funding = await cache.aget_latest("funding") or {}
 
     # 1) Build a context/dataset for your strategy
     ctx = {"ticker": ticker, "funding": funding}
@@ -62,6 +62,14 @@ async def maybe_async(fn, *args, **kwargs):
     return res
 
 async def run_forever():
-    while True:
+    # worker_a bir anahtarı yazınca uyan (aynı süreç: event, başka süreç: data_version yoklaması);
+    # değişiklik yoksa döngü atlanır
+    sub = cache.subscribe("ticker", "funding")
+    try:
         await evaluate_and_trade()
-        await asyncio.sleep(config_worker.WORKER_B_INTERVAL)
+        while True:
+            changed = await sub.wait()
+            if changed:
+                await evaluate_and_trade()
+    finally:
+        sub.close()
@@ -25,6 +25,7 @@ from utils.handler_loader import load_handlers
 from utils.binance_api import BinanceClient
 from utils.stream_manager import StreamManager
 from utils.order_manager import OrderManager
+from utils.kline_pipeline import build_stream_list, process_kline
 from strategies.rsi_macd_strategy import RSI_MACD_Strategy
 
 # -------------------------------
@@ -32,11 +33,6 @@ from strategies.rsi_macd_strategy import RSI_MACD_Strategy
 configure_logging(logging.INFO)
 LOG = logging.getLogger("main")
 
-# -------------------------------
-# Helpers: stream list
-def build_stream_list(symbols, interval):
-    return [f"{s.lower()}@kline_{interval}" for s in symbols] + [f"{s.lower()}@ticker" for s in symbols]
-
 # -------------------------------
 # Main async entry
 async def async_main():
@@ -97,27 +93,10 @@ async def async_main():
 
     # Kline processor
     async def kline_processor():
-        from handlers import signal_handler
         while True:
             data = await kline_queue.get()
             try:
-                k = data.get("k", {})
-                # Sadece kapanan mumlar
-                if not k.get("x"):
-                    continue
-                close_price = float(k["c"])
-                symbol = data.get("s")
-                strat = strategies.get(symbol)
-                if strat:
-                    sig = strat.on_new_close(close_price)
-                    if sig:
-                        await signal_handler.publish_signal(
-                            "rsi_macd",
-                            symbol,
-                            sig["type"],
-                            strength=sig["strength"],
-                            payload=sig["payload"],
-                        )
+                await process_kline(data, strategies)
             except asyncio.CancelledError:
                 # graceful exit
                 raise
@@ -134,8 +113,9 @@ async def async_main():
     # --- Start background services ---
     background_tasks = []
 
-    # 1) Evaluator loop
+    # 1) Evaluator loop + OrderManager (sembol filtreleri, bakiye uzlaştırma)
     evaluator.start()
+    await order_manager.start()
 
     # 2) Streams
     streams = build_stream_list(CONFIG.BINANCE.TOP_SYMBOLS_FOR_IO, CONFIG.BINANCE.STREAM_INTERVAL)
@@ -150,7 +130,14 @@ async def async_main():
         ),
     )
 
-    # 4) Kline processor task
+    # 4) /io snapshot servisi (arka planda periyodik)
+    if CONFIG.IO.ENABLED:
+        from handlers import io_handler
+        from utils import kline_pipeline
+        io_handler.IO_SNAPSHOTS.start()
+        kline_pipeline.on_close(io_handler.IO_SNAPSHOTS.notify)   # kapanan bar → erken yenileme
+
+    # 5) Kline processor task
     kline_task = asyncio.create_task(kline_processor(), name="kline_processor")
     background_tasks.append(kline_task)
 
@@ -191,6 +178,10 @@ async def async_main():
     # --- Stop background services ---
     LOG.info("Stopping background services...")
     evaluator.stop()
+    order_manager.stop()
+    if CONFIG.IO.ENABLED:
+        from handlers import io_handler
+        io_handler.IO_SNAPSHOTS.stop()
     stream_mgr.cancel_all()
     for t in background_tasks:
         t.cancel()
@@ -209,6 +200,13 @@ async def async_main():
         LOG.info("Awaiting %d pending tasks...", len(pending))
         await asyncio.gather(*pending, return_exceptions=True)
 
+    # Write-behind DB kuyruğunu boşalt (sinyal/karar/paper trade kayıtları)
+    from utils import db
+    LOG.info("Flushing DB writer: %s", db.writer_metrics())
+    await asyncio.to_thread(db.shutdown)
+    from utils import storage
+    await asyncio.to_thread(storage.close_all)
+
     LOG.info("Shutdown complete. Bye.")
 
 # -------------------------------
@@ -1,38 +1,66 @@
 # strategies/rsi_macd_strategy.py
 # ♦️ Pluggable strategy wrapper (RSI + MACD)
 
-from collections import deque
-from utils import ta_utils  # artık ta_utils kullanılıyor
+from typing import Optional
+
+import numpy as np
+
+from utils.config import CONFIG
+from utils.ohlcv_buffer import OHLCVRing
 
 class RSI_MACD_Strategy:
     """
     RSI + MACD tabanlı örnek strateji.
     Kapanış fiyatlarını besle, basit BUY/SELL sinyali döner.
+
+    ta_utils.rsi / ta_utils.macd ile aynı tanımlar, bar başına O(1):
+    - RSI: son rsi_period farkın basit ortalaması (halka tampondan kopyasız görünüm)
+    - MACD: EMA'lar artımlı güncellenir; aynı open_time tekrar gelirse önceki duruma geri alınıp yeniden uygulanır
     """
 
-    def __init__(self, symbol: str, lookback: int = 500, rsi_period: int = 14):
+    def __init__(self, symbol: str, lookback: int = 500, rsi_period: int = 14,
+                 fast: Optional[int] = None, slow: Optional[int] = None, signal: Optional[int] = None):
         self.symbol = symbol
-        self.closes = deque(maxlen=lookback)
+        self.bars = OHLCVRing(lookback)
         self.rsi_period = rsi_period
+        self._a_fast = 2.0 / ((fast or CONFIG.TA.MACD_FAST) + 1)
+        self._a_slow = 2.0 / ((slow or CONFIG.TA.MACD_SLOW) + 1)
+        self._a_sig = 2.0 / ((signal or CONFIG.TA.MACD_SIGNAL) + 1)
+        self._ema = None        # (ema_fast, ema_slow, signal) — son bar dahil
+        self._ema_prev = None   # son bar öncesi durum (bar güncellemesi için)
 
-    def on_new_close(self, close: float):
-        """Yeni kapanış fiyatı ekle ve sinyal üret."""
-        self.closes.append(close)
-        if len(self.closes) < self.rsi_period + 1:
-            return None
+    def _macd_hist(self, close: float, replace: bool) -> float:
+        prev = self._ema_prev if replace else self._ema
+        if prev is None:
+            ef = es = close
+            sg = 0.0
+        else:
+            ef, es, sg = prev
+            ef += self._a_fast * (close - ef)
+            es += self._a_slow * (close - es)
+            sg += self._a_sig * ((ef - es) - sg)
+        if not replace:
+            self._ema_prev = self._ema
+        self._ema = (ef, es, sg)
+        return (ef - es) - sg
 
-        # closes → DataFrame'e çevir
-        import pandas as pd
-        df = pd.DataFrame({"close": list(self.closes)})
+    def _rsi(self) -> float:
+        d = np.diff(self.bars.view("close", self.rsi_period + 1))
+        gain = d[d > 0].sum() / self.rsi_period
+        loss = -d[d < 0].sum() / self.rsi_period
+        return 100 - (100 / (1 + gain / (loss + 1e-12)))
 
-        # RSI
-        rsi_val = ta_utils.rsi(df, period=self.rsi_period).iloc[-1]
+    def on_new_close(self, close: float, open_time: int = None):
+        """Yeni kapanış fiyatı ekle ve sinyal üret (aynı open_time tekrar gelirse son bar güncellenir)."""
+        replace = open_time is not None and len(self.bars) > 0 and int(open_time) == self.bars.last_time
+        self.bars.append_close(close, open_time)
+        macd_h = self._macd_hist(float(close), replace)
+        if len(self.bars) < self.rsi_period + 1:
+            return None
 
-        # MACD
-        macd_line, signal_line, hist = ta_utils.macd(df)
-        macd_h = hist.iloc[-1]
+        rsi_val = self._rsi()
 
-        if pd.isna(rsi_val) or pd.isna(macd_h):
+        if np.isnan(rsi_val) or np.isnan(macd_h):
             return None
 
         # Basit kurallar
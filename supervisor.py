@@ -0,0 +1,290 @@
+# supervisor.py — çok süreçli dağıtım (ingest / compute / bot)
+# - main.py tek süreç modudur (değişmedi); bu giriş noktası aynı bileşenleri ayrı süreçlerde çalıştırır:
+#     ingest : Binance WS akışları + funding poll + jobs/worker_a (cache'e yazar)
+#     compute: RSI/MACD stratejileri + SignalEvaluator + OrderManager + jobs/worker_b
+#     bot    : Telegram (PTB) + handler'lar + /io snapshot servisi + keep-alive
+# - Süreçler arası: utils/ipc Hub (supervisor içinde, Unix domain socket) üzerinden konular
+#     kline   ingest → compute, bot   (WS kline payload'ı)
+#     ticker  ingest → bot, compute   (ticker / diğer WS mesajları; compute: OrderManager fiyatı)
+#     funding ingest → bot            (REST funding poll)
+#     signal  bot → compute           (handler'lardan gelen sinyaller)
+#     ta      bot → compute → bot     (/t raporu, istek/yanıt; tarama compute'ta, polling beklemez)
+#   Cache/SQLite (utils/cache, utils/storage) zaten süreçler arası paylaşımlı (WAL + data_version)
+# - Ağır TA hesabı compute sürecinde: Telegram yanıtları ve WS okumaları onu beklemez
+# - Çöken alt süreç üstel bekleme ile yeniden başlatılır; SIGINT/SIGTERM tüm süreçleri düzgün kapatır
+#
+# Kullanım: python supervisor.py [--roles ingest,compute,bot] [--address data/ipc.sock]
+
+import argparse
+import asyncio
+import logging
+import multiprocessing as mp
+import signal
+import time
+from typing import Dict, List, Optional
+
+from utils.config import CONFIG
+from utils.ipc import BusClient, Hub
+from utils.monitoring import configure_logging
+
+LOG = logging.getLogger("supervisor")
+
+ROLES = ("ingest", "compute", "bot")
+_RESTART_MAX_DELAY = 60.0
+_HEALTHY_AFTER = 60.0   # bu kadar ayakta kalan süreç için bekleme sıfırlanır
+_TA_TIMEOUT = 120.0     # /t all taraması uzun sürebilir
+
+
+# -------------------------------
+# Ortak yardımcılar
+# -------------------------------
+def _stop_event() -> asyncio.Event:
+    loop = asyncio.get_running_loop()
+    ev = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, ev.set)
+        except NotImplementedError:
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(ev.set))
+    return ev
+
+
+class RemoteEvaluator:
+    """bot sürecinde signal_handler için: sinyali compute sürecindeki SignalEvaluator'a iletir."""
+
+    def __init__(self, bus: BusClient):
+        self.bus = bus
+
+    async def publish(self, sig) -> None:
+        self.bus.publish("signal", sig.to_dict())
+
+
+# -------------------------------
+# Roller
+# -------------------------------
+async def run_ingest(address: str) -> None:
+    from utils.kline_pipeline import build_stream_list
+    from utils.binance_api import BinanceClient
+    from utils.stream_manager import StreamManager
+    from jobs import worker_a
+
+    stop = _stop_event()
+    bus = BusClient(address, "ingest")
+    await bus.start()
+
+    async def bridge(msg):
+        data = msg.get("data") if isinstance(msg, dict) else msg
+        if not isinstance(data, dict):
+            return
+        bus.publish("kline" if "k" in data else "ticker", data)
+
+    async def on_funding(entry):
+        bus.publish("funding", entry)
+
+    symbols = CONFIG.BINANCE.TOP_SYMBOLS_FOR_IO
+    stream_mgr = StreamManager(BinanceClient())
+    stream_mgr.start_combined_groups(build_stream_list(symbols, CONFIG.BINANCE.STREAM_INTERVAL), bridge)
+    stream_mgr.start_periodic_funding_poll(symbols, interval_sec=60, callback=on_funding)
+    worker = asyncio.create_task(worker_a.run_forever(), name="worker_a")
+    LOG.info("ingest started: %s", ", ".join(symbols))
+
+    await stop.wait()
+    stream_mgr.cancel_all()
+    worker.cancel()
+    await bus.stop()
+
+
+async def run_compute(address: str) -> None:
+    from utils.kline_pipeline import process_kline
+    from handlers import signal_handler
+    from jobs import worker_b
+    from strategies.rsi_macd_strategy import RSI_MACD_Strategy
+    from utils import db
+    from utils.db import init_db
+    from utils.market_state import PRICES
+    from utils.order_manager import OrderManager
+    from utils.signal_evaluator import Signal, SignalEvaluator
+
+    init_db()
+    stop = _stop_event()
+    order_manager = OrderManager(paper_mode=CONFIG.BOT.PAPER_MODE)
+    evaluator = SignalEvaluator(
+        decision_callback=order_manager.process_decision,
+        loop=asyncio.get_running_loop(),
+        window_seconds=CONFIG.BOT.EVALUATOR_WINDOW,
+        threshold=CONFIG.BOT.EVALUATOR_THRESHOLD,
+    )
+    signal_handler.set_evaluator(evaluator)
+    strategies = {sym: RSI_MACD_Strategy(sym) for sym in CONFIG.BINANCE.TOP_SYMBOLS_FOR_IO}
+
+    from handlers import ta_handler
+
+    async def on_signal(d):
+        await evaluator.publish(Signal(d["source"], d["symbol"], d["type"], d.get("strength", 0.5),
+                                       d.get("payload"), ts=d.get("ts")))
+
+    bus = BusClient(address, "compute")
+    bus.subscribe("kline", lambda data: process_kline(data, strategies))
+    bus.subscribe("signal", on_signal)
+    bus.serve("ta", ta_handler.build_ta_report)
+    bus.subscribe("ticker", PRICES.update)   # OrderManager fiyatı
+    await bus.start()
+    evaluator.start()
+    await order_manager.start()
+    worker = asyncio.create_task(worker_b.run_forever(), name="worker_b")
+    LOG.info("compute started: PAPER_MODE=%s", CONFIG.BOT.PAPER_MODE)
+
+    await stop.wait()
+    evaluator.stop()
+    order_manager.stop()
+    worker.cancel()
+    await bus.stop()
+    await asyncio.to_thread(db.shutdown)
+
+
+async def run_bot(address: str) -> None:
+    from telegram.ext import ApplicationBuilder
+    from handlers import funding_handler, signal_handler, ta_handler, ticker_handler
+    from keep_alive import keep_alive
+    from utils.db import init_db
+    from utils.handler_loader import load_handlers
+    from utils.kline_pipeline import mirror_kline
+
+    init_db()
+    token = CONFIG.TELEGRAM.BOT_TOKEN
+    if not token:
+        LOG.error("TELEGRAM_BOT_TOKEN is not set. bot role exiting.")
+        return
+    stop = _stop_event()
+    app = ApplicationBuilder().token(token).build()
+    keep_alive()
+
+    bus = BusClient(address, "bot")
+
+    async def on_ticker(data):
+        await funding_handler.handle_funding_data(data)
+        await ticker_handler.handle_ticker_data(data)
+
+    bus.subscribe("kline", mirror_kline)   # /ta, /io için yerel barlar + Kalman (strateji yok)
+    bus.subscribe("ticker", on_ticker)
+    bus.subscribe("funding", funding_handler.handle_funding_data)
+    await bus.start()
+    signal_handler.set_evaluator(RemoteEvaluator(bus))
+    ta_handler.set_backend(lambda args: bus.request("ta", args, timeout=_TA_TIMEOUT))
+    load_handlers(app)
+
+    if CONFIG.IO.ENABLED:
+        from handlers import io_handler
+        from utils import kline_pipeline
+        io_handler.IO_SNAPSHOTS.start()
+        kline_pipeline.on_close(io_handler.IO_SNAPSHOTS.notify)   # kapanan bar → erken yenileme
+
+    await app.initialize()
+    await app.start()
+    await app.updater.start_polling()
+    LOG.info("bot started (Telegram polling)")
+
+    await stop.wait()
+    await app.updater.stop()
+    await app.stop()
+    await app.shutdown()
+    if CONFIG.IO.ENABLED:
+        from handlers import io_handler
+        io_handler.IO_SNAPSHOTS.stop()
+    await bus.stop()
+
+
+_ROLE_FUNCS = {"ingest": run_ingest, "compute": run_compute, "bot": run_bot}
+
+
+def _child_main(role: str, address: str) -> None:
+    configure_logging(logging.INFO)
+    asyncio.run(_ROLE_FUNCS[role](address))
+
+
+# -------------------------------
+# Supervisor
+# -------------------------------
+class _Child:
+    __slots__ = ("role", "proc", "started", "restarts", "delay", "next_start")
+
+    def __init__(self, role: str):
+        self.role = role
+        self.proc: Optional[mp.Process] = None
+        self.started = 0.0
+        self.restarts = 0
+        self.delay = 1.0
+        self.next_start = 0.0
+
+
+async def supervise(roles: List[str], address: str) -> None:
+    ctx = mp.get_context("spawn")
+    hub = Hub(address)
+    await hub.start()
+    stop = _stop_event()
+    children: Dict[str, _Child] = {r: _Child(r) for r in roles}
+
+    def spawn(c: _Child) -> None:
+        c.proc = ctx.Process(target=_child_main, args=(c.role, address), name=f"bot-{c.role}", daemon=False)
+        c.proc.start()
+        c.started = time.monotonic()
+        LOG.info("started %s (pid=%s)", c.role, c.proc.pid)
+
+    for c in children.values():
+        spawn(c)
+
+    while not stop.is_set():
+        now = time.monotonic()
+        for c in children.values():
+            if c.proc is not None and c.proc.is_alive():
+                if now - c.started > _HEALTHY_AFTER:
+                    c.delay = 1.0
+                continue
+            if c.proc is not None:
+                LOG.warning("%s exited (code=%s); restarting in %.0fs", c.role, c.proc.exitcode, c.delay)
+                c.proc = None
+                c.next_start = now + c.delay
+                c.delay = min(c.delay * 2, _RESTART_MAX_DELAY)
+            elif now >= c.next_start:
+                c.restarts += 1
+                spawn(c)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=1.0)
+        except asyncio.TimeoutError:
+            pass
+
+    LOG.info("stopping children...")
+    for c in children.values():
+        if c.proc is not None and c.proc.is_alive():
+            c.proc.terminate()   # SIGTERM → rol kendi kapanışını yapar
+    deadline = time.monotonic() + 15
+    for c in children.values():
+        if c.proc is not None:
+            await asyncio.to_thread(c.proc.join, max(0.0, deadline - time.monotonic()))
+            if c.proc.is_alive():
+                c.proc.kill()
+    await hub.stop()
+    LOG.info("supervisor stopped")
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Multi-process deployment (ingest / compute / bot)")
+    ap.add_argument("--roles", default=",".join(CONFIG.SYSTEM.SUPERVISOR_ROLES),
+                    help="çalıştırılacak roller (virgülle)")
+    ap.add_argument("--role", choices=ROLES, help="tek rolü bu süreçte çalıştır (hub'a bağlanır)")
+    ap.add_argument("--address", default=CONFIG.SYSTEM.IPC_ADDRESS, help="Unix soket yolu veya tcp://host:port")
+    args = ap.parse_args(argv)
+
+    configure_logging(logging.INFO)
+    if args.role:
+        asyncio.run(_ROLE_FUNCS[args.role](args.address))
+        return
+    roles = [r.strip() for r in args.roles.split(",") if r.strip()]
+    unknown = [r for r in roles if r not in ROLES]
+    if unknown:
+        ap.error(f"unknown roles: {unknown}")
+    asyncio.run(supervise(roles, args.address))
+
+
+if __name__ == "__main__":
+    main()
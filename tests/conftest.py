@@ -0,0 +1,13 @@
+# tests/conftest.py
+# - SQLite dosyaları (cache, db) geçici dizine: import sırasında açıldıkları için modüllerden önce ayarlanır
+# - Depo kökü sys.path'te (python -m pytest / pytest ikisi de çalışsın)
+import os
+import sys
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="bot-tests-")
+os.environ.setdefault("CACHE_DB_PATH", os.path.join(_TMP, "cache.sqlite3"))
+os.environ.setdefault("DB_PATH", os.path.join(_TMP, "paper_trades.db"))
+os.environ.setdefault("SQLITE_DB_PATH", os.path.join(_TMP, "paper_log.db"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils import binance_api
+from utils.binance_api import BinanceClient, BinanceHTTPClient, OrderStatusUnknown
+from utils.config import CONFIG
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(CONFIG.BINANCE, "API_KEY", "k")
+    monkeypatch.setattr(CONFIG.BINANCE, "SECRET_KEY", "s")
+    monkeypatch.setattr(CONFIG.BINANCE, "MAX_RETRIES", 2)
+
+    async def no_sleep(*_):
+        pass
+    monkeypatch.setattr(binance_api.asyncio, "sleep", no_sleep)
+    calls = []
+
+    def make(handler):
+        def h(req):
+            calls.append(req)
+            return handler(req)
+        c = BinanceClient()
+        c.http = BinanceHTTPClient()
+        c.http.client = httpx.AsyncClient(transport=httpx.MockTransport(h))
+        return c
+    make.calls = calls
+    return make
+
+
+def _order(c):
+    return asyncio.run(c.create_futures_order("BTCUSDT", "BUY", "MARKET", quantity=0.01))
+
+
+def _posts(calls):
+    return [r for r in calls if r.method == "POST"]
+
+
+def test_timeout_returns_order_found_by_client_id(client):
+    def h(req):
+        if req.method == "POST":
+            raise httpx.ReadTimeout("t")
+        return httpx.Response(200, json={"status": "FILLED", "clientOrderId": req.url.params["origClientOrderId"]})
+    res = _order(client(h))
+    assert res["status"] == "FILLED"
+    post = _posts(client.calls)
+    assert len(post) == 1
+    assert res["clientOrderId"] == post[0].url.params["newClientOrderId"]
+
+
+def test_timeout_and_not_found_is_unknown_without_resend(client):
+    def h(req):
+        if req.method == "POST":
+            raise httpx.ReadTimeout("t")
+        return httpx.Response(400, json={"code": -2013, "msg": "Order does not exist."})
+    with pytest.raises(OrderStatusUnknown) as exc:
+        _order(client(h))
+    post = _posts(client.calls)
+    assert len(post) == 1
+    assert exc.value.client_order_id == post[0].url.params["newClientOrderId"]
+
+
+def test_server_error_is_not_retried(client):
+    def h(req):
+        if req.method == "POST":
+            return httpx.Response(503)
+        raise httpx.ConnectError("down")
+    with pytest.raises(OrderStatusUnknown):
+        _order(client(h))
+    assert len(_posts(client.calls)) == 1
+
+
+def test_rejected_order_raises_without_query(client):
+    with pytest.raises(httpx.HTTPStatusError):
+        _order(client(lambda req: httpx.Response(400, json={"code": -1111})))
+    assert [r.method for r in client.calls] == ["POST"]
+
+
+def test_get_retries_are_capped(client):
+    c = client(lambda req: httpx.Response(503))
+    with pytest.raises(Exception):
+        asyncio.run(c.http._request("GET", "/x", use_cache=False))
+    assert len(client.calls) == 1 + CONFIG.BINANCE.MAX_RETRIES
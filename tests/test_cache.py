@@ -0,0 +1,67 @@
+import asyncio
+import pickle
+import sqlite3
+import time
+
+from utils import cache
+
+
+def _rows(key):
+    return cache.DB.query_one("SELECT COUNT(*) FROM kvstore WHERE k = ?", (key,))[0]
+
+
+def test_compact_keeps_exactly_max_rows():
+    for i in range(10):
+        cache.put("trim", i, ttl=600, max_rows=3)
+    cache.DB.write(lambda c: None)
+    assert _rows("trim") == 10
+    cache.compact()
+    assert _rows("trim") == 3
+    assert cache.get_latest("trim") == 9
+
+
+def test_compact_drops_expired_rows():
+    cache.put("exp", "old", ttl=0, max_rows=5)
+    cache.DB.write(lambda c: None)
+    time.sleep(0.01)
+    cache.compact()
+    assert _rows("exp") == 0
+
+
+def test_aput_roundtrip_and_latest_wins():
+    async def run():
+        await cache.aput("rt", {"a": 1})
+        await cache.aput("rt", {"a": 2})
+        return await cache.aget_latest("rt")
+    assert asyncio.run(run()) == {"a": 2}
+
+
+def test_foreign_write_invalidates_front_tier():
+    cache.put("fx", "mine", ttl=600)
+    cache.DB.write(lambda c: None)
+    assert cache.get_latest("fx") == "mine"
+    conn = sqlite3.connect(cache.DB_PATH)
+    conn.execute("INSERT INTO kvstore(k, ts, ttl, v) VALUES(?,?,?,?)",
+                 ("fx", int(time.time() * 1000) + 60_000, 600_000, pickle.dumps("theirs")))
+    conn.commit()
+    conn.close()
+    assert cache.get_latest("fx") == "theirs"
+
+
+def test_own_writes_skip_revalidation(monkeypatch):
+    cache.put("own", 1)
+    cache.DB.write(lambda c: None)
+    cache.get_latest("own")
+    seen = []
+    orig = cache.DB.query_one
+
+    def spy(sql, params=()):
+        if sql == cache._SQL_LATEST_TS:
+            seen.append(params)
+        return orig(sql, params)
+    monkeypatch.setattr(cache.DB, "query_one", spy)
+    for i in range(5):
+        cache.put("own", i)
+        cache.DB.write(lambda c: None)
+        assert cache.get_latest("own") == i
+    assert seen == []
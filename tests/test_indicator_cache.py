@@ -0,0 +1,63 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import ta_utils
+from utils.indicator_cache import INDICATOR_CACHE, bar_cached, bar_key
+
+
+def _frame(n=50, closed=True, symbol="ICTEST"):
+    df = pd.DataFrame({"open_time": np.arange(n, dtype=np.int64) * 60_000,
+                       "open": 1.0, "high": 1.0, "low": 1.0, "close": np.linspace(1, 2, n), "volume": 1.0})
+    df.attrs.update({"symbol": symbol, "interval": "1m", "closed": closed})
+    return df
+
+
+@pytest.fixture(autouse=True)
+def _clear():
+    INDICATOR_CACHE.clear()
+    yield
+    INDICATOR_CACHE.clear()
+
+
+def test_bar_key_requires_closed_frame():
+    assert bar_key(_frame()) == ("ICTEST", "1m", 49 * 60_000, 50)
+    assert bar_key(_frame(closed=False)) is None
+
+
+def test_same_bar_is_computed_once_and_new_bar_recomputes():
+    calls = []
+
+    @bar_cached("test_fn")
+    def fn(df, k=1):
+        calls.append(k)
+        return float(df["close"].iloc[-1]) * k
+
+    df = _frame()
+    assert fn(df) == fn(df) == 2.0
+    assert fn(df, k=2) == 4.0
+    assert fn(_frame(51)) == 2.0
+    assert calls == [1, 2, 1]
+
+
+def test_hybrid_caches_cpu_part_but_fetches_io_each_call(monkeypatch):
+    cpu_calls, io_calls = [], []
+
+    def cpu_fn(df):
+        cpu_calls.append(1)
+        return float(df["close"].iloc[-1])
+
+    async def io_fn():
+        io_calls.append(1)
+        return len(io_calls)
+
+    monkeypatch.setattr(ta_utils, "CPU_FUNCTIONS", {"last": cpu_fn})
+    monkeypatch.setattr(ta_utils, "IO_FUNCTIONS", {"live": io_fn})
+    df = _frame()
+    first = ta_utils.calculate_all_ta_hybrid(df)
+    second = asyncio.run(ta_utils.calculate_all_ta_hybrid_async(df))
+    assert first == {"last": 2.0, "live": 1}
+    assert second == {"last": 2.0, "live": 2}
+    assert len(cpu_calls) == 1 and len(io_calls) == 2
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from utils import ta_utils
+from utils.kline_pipeline import mirror_kline
+
+M = 60_000
+H = 3_600_000
+
+
+def _loop_filter(vals, q, r):
+    x, p, out = vals[0], 1.0, []
+    for z in vals:
+        prior = p + q
+        k = prior / (prior + r)
+        x = x + k * (z - x)
+        p = (1 - k) * prior
+        out.append(x)
+    return np.array(out)
+
+
+def _frame(closes, symbol="KFTEST", interval="1h", step=H):
+    df = pd.DataFrame({"open_time": np.arange(len(closes), dtype=np.int64) * step,
+                       "open": closes, "high": closes, "low": closes, "close": closes,
+                       "volume": np.ones(len(closes))})
+    df.attrs.update({"symbol": symbol, "interval": interval, "closed": True})
+    return df
+
+
+def test_gain_sequence_matches_riccati_recursion():
+    q, r = 1e-5, 1e-2
+    gains, p_last = ta_utils.kalman_gain_sequence(q, r, 5000)
+    p, ref = 1.0, []
+    for _ in range(len(gains)):
+        prior = p + q
+        k = prior / (prior + r)
+        p = (1 - k) * prior
+        ref.append(k)
+    assert len(gains) < 5000
+    np.testing.assert_allclose(gains, ref, rtol=1e-12)
+    assert abs(p_last - p) < 1e-15
+
+
+def test_filter_series_matches_loop():
+    x = np.random.default_rng(0).normal(size=3000).cumsum() + 1000
+    got = ta_utils.kalman_filter_series(pd.Series(x), 1e-5, 1e-2).to_numpy()
+    np.testing.assert_allclose(got, _loop_filter(x, 1e-5, 1e-2), rtol=1e-11)
+
+
+def test_state_seeds_then_advances_incrementally():
+    x = np.random.default_rng(1).normal(size=400).cumsum() + 100
+    st = ta_utils.KalmanState(H, 1e-5, 1e-2)
+    df = _frame(x[:300])
+    st.sync(df["close"], df["open_time"].to_numpy())
+    for i in range(300, 400):
+        st.update(x[i], i * H)
+    ref = ta_utils.kalman_filter_series(pd.Series(x), 1e-5, 1e-2).to_numpy()
+    assert abs(st.x - ref[-1]) < 1e-9
+    kf = st.sync(_frame(x)["close"], _frame(x)["open_time"].to_numpy())
+    tail = kf.dropna()
+    assert len(tail) == ta_utils._KALMAN_TAIL
+    np.testing.assert_allclose(tail.to_numpy(), ref[-len(tail):], atol=1e-9)
+
+
+def test_skipped_bar_invalidates_state():
+    st = ta_utils.KalmanState(H)
+    df = _frame(np.linspace(1, 2, 50))
+    st.sync(df["close"], df["open_time"].to_numpy())
+    assert st.update(2.0, 51 * H) is None and not st.ready
+
+
+def test_older_frame_does_not_move_state():
+    x = np.linspace(1, 2, 100)
+    st = ta_utils.KalmanState(H)
+    df = _frame(x)
+    st.sync(df["close"], df["open_time"].to_numpy())
+    last = st.last_open_time
+    old = df.iloc[:60]
+    assert st.sync(old["close"], old["open_time"].to_numpy()) is None
+    assert st.last_open_time == last
+
+
+def test_alpha_ta_uses_state_and_kline_stream_advances_it():
+    sym = "KFSTREAM"
+    x = np.random.default_rng(2).normal(size=300).cumsum() + 100
+    res = ta_utils.compute_alpha_ta(_frame(x[:299], symbol=sym, interval="1m", step=M))
+    assert res["detail"]
+    st = ta_utils.get_kalman_state(sym, "1m", create=False)
+    assert st is not None and st.last_open_time == 298 * M
+    mirror_kline({"s": sym, "k": {"t": 299 * M, "T": 300 * M - 1, "i": "1m", "o": x[299], "h": x[299],
+                                  "l": x[299], "c": x[299], "v": 1.0, "x": True}})
+    assert st.last_open_time == 299 * M
+    ref = ta_utils.kalman_filter_series(pd.Series(x)).to_numpy()
+    assert abs(st.x - ref[-1]) < 1e-9
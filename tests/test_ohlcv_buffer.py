@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from utils.ohlcv_buffer import OHLCVRing
+
+
+def _kl(t, c):
+    return [t, c, c + 1, c - 1, c, 10.0]
+
+
+def test_wraparound_keeps_latest_bars_contiguous():
+    ring = OHLCVRing(4)
+    for t in range(7):
+        ring.append(t, t, t + 1, t - 1, t, 1.0)
+    assert len(ring) == 4 and ring.last_time == 6
+    assert ring.times().tolist() == [3, 4, 5, 6]
+    assert ring.view("close", 2).tolist() == [5.0, 6.0]
+    assert ring.close.flags["C_CONTIGUOUS"]
+
+
+def test_same_open_time_updates_last_bar_in_place():
+    ring = OHLCVRing(3)
+    ring.append(1, 1, 1, 1, 1)
+    ring.append(2, 2, 2, 2, 2)
+    ring.append(2, 2, 5, 2, 4, 7)
+    assert len(ring) == 2
+    assert ring.last("close") == 4 and ring.last("high") == 5 and ring.last("volume") == 7
+
+
+def test_extend_klines_merges_overlap_and_keeps_capacity():
+    ring = OHLCVRing.from_klines([_kl(t, t) for t in range(3)], capacity=5)
+    ring.extend_klines([_kl(2, 20)] + [_kl(t, t) for t in range(3, 10)])
+    assert ring.times().tolist() == [5, 6, 7, 8, 9]
+    ring2 = OHLCVRing.from_klines([_kl(t, t) for t in range(3)], capacity=5)
+    ring2.extend_klines([_kl(2, 20), _kl(3, 3)])
+    assert ring2.times().tolist() == [0, 1, 2, 3]
+    assert ring2.close.tolist() == [0, 1, 20, 3]
+
+
+def test_frame_is_a_view_until_next_append():
+    ring = OHLCVRing.from_klines([_kl(t, t) for t in range(4)], capacity=4)
+    df = ring.frame(3)
+    assert df["open_time"].tolist() == [1, 2, 3]
+    assert np.shares_memory(df["close"].to_numpy(), ring._px)
+    assert ring.frame(2, columns=["close"], with_time=False).columns.tolist() == ["close"]
+
+
+def test_append_close_and_empty_ring():
+    ring = OHLCVRing(2)
+    assert ring.last() is None and ring.last_time == -1 and len(ring.frame()) == 0
+    ring.append_close(5.0)
+    ring.append_close(6.0)
+    assert ring.times().tolist() == [0, 1] and ring.close.tolist() == [5.0, 6.0]
+    with pytest.raises(ValueError):
+        OHLCVRing(0)
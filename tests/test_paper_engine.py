@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from utils.config import CONFIG
+from utils.order_manager import OrderManager
+from utils.paper_engine import PaperExchange
+
+
+@pytest.fixture
+def ex():
+    return PaperExchange(taker_fee=0.001, maker_fee=0.0, on_fill=None)
+
+
+def test_market_walks_levels_and_realizes_pnl(ex):
+    ex.update_book("X", [[99, 10]], [[100, 1], [101, 1]])
+    r = ex.submit_market("X", "BUY", 2)
+    assert r["status"] == "FILLED" and r["avgPrice"] == pytest.approx(100.5)
+    ex.update_book("X", [[110, 10]], [[111, 10]])
+    ex.submit_market("X", "SELL", 2)
+    pos = ex.position("X")
+    assert pos["qty"] == 0 and pos["realized"] == pytest.approx(19.0)
+    assert ex.realized_pnl() == pytest.approx(19.0 - 0.201 - 0.22)
+
+
+def test_paper_balance_is_equity(ex):
+    class Api:
+        async def get_futures_account(self):
+            return {}
+    om = OrderManager(api_module=Api(), paper_mode=True, prices=None, paper=ex)
+    ex.update_book("X", [[99, 10]], [[100, 10]])
+    ex.submit_market("X", "BUY", 1)
+    ex.update_book("X", [[90, 10]], [[91, 10]])
+    ex.submit_market("X", "SELL", 1)
+    bal = asyncio.run(om.get_futures_balance())
+    assert bal == pytest.approx(CONFIG.BOT.PAPER_BALANCE - 10 - 0.1 - 0.09)
+
+
+def test_crossed_resting_limit_never_overfills(ex):
+    ex.update_book("X", [[90, 5]], [[101, 0.1], [102, 0.2]])
+    oid = ex.submit_limit("X", "BUY", 1.0, 100.0)["id"]
+    ex.update_book("X", [[90, 5]], [[99.5, 0.1], [99.6, 0.2], [99.9, 0.7000000000000001], [100, 5]])
+    o = ex.order(oid)
+    assert o["status"] == "FILLED" and o["executedQty"] == 1.0
+
+
+def test_trade_at_price_advances_queue_by_remaining_volume(ex):
+    ex.update_book("X", [[100, 2]], [[101, 5]])
+    a = ex.submit_limit("X", "BUY", 1.0, 100.0)["id"]
+    b = ex.submit_limit("X", "BUY", 1.0, 100.0)["id"]
+    ex.on_trade("X", 100.0, 3.0, buyer_maker=True)   # 2 önümüzde + 1 bizim
+    assert ex.order(a)["executedQty"] == 1.0
+    assert ex.order(b)["executedQty"] == 0.0 and ex.order(b)["queueAhead"] == 0.0
+    ex.on_trade("X", 100.0, 0.5, buyer_maker=True)
+    assert ex.order(b)["executedQty"] == 0.5
+
+
+def test_trade_through_price_fills_all_resting(ex):
+    ex.update_book("X", [[100, 2]], [[101, 5]])
+    ids = [ex.submit_limit("X", "BUY", 1.0, p)["id"] for p in (100.0, 99.0, 98.0)]
+    ex.on_trade("X", 98.5, 0.1, buyer_maker=True)
+    st = [ex.order(i)["status"] for i in ids]
+    assert st[:2] == ["FILLED", "FILLED"] and st[2] != "FILLED"
+
+
+def test_sell_side_is_not_hit_by_seller_aggressor(ex):
+    ex.update_book("X", [[99, 5]], [[100, 2]])
+    oid = ex.submit_limit("X", "SELL", 1.0, 100.0)["id"]
+    ex.on_trade("X", 100.0, 10.0, buyer_maker=True)
+    assert ex.order(oid)["executedQty"] == 0.0
+    ex.on_trade("X", 100.0, 10.0, buyer_maker=False)
+    assert ex.order(oid)["status"] == "FILLED"
+
+
+def test_crossing_fills_in_price_priority_and_consumes_book_once(ex):
+    ex.update_book("X", [[90, 5]], [[101, 5]])
+    low = ex.submit_limit("X", "BUY", 1.0, 99.0)["id"]
+    high = ex.submit_limit("X", "BUY", 1.0, 100.0)["id"]
+    ex.update_book("X", [[90, 5]], [[98.5, 0.5], [99.5, 1.0], [102, 5]])
+    assert ex.order(high)["executedQty"] == 1.0 and ex.order(high)["avgPrice"] == 100.0
+    # 100'lük emir 98.5 + 0.5 @ 99.5 aldı; 99'luk emre ≤ 99 likidite kalmadı
+    assert ex.order(low)["executedQty"] == 0.0
+    assert ex.books["X"].asks[0].tolist() == [99.5, 0.5]
+
+
+def test_queue_ahead_shrinks_with_level(ex):
+    ex.update_book("X", [[100, 5], [99, 1]], [[101, 5]])
+    oid = ex.submit_limit("X", "BUY", 1.0, 100.0)["id"]
+    assert ex.order(oid)["queueAhead"] == 5.0
+    ex.update_book("X", [[100, 2], [99, 1]], [[101, 5]])
+    assert ex.order(oid)["queueAhead"] == 2.0
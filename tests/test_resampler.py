@@ -0,0 +1,64 @@
+from utils.resampler import MultiTimeframeResampler
+
+M = 60_000
+H = 3_600_000
+
+
+def _bar(t, px=100.0):
+    return (t, px, px + 1, px - 1, px, 1.0)
+
+
+def _hours(n, start=0):
+    return [[start + i * H, 100.0, 101.0, 99.0, 100.0, 60.0] for i in range(n)]
+
+
+def _minutes(r, t0, t1):
+    for t in range(t0, t1, M):
+        r.update(*_bar(t))
+
+
+def test_minutes_aggregate_into_hour():
+    r = MultiTimeframeResampler("X", timeframes=["1h"])
+    for i in range(60):
+        r.update(i * M, 100 + i, 101 + i, 99 - i, 100.5 + i, 2.0)
+    assert r.closed_count("1h") == 1
+    row = r.klines("1h")[-1]
+    assert list(row) == [0, 100, 160, 40, 159.5, 120.0]
+
+
+def test_partial_first_bucket_keeps_seeded_history():
+    r = MultiTimeframeResampler("X", timeframes=["1h"])
+    # REST seed 5 kapanmış saat; akış 6. saatin ortasında başlar
+    r.seed("1h", _hours(5), now_ms=5 * H + 30 * M)
+    _minutes(r, 5 * H + 30 * M, 6 * H)
+    assert r.closed_count("1h") == 5
+    # eksik saat REST ile tamamlanır, sonraki tam saat akıştan eklenir
+    r.seed("1h", _hours(6), now_ms=6 * H + M)
+    _minutes(r, 6 * H, 7 * H)
+    assert r.closed_count("1h") == 7
+    assert int(r.rings["1h"].last_time) == 6 * H
+
+
+def test_real_gap_resets_history():
+    r = MultiTimeframeResampler("X", timeframes=["1h"])
+    r.seed("1h", _hours(5), now_ms=5 * H)
+    _minutes(r, 7 * H, 8 * H)   # 5. ve 6. saat hiç gelmedi
+    assert r.closed_count("1h") == 1
+    assert int(r.rings["1h"].last_time) == 7 * H
+
+
+def test_bucket_already_seeded_is_not_duplicated():
+    r = MultiTimeframeResampler("X", timeframes=["1h"])
+    _minutes(r, 0, 59 * M)
+    r.seed("1h", _hours(1), now_ms=H)   # seed son dakikanın WS mesajından önce geldi
+    r.update(*_bar(59 * M))
+    assert r.closed_count("1h") == 1
+
+
+def test_partial_frame_combines_closed_minutes_and_live_bar():
+    r = MultiTimeframeResampler("X", timeframes=["5m"])
+    _minutes(r, 0, 3 * M)
+    r.update(3 * M, 100.0, 110.0, 100.0, 105.0, 4.0, closed=False)
+    df = r.frame("5m", include_partial=True)
+    assert len(df) == 1 and df.attrs["closed"] is False
+    assert df["high"].iloc[-1] == 110.0 and df["volume"].iloc[-1] == 7.0
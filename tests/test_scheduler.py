@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from utils.scheduler import ScheduledTask, TaskScheduler
+
+
+def _run_for(sched, seconds):
+    async def go():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(sched.run(), timeout=seconds)
+    asyncio.run(go())
+
+
+def test_fixed_cadence_runs_on_interval():
+    calls = []
+
+    async def tick():
+        calls.append(asyncio.get_running_loop().time())
+    sched = TaskScheduler([ScheduledTask("tick", tick, 0.05)])
+    _run_for(sched, 0.27)
+    assert 5 <= len(calls) <= 6
+    gaps = [b - a for a, b in zip(calls, calls[1:])]
+    assert all(0.02 < g < 0.1 for g in gaps)
+    assert sched.stats()["tick"]["runs"] == len(calls)
+
+
+def test_overlapping_run_is_skipped_not_stacked():
+    active = {"now": 0, "max": 0}
+
+    async def slow():
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        try:
+            await asyncio.sleep(0.12)
+        finally:
+            active["now"] -= 1
+    sched = TaskScheduler([ScheduledTask("slow", slow, 0.05, timeout=1.0)])
+    _run_for(sched, 0.3)
+    st = sched.stats()["slow"]
+    assert active["max"] == 1
+    assert st["skipped"] >= 2 and st["runs"] >= 1
+
+
+def test_timeout_and_error_are_counted_and_loop_keeps_going():
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def boom():
+        raise RuntimeError("x")
+    sched = TaskScheduler([ScheduledTask("hang", hang, 0.05, timeout=0.02),
+                           ScheduledTask("boom", boom, 0.05)])
+    _run_for(sched, 0.18)
+    st = sched.stats()
+    assert st["hang"]["timeouts"] >= 2 and st["hang"]["runs"] == st["hang"]["timeouts"]
+    assert st["boom"]["errors"] >= 3
+
+
+def test_priority_orders_tasks_waiting_for_a_slot():
+    order = []
+
+    def make(name):
+        async def fn():
+            order.append(name)
+            await asyncio.sleep(0.01)
+        return fn
+    sched = TaskScheduler([ScheduledTask("low", make("low"), 1.0, priority=20),
+                           ScheduledTask("high", make("high"), 1.0, priority=1),
+                           ScheduledTask("mid", make("mid"), 1.0, priority=5)], max_concurrent=1)
+    _run_for(sched, 0.1)
+    assert order == ["high", "mid", "low"]
+
+
+def test_advance_skips_missed_slots_and_keeps_phase():
+    async def noop():
+        pass
+    t = ScheduledTask("t", noop, 10.0)
+    sched = TaskScheduler([t])
+    t.next_base = 100.0
+    sched._advance(t, 135.0)
+    assert t.next_base == 140.0
+    sched._advance(t, 141.0)
+    assert t.next_base == 150.0
+    assert [e[0] for e in sched._heap] == [140.0, 150.0]
+
+
+def test_from_config_ignores_unknown_tasks_and_defaults_timeout():
+    async def noop():
+        pass
+    sched = TaskScheduler.from_config(
+        [{"name": "a", "interval": 5}, {"name": "missing", "interval": 1},
+         {"name": "b", "interval": 2, "timeout": 1, "priority": 3, "jitter": 0.5}],
+        {"a": noop, "b": noop}, max_concurrent=0)
+    assert set(sched.tasks) == {"a", "b"} and sched.max_concurrent == 1
+    assert sched.tasks["a"].timeout == 5.0 and sched.tasks["b"].priority == 3
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from utils.signal_evaluator import Signal, SignalEvaluator
+
+
+class Clock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+@pytest.fixture
+def ev():
+    loop = asyncio.new_event_loop()
+    clock = Clock()
+    e = SignalEvaluator(loop=loop, window_seconds=10, threshold=0.3, clock=clock)
+    e.clock_src = clock
+    yield e
+    loop.close()
+
+
+def _sig(ev, type_, strength, dt=0.0, symbol="btcusdt"):
+    return Signal("t", symbol, type_, strength, ts=ev.clock_src.t + dt)
+
+
+def test_window_sums_track_pushes_and_expiry(ev):
+    assert ev.evaluate(_sig(ev, "BUY", 0.9))["decision"] == "BUY"
+    ev.clock_src.t += 4
+    d = ev.evaluate(_sig(ev, "SELL", 0.6))
+    win = ev.buf["BTCUSDT"]
+    assert len(win.items) == 2 and win.buy == pytest.approx(0.9) and win.sell == pytest.approx(0.6)
+    assert d["decision"] == "HOLD" and d["signals"] == []
+    ev.clock_src.t += 7   # ilk BUY pencereden çıkar
+    d = ev.evaluate(_sig(ev, "SELL", 0.5))
+    assert len(win.items) == 2 and win.buy == 0.0 and win.sell == pytest.approx(1.1)
+    assert d["decision"] == "SELL" and d["strength"] == pytest.approx(0.55)
+    assert [s["strength"] for s in d["signals"]] == [0.6, 0.5]
+
+
+def test_expire_returns_next_deadline_and_drops_empty_symbols(ev):
+    ev.evaluate(_sig(ev, "BUY", 0.5, symbol="AAA"))
+    ev.clock_src.t += 3
+    ev.evaluate(_sig(ev, "SELL", 0.5, symbol="BBB"))
+    assert ev.expire() == pytest.approx(1010.0)
+    assert ev.expire(now=1011.0) == pytest.approx(1013.0)
+    assert set(ev.buf) == {"BBB"}
+    assert ev.expire(now=1014.0) is None and ev.buf == {}
+
+
+def test_running_sums_reset_when_window_empties(ev):
+    for i in range(50):
+        ev.evaluate(_sig(ev, "BUY", 0.1 * (i % 7), dt=0))
+    ev.expire(now=ev.clock_src.t + 11)
+    assert ev.buf == {}
+    d = ev.evaluate(_sig(ev, "SELL", 0.2, dt=11))
+    assert d["reason"].startswith("agg_buy=0.000")
+
+
+def test_expiry_timer_clears_window_without_new_signal():
+    async def go():
+        ev = SignalEvaluator(loop=asyncio.get_running_loop(), window_seconds=0.05)
+        ev.start()
+        await asyncio.sleep(0)
+        ev.evaluate(Signal("t", "BTCUSDT", "BUY", 0.9))
+        assert "BTCUSDT" in ev.buf
+        await asyncio.sleep(0.12)
+        cleared = "BTCUSDT" not in ev.buf
+        ev.stop()
+        return cleared
+    assert asyncio.run(go())
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import numpy as np
+
+from utils import io_utils
+from utils.trade_store import PAGE, AggTradeDownloader, RequestBudget, TradeStore
+
+
+class FakeApi:
+    """1 trade/sn; id'ler ardışık, en yeni id `latest` → ts = şimdi."""
+
+    def __init__(self, latest):
+        self.latest = latest
+        self.now = int(time.time() * 1000)
+
+    def ts(self, i):
+        return self.now - (self.latest - i) * 1000
+
+    def row(self, i):
+        return {"a": i, "p": "100", "q": "1", "T": self.ts(i), "m": i % 2 == 0}
+
+    async def get_agg_trades(self, symbol, limit=500, from_id=None, start_time=None, end_time=None):
+        if from_id is not None:
+            return [self.row(i) for i in range(from_id, min(from_id + limit, self.latest + 1))]
+        if start_time is not None:
+            i = max(0, self.latest - (self.now - start_time) // 1000)
+            return [self.row(i)] if i <= self.latest else []
+        return [self.row(self.latest)]
+
+
+def _sync(dl, budget=None):
+    return asyncio.run(dl.sync("BTCUSDT", budget=budget))
+
+
+def _ratios(ta, now):
+    return io_utils.calc_cashflow_ratios(ta, now)["ratios"]
+
+
+def test_short_store_marks_long_windows_uncovered(tmp_path):
+    api = FakeApi(latest=100_000)
+    dl = AggTradeDownloader(api, TradeStore(str(tmp_path)), max_pages=2)
+    _sync(dl)
+    ta = dl.store.arrays("BTCUSDT")
+    lo, hi = ta.coverage
+    assert lo == api.ts(100_000 - 2 * PAGE + 1) and hi >= api.now
+    r = _ratios(ta, api.now)
+    assert r["15m"]["covered"] is True and r["15m"]["taker_ratio"] is not None
+    for label in ("1h", "4h", "12h", "1d"):
+        assert r[label] == {"taker_ratio": None, "vwap_taker_ratio": None, "covered": False}
+
+
+def test_forward_gap_wipe_moves_coverage_start(tmp_path):
+    api = FakeApi(latest=10_000)
+    dl = AggTradeDownloader(api, TradeStore(str(tmp_path)), max_pages=2)
+    _sync(dl)
+    api.latest += 3 * PAGE   # sembol hakkıyla kapanamayacak boşluk → depo sıfırlanır
+    _sync(dl)
+    rec = dl.store.load("BTCUSDT")
+    assert rec["id"][-1] == api.latest and np.all(np.diff(rec["id"]) == 1)
+    assert dl.store.coverage("BTCUSDT")[0] == int(rec["ts"][0]) == api.ts(api.latest - 2 * PAGE + 1)
+
+
+def test_unfinished_catch_up_ends_coverage_at_last_trade(tmp_path):
+    api = FakeApi(latest=10_000)
+    dl = AggTradeDownloader(api, TradeStore(str(tmp_path)), max_pages=5)
+    _sync(dl)
+    api.latest += 3 * PAGE
+    api.now += 3 * PAGE * 1000
+    _sync(dl, budget=RequestBudget(2))   # _latest_id + 1 sayfa: 2000 id geride kalır
+    ta = dl.store.arrays("BTCUSDT")
+    assert ta.coverage[1] == api.ts(10_000 + PAGE)
+    assert all(v["covered"] is False for v in _ratios(ta, api.now).values())
+
+
+def test_empty_store_covers_nothing(tmp_path):
+    ta = TradeStore(str(tmp_path)).arrays("BTCUSDT")
+    assert all(v["covered"] is False for v in _ratios(ta, int(time.time() * 1000)).values())
+
+
+def test_trade_list_coverage_unknown():
+    now = int(time.time() * 1000)
+    trades = [{"qty": "1", "price": "10", "isBuyerMaker": False, "time": now - 1000},
+              {"qty": "3", "price": "10", "isBuyerMaker": True, "time": now - 500}]
+    r = _ratios(trades, now)
+    assert r["1d"]["covered"] is None and r["1d"]["taker_ratio"] == -0.5
@@ -0,0 +1,253 @@
+# utils/alpha_optimizer.py
+# alpha_ta ağırlık / eşik walk-forward optimizasyonu
+# - Her sembol için bileşen skor serileri (kalman, hilbert, entropy, regime, leadlag) BİR KEZ hesaplanır
+#   ve diske cache'lenir (data/alpha_components/*.pkl); ağırlık/eşik değişimi cache'i bozmaz
+# - Ağırlık (simplex ızgarası) × eşik (long, short) araması kayan train/test pencerelerinde
+#   matris çarpımı ile vektörel yapılır (ta_sweep.alpha_positions / score_positions)
+# - Her fold: train'de semboller arası ortalama sharpe'a göre en iyi konfigürasyon → test (OOS) sonucu
+# - Son train penceresinin en iyisi bir config profili olarak yazılır (.env formatı):
+#     TA_PROFILE=data/profiles/alpha_ta.env  → utils/config.py bu dosyayı .env üzerine yükler
+# - Bileşen hesabı semboller arası ProcessPoolExecutor ile dağıtılır
+#
+# Kullanım:
+#   python -m utils.alpha_optimizer BTCUSDT ETHUSDT SOLUSDT --interval 1h --limit 1000 --train 400 --test 100
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.config import CONFIG
+from utils.ta_sweep import (
+    ALPHA_COMPONENTS, ALPHA_WEIGHT_FIELDS, alpha_component_series, alpha_positions,
+    score_positions, weight_simplex_grid,
+)
+
+COMPONENT_CACHE_DIR = os.getenv("ALPHA_COMPONENT_CACHE_DIR", "data/alpha_components")
+PROFILE_DIR = os.getenv("TA_PROFILE_DIR", "data/profiles")
+
+# bileşen serilerini etkileyen TA parametreleri (ağırlık/eşikler hariç)
+_COMPONENT_PARAMS = ("KALMAN_Q", "KALMAN_R", "REGIME_WINDOW", "ENTROPY_M", "ENTROPY_R_FACTOR",
+                     "ENTROPY_MAX_TEMPLATES", "LEADLAG_MAX_LAG")
+
+
+# =============================================================
+# Bileşen serileri (cache'li)
+# =============================================================
+
+def _component_cache_path(symbol: str, interval: str, df: pd.DataFrame, lookback: int, step: int,
+                          has_ref: bool) -> str:
+    last = int(df["open_time"].iloc[-1]) if "open_time" in df.columns else len(df)
+    params = tuple(getattr(CONFIG.TA, p) for p in _COMPONENT_PARAMS) + (lookback, step, has_ref, len(df), last)
+    h = hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+    return os.path.join(COMPONENT_CACHE_DIR, f"{symbol}_{interval}_{h}.pkl")
+
+
+def load_components(symbol: str, df: pd.DataFrame, interval: str = "1h", ref_close: Optional[pd.Series] = None,
+                    lookback: int = 200, step: int = 1, use_cache: bool = True) -> pd.DataFrame:
+    """Bileşen skor matrisi (n × 5); diskte varsa okunur, yoksa hesaplanıp yazılır."""
+    path = _component_cache_path(symbol, interval, df, lookback, step, ref_close is not None)
+    if use_cache and os.path.exists(path):
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            print(f"[ALPHA_OPT ERROR] cache okunamadı {path}: {e}")
+    comp = alpha_component_series(df, ref_close=ref_close, lookback=lookback, step=step)
+    if use_cache:
+        os.makedirs(COMPONENT_CACHE_DIR, exist_ok=True)
+        comp.to_pickle(path)
+    return comp
+
+
+def _components_job(args: Tuple) -> Tuple[str, Optional[pd.DataFrame]]:
+    symbol, df, interval, ref_close, lookback, step, use_cache = args
+    try:
+        return symbol, load_components(symbol, df, interval, ref_close, lookback, step, use_cache)
+    except Exception as e:
+        print(f"[ALPHA_OPT ERROR] {symbol}: {e}")
+        return symbol, None
+
+
+def build_components(history: Dict[str, pd.DataFrame], interval: str = "1h", ref_symbol: Optional[str] = "BTCUSDT",
+                     lookback: int = 200, step: int = 1, processes: Optional[int] = None,
+                     use_cache: bool = True) -> Dict[str, pd.DataFrame]:
+    """Tüm semboller için bileşen serileri (süreçlere dağıtılmış)."""
+    ref = history.get(ref_symbol) if ref_symbol else None
+    jobs = []
+    for sym, df in history.items():
+        ref_close = None
+        if ref is not None and sym != ref_symbol:
+            ref_close = _align_close(ref, df)
+        jobs.append((sym, df, interval, ref_close, lookback, step, use_cache))
+    processes = processes or int(getattr(CONFIG.SYSTEM, "MAX_WORKERS", 2) or 2)
+    if processes <= 1 or len(jobs) <= 1:
+        results = [_components_job(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as ex:
+            results = list(ex.map(_components_job, jobs))
+    return {sym: comp for sym, comp in results if comp is not None}
+
+
+def _align_close(ref: pd.DataFrame, df: pd.DataFrame) -> pd.Series:
+    """Referans kapanışını hedefin open_time eksenine hizalar (eksik bar → ileri doldurma)."""
+    if "open_time" in ref.columns and "open_time" in df.columns:
+        s = pd.Series(ref["close"].to_numpy(dtype=float), index=ref["open_time"].to_numpy())
+        s = s.reindex(df["open_time"].to_numpy()).ffill()
+        return pd.Series(s.to_numpy(), index=df.index)
+    tail = ref["close"].to_numpy(dtype=float)[-len(df):]
+    out = np.full(len(df), np.nan)
+    out[len(df) - len(tail):] = tail
+    return pd.Series(out, index=df.index)
+
+
+# =============================================================
+# Walk-forward
+# =============================================================
+
+def walk_forward_splits(n: int, train: int, test: int, step: Optional[int] = None,
+                        start: int = 0) -> List[Tuple[slice, slice]]:
+    """Kayan (rolling) train/test dilimleri."""
+    step = step or test
+    out = []
+    i = start
+    while i + train + test <= n:
+        out.append((slice(i, i + train), slice(i + train, i + train + test)))
+        i += step
+    return out
+
+
+def default_thresholds() -> List[Tuple[float, float]]:
+    longs = sorted({round(CONFIG.TA.ALPHA_LONG_THRESHOLD, 3), 0.05, 0.1, 0.2, 0.3, 0.4})
+    shorts = sorted({round(CONFIG.TA.ALPHA_SHORT_THRESHOLD, 3), -0.05, -0.1, -0.2, -0.3, -0.4})
+    return [(lt, st) for lt in longs for st in shorts]
+
+
+def score_grid(comp: np.ndarray, close: np.ndarray, weights: np.ndarray, thresholds: Sequence[Tuple[float, float]],
+               fee: float = 0.0004, interval: str = "1h", chunk: int = 256) -> Dict[str, np.ndarray]:
+    """Tüm ağırlık × eşik konfigürasyonları (G*T) için metrikler; bellek için ağırlıklar parça parça."""
+    parts: List[Dict[str, np.ndarray]] = []
+    for i in range(0, len(weights), chunk):
+        pos = alpha_positions(comp, weights[i:i + chunk], thresholds)
+        parts.append(score_positions(pos, close, fee, interval))
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+def walk_forward(components: Dict[str, pd.DataFrame], history: Dict[str, pd.DataFrame],
+                 train: int = 400, test: int = 100, step: Optional[int] = None,
+                 weights: Optional[np.ndarray] = None, thresholds: Optional[Sequence[Tuple[float, float]]] = None,
+                 fee: float = 0.0004, interval: str = "1h", warmup: int = 200) -> Dict[str, Any]:
+    """
+    Sembollerin aynı uzunlukta olması gerekmez; hepsi son n bara hizalanıp aynı fold sınırlarıyla dilimlenir.
+    Seçim kriteri: train'de semboller arası ortalama sharpe.
+    """
+    weights = weight_simplex_grid(0.1) if weights is None else np.asarray(weights, dtype=float)
+    thresholds = default_thresholds() if thresholds is None else list(thresholds)
+    T = len(thresholds)
+
+    data = []
+    for sym, comp in components.items():
+        df = history[sym]
+        C = comp[list(ALPHA_COMPONENTS)].to_numpy()[warmup:]
+        px = df["close"].to_numpy(dtype=float)[warmup:]
+        data.append((sym, C, px))
+    if not data:
+        return {"folds": [], "best": None}
+    n = min(len(px) for _, _, px in data)
+    data = [(s, C[-n:], px[-n:]) for s, C, px in data]
+
+    folds = []
+    for tr, te in walk_forward_splits(n, train, test, step):
+        train_sharpe = np.mean([score_grid(C[tr], px[tr], weights, thresholds, fee, interval)["sharpe"]
+                                for _, C, px in data], axis=0)
+        k = int(np.argmax(train_sharpe))
+        w, th = weights[k // T], thresholds[k % T]
+        oos = [score_grid(C[te], px[te], w[None, :], [th], fee, interval) for _, C, px in data]
+        folds.append({
+            "train": (tr.start, tr.stop), "test": (te.start, te.stop),
+            "weights": dict(zip(ALPHA_WEIGHT_FIELDS, map(float, w))),
+            "thresholds": th,
+            "train_sharpe": float(train_sharpe[k]),
+            "test_sharpe": float(np.mean([o["sharpe"][0] for o in oos])),
+            "test_return": float(np.mean([o["total_return"][0] for o in oos])),
+            "test_max_drawdown": float(np.min([o["max_drawdown"][0] for o in oos])),
+        })
+
+    # güncel profil: son train penceresinin en iyisi
+    last = slice(max(0, n - train), n)
+    sharpe = np.mean([score_grid(C[last], px[last], weights, thresholds, fee, interval)["sharpe"]
+                      for _, C, px in data], axis=0)
+    k = int(np.argmax(sharpe))
+    best = {
+        **dict(zip(ALPHA_WEIGHT_FIELDS, map(float, weights[k // T]))),
+        "ALPHA_LONG_THRESHOLD": float(thresholds[k % T][0]),
+        "ALPHA_SHORT_THRESHOLD": float(thresholds[k % T][1]),
+    }
+    return {
+        "folds": folds,
+        "best": best,
+        "best_train_sharpe": float(sharpe[k]),
+        "oos_sharpe_mean": float(np.mean([f["test_sharpe"] for f in folds])) if folds else None,
+        "symbols": [s for s, _, _ in data],
+        "configs": len(weights) * T,
+    }
+
+
+def write_profile(best: Dict[str, float], name: str = "alpha_ta", meta: Optional[Dict[str, Any]] = None) -> str:
+    """Seçilen değerleri .env formatında yazar; TA_PROFILE ile yüklenir."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}.env")
+    lines = [f"# alpha_optimizer profili — {time.strftime('%Y-%m-%d %H:%M:%S')}"]
+    for k, v in (meta or {}).items():
+        lines.append(f"# {k}: {v}")
+    lines += [f"{k}={v:.4f}" for k, v in best.items()]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="alpha_ta walk-forward ağırlık optimizasyonu")
+    ap.add_argument("symbols", nargs="*", default=CONFIG.BINANCE.SCAN_SYMBOLS)
+    ap.add_argument("--interval", default="1h")
+    ap.add_argument("--limit", type=int, default=1000)
+    ap.add_argument("--ref", default="BTCUSDT")
+    ap.add_argument("--lookback", type=int, default=200)
+    ap.add_argument("--step", type=int, default=1, help="bileşen hesabı bar adımı (ara barlar ileri doldurulur)")
+    ap.add_argument("--train", type=int, default=400)
+    ap.add_argument("--test", type=int, default=100)
+    ap.add_argument("--grid-step", type=float, default=0.1)
+    ap.add_argument("--fee", type=float, default=0.0004)
+    ap.add_argument("--processes", type=int, default=None)
+    ap.add_argument("--profile", default="alpha_ta")
+    ap.add_argument("--no-write", action="store_true")
+    args = ap.parse_args(argv)
+
+    from utils.ta_sweep import load_history
+    symbols = list(dict.fromkeys(list(args.symbols) + ([args.ref] if args.ref else [])))
+    history = asyncio.run(load_history(symbols, args.interval, args.limit))
+    comps = build_components(history, args.interval, args.ref, args.lookback, args.step, args.processes)
+    res = walk_forward(comps, history, args.train, args.test, weights=weight_simplex_grid(args.grid_step),
+                       fee=args.fee, interval=args.interval, warmup=args.lookback)
+
+    for f in res["folds"]:
+        print(f"train={f['train']} test={f['test']} train_sharpe={f['train_sharpe']:.2f} "
+              f"test_sharpe={f['test_sharpe']:.2f} w={f['weights']} th={f['thresholds']}")
+    print(f"best={res['best']}  oos_sharpe_mean={res['oos_sharpe_mean']}")
+    if res["best"] and not args.no_write:
+        path = write_profile(res["best"], args.profile, {
+            "symbols": ",".join(res["symbols"]), "interval": args.interval,
+            "train_sharpe": f"{res['best_train_sharpe']:.3f}", "oos_sharpe_mean": res["oos_sharpe_mean"],
+        })
+        print(f"profil yazıldı: {path}  (TA_PROFILE={path})")
+
+
+if __name__ == "__main__":
+    main()
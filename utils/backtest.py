@@ -0,0 +1,275 @@
+# utils/backtest.py
+# Offline backtest motoru — canlı pipeline'ın aynısını geçmiş kline'larla besler
+# - RSI_MACD_Strategy → SignalEvaluator → OrderManager zinciri değişmeden kullanılır
+# - time.time() yerine VirtualClock (bar kapanış zamanı); evaluator pencereleri sanal saate göre işler
+# - OrderManager'a api modülü olarak SimBroker verilir: fiyat/bakiye/emir çağrıları simüle edilir
+#   (FillModel: kapanışta veya bir sonraki açılışta dolum, bps kayma, taker ücreti)
+# - DB'ye yazılmaz; sonuçlar bellekte (equity eğrisi numpy dizisi)
+# - Semboller ProcessPoolExecutor ile paralel; rapor: PnL, drawdown, işlem sayısı, bar/sn
+#
+# Kullanım:
+#   from utils.backtest import run_backtest
+#   report = run_backtest({"BTCUSDT": df}, interval="1h")
+#   python -m utils.backtest BTCUSDT ETHUSDT --interval 1h --limit 1000
+#   python -m utils.backtest BTCUSDT --csv-dir data/klines   # {SYMBOL}_{interval}.csv
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.config import CONFIG
+from utils.indicator_cache import interval_to_ms
+from utils.order_manager import OrderManager
+from utils.signal_evaluator import Signal, SignalEvaluator
+from strategies.rsi_macd_strategy import RSI_MACD_Strategy
+
+
+class VirtualClock:
+    """time.time() yerine geçen sanal saat (saniye)."""
+    __slots__ = ("now",)
+
+    def __init__(self, start: float = 0.0):
+        self.now = float(start)
+
+    def __call__(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def set_ms(self, ms: int) -> None:
+        self.now = ms / 1000.0
+
+
+class FillModel:
+    """
+    fill_on: "close" → emir verildiği barın kapanışında, "next_open" → sonraki barın açılışında dolar.
+    slippage_bps: aleyhe kayma (baz puan), fee: notional üzerinden taker ücreti.
+    """
+    __slots__ = ("fee", "slippage_bps", "fill_on")
+
+    def __init__(self, fee: float = 0.0004, slippage_bps: float = 1.0, fill_on: str = "close"):
+        if fill_on not in ("close", "next_open"):
+            raise ValueError("fill_on must be 'close' or 'next_open'")
+        self.fee = float(fee)
+        self.slippage_bps = float(slippage_bps)
+        self.fill_on = fill_on
+
+    def price(self, side: str, ref: float) -> float:
+        sgn = 1.0 if side == "BUY" else -1.0
+        return ref * (1.0 + sgn * self.slippage_bps / 1e4)
+
+
+class SimBroker:
+    """
+    OrderManager'ın beklediği api yüzeyi (get_price, get_futures_account, exchange_info,
+    create_futures_order) — tek sembol, net pozisyon, nakit + mark-to-market equity.
+    """
+
+    def __init__(self, symbol: str, n_bars: int, balance: float = 10_000.0,
+                 fill_model: Optional[FillModel] = None):
+        self.symbol = symbol
+        self.fill_model = fill_model or FillModel()
+        self.initial = float(balance)
+        self.cash = float(balance)
+        self.position = 0.0
+        self.fees = 0.0
+        self.trades = 0
+        self.volume = 0.0
+        self.last_price = float("nan")
+        self._pending: List[tuple] = []
+        self.equity = np.full(n_bars, np.nan)
+        self.fills: List[tuple] = []   # (open_time, side, qty, price, fee)
+        self._bar_time = 0
+
+    # --- OrderManager api yüzeyi ---
+    async def get_price(self, symbol: str) -> Optional[float]:
+        return None if np.isnan(self.last_price) else self.last_price
+
+    async def get_futures_account(self) -> Dict[str, Any]:
+        return {"totalWalletBalance": self.mark()}
+
+    async def exchange_info(self) -> Dict[str, Any]:
+        return {}
+
+    async def create_futures_order(self, symbol: str, side: str, type_: str = "MARKET",
+                                   quantity: float = 0.0, extra: Optional[dict] = None) -> Dict[str, Any]:
+        side = side.upper()
+        if self.fill_model.fill_on == "next_open":
+            self._pending.append((side, float(quantity)))
+            return {"status": "NEW", "symbol": symbol, "side": side, "origQty": quantity}
+        px = self._fill(side, float(quantity), self.last_price)
+        return {"status": "FILLED", "symbol": symbol, "side": side, "executedQty": quantity, "avgPrice": px}
+
+    # --- Simülasyon ---
+    def _fill(self, side: str, qty: float, ref: float) -> float:
+        px = self.fill_model.price(side, ref)
+        signed = qty if side == "BUY" else -qty
+        fee = abs(qty) * px * self.fill_model.fee
+        self.cash -= signed * px + fee
+        self.position += signed
+        self.fees += fee
+        self.volume += abs(qty) * px
+        self.trades += 1
+        self.fills.append((self._bar_time, side, qty, px, fee))
+        return px
+
+    def on_bar_open(self, open_time: int, open_price: float) -> None:
+        self._bar_time = open_time
+        if self._pending:
+            pending, self._pending = self._pending, []
+            for side, qty in pending:
+                self._fill(side, qty, open_price)
+
+    def on_bar_close(self, close_price: float) -> None:
+        self.last_price = close_price
+
+    def mark(self) -> float:
+        px = 0.0 if np.isnan(self.last_price) else self.last_price
+        return self.cash + self.position * px
+
+
+async def replay(symbol: str, df: pd.DataFrame, interval: str = "1h", balance: float = 10_000.0,
+                 fill_model: Optional[FillModel] = None, window_seconds: Optional[int] = None,
+                 threshold: Optional[float] = None, risk_per_trade: float = 0.01, leverage: int = 1,
+                 lookback: int = 500, keep_equity: bool = False) -> Dict[str, Any]:
+    """Tek sembolü bar bar canlı pipeline'dan geçirir."""
+    n = len(df)
+    open_time = df["open_time"].to_numpy(dtype=np.int64) if "open_time" in df.columns \
+        else np.arange(n, dtype=np.int64) * interval_to_ms(interval)
+    close = df["close"].to_numpy(dtype=float)
+    opens = df["open"].to_numpy(dtype=float) if "open" in df.columns else close
+    close_time = open_time + interval_to_ms(interval) - 1
+
+    clock = VirtualClock()
+    broker = SimBroker(symbol, n, balance=balance, fill_model=fill_model)
+    # canlı fiyat durumu yok (prices=None → SimBroker.get_price); bakiye her kararda SimBroker'dan (max_age=0)
+    om = OrderManager(api_module=broker, risk_per_trade=risk_per_trade, leverage=leverage, paper_mode=False,
+                      prices=None, account_max_age=0)
+    evaluator = SignalEvaluator(
+        decision_callback=om.process_decision,
+        window_seconds=CONFIG.BOT.EVALUATOR_WINDOW if window_seconds is None else window_seconds,
+        threshold=CONFIG.BOT.EVALUATOR_THRESHOLD if threshold is None else threshold,
+        clock=clock,
+    )
+    strat = RSI_MACD_Strategy(symbol, lookback=lookback)
+
+    signals = decisions = 0
+    t0 = time.perf_counter()
+    for i in range(n):
+        broker.on_bar_open(int(open_time[i]), float(opens[i]))
+        broker.on_bar_close(float(close[i]))
+        clock.set_ms(int(close_time[i]))
+        sig = strat.on_new_close(float(close[i]), int(open_time[i]))
+        if sig:
+            signals += 1
+            decision = evaluator.evaluate(Signal("rsi_macd", symbol, sig["type"], sig["strength"],
+                                                 sig["payload"], ts=clock()))
+            if decision and decision["decision"] != "HOLD":
+                decisions += 1
+                await evaluator.decision_callback(decision)
+        broker.equity[i] = broker.mark()
+    elapsed = time.perf_counter() - t0
+
+    eq = broker.equity
+    dd = eq / np.maximum.accumulate(eq) - 1.0 if n else np.zeros(0)
+    report = {
+        "symbol": symbol,
+        "bars": n,
+        "signals": signals,
+        "decisions": decisions,
+        "trades": broker.trades,
+        "fees": broker.fees,
+        "volume": broker.volume,
+        "final_position": broker.position,
+        "pnl": float(eq[-1] - broker.initial) if n else 0.0,
+        "return": float(eq[-1] / broker.initial - 1.0) if n else 0.0,
+        "max_drawdown": float(dd.min()) if n else 0.0,
+        "elapsed_s": elapsed,
+        "bars_per_s": n / elapsed if elapsed > 0 else float("inf"),
+    }
+    if keep_equity:
+        report["equity"] = pd.Series(eq, index=pd.to_datetime(open_time, unit="ms"), name=symbol)
+        report["fills"] = pd.DataFrame(broker.fills, columns=["open_time", "side", "qty", "price", "fee"])
+    return report
+
+
+def _backtest_job(args: tuple) -> Dict[str, Any]:
+    symbol, df, kwargs = args
+    try:
+        return asyncio.run(replay(symbol, df, **kwargs))
+    except Exception as e:
+        print(f"[BACKTEST ERROR] {symbol}: {e}")
+        return {"symbol": symbol, "error": str(e)}
+
+
+def run_backtest(history: Dict[str, pd.DataFrame], processes: Optional[int] = None,
+                 **kwargs: Any) -> pd.DataFrame:
+    """
+    history: {symbol: OHLCV DataFrame}. Semboller süreçlere dağıtılır.
+    kwargs → replay() (interval, balance, fill_model, window_seconds, threshold, ...).
+    """
+    jobs = [(sym, df, kwargs) for sym, df in history.items() if isinstance(df, pd.DataFrame) and not df.empty]
+    if not jobs:
+        return pd.DataFrame()
+    processes = processes or int(getattr(CONFIG.SYSTEM, "MAX_WORKERS", 2) or 2)
+    t0 = time.perf_counter()
+    if processes <= 1 or len(jobs) == 1:
+        rows = [_backtest_job(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as ex:
+            rows = list(ex.map(_backtest_job, jobs))
+    wall = time.perf_counter() - t0
+    report = pd.DataFrame(rows)
+    report.attrs["wall_s"] = wall
+    report.attrs["bars_per_s_total"] = float(report.get("bars", pd.Series(dtype=float)).sum()) / wall if wall > 0 else 0.0
+    return report
+
+
+def read_klines_csv(path: str) -> pd.DataFrame:
+    """open_time,open,high,low,close,volume kolonlu CSV (Binance export formatı da kabul edilir)."""
+    df = pd.read_csv(path)
+    if "open_time" not in df.columns:
+        df = pd.read_csv(path, header=None).iloc[:, :6]
+        df.columns = ["open_time", "open", "high", "low", "close", "volume"]
+    return df
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Offline backtest (RSI_MACD → SignalEvaluator → OrderManager)")
+    ap.add_argument("symbols", nargs="*", default=CONFIG.BINANCE.TOP_SYMBOLS_FOR_IO)
+    ap.add_argument("--interval", default="1h")
+    ap.add_argument("--limit", type=int, default=1000)
+    ap.add_argument("--csv-dir", default=None)
+    ap.add_argument("--processes", type=int, default=None)
+    ap.add_argument("--balance", type=float, default=10_000.0)
+    ap.add_argument("--fee", type=float, default=0.0004)
+    ap.add_argument("--slippage-bps", type=float, default=1.0)
+    ap.add_argument("--fill-on", default="close", choices=("close", "next_open"))
+    args = ap.parse_args(argv)
+
+    if args.csv_dir:
+        history = {s: read_klines_csv(os.path.join(args.csv_dir, f"{s}_{args.interval}.csv")) for s in args.symbols}
+    else:
+        from utils.ta_sweep import load_history
+        history = asyncio.run(load_history(args.symbols, args.interval, args.limit))
+
+    report = run_backtest(
+        history, processes=args.processes, interval=args.interval, balance=args.balance,
+        fill_model=FillModel(args.fee, args.slippage_bps, args.fill_on),
+    )
+    with pd.option_context("display.width", 200):
+        print(report.to_string())
+    print(f"wall={report.attrs.get('wall_s', 0):.2f}s  throughput={report.attrs.get('bars_per_s_total', 0):,.0f} bar/s")
+
+
+if __name__ == "__main__":
+    main()
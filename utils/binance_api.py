@@ -2,6 +2,7 @@
 
 import os
 import time
+import uuid
 import hmac
 import hashlib
 import json
@@ -21,6 +22,21 @@ LOG = logging.getLogger(__name__)
 LOG.addHandler(logging.NullHandler())
 
 
+_FUTURES_DEPTH_LIMITS = (5, 10, 20, 50, 100, 500, 1000)   # /fapi/v1/depth sadece bu değerleri kabul eder
+
+
+class OrderStatusUnknown(Exception):
+    """Emir POST'unun sonucu belirsiz (zaman aşımı / ağ / 5xx) ve sorgu emri bulamadı.
+    Emir borsada oluşmuş olabilir (örn. dolmuş MARKET emri sorguda henüz görünmüyor) → otomatik yeniden
+    gönderilmez; client_order_id ile uzlaştırma çağırana kalır."""
+
+    def __init__(self, symbol: str, client_order_id: str, cause: Exception):
+        super().__init__(f"order {client_order_id} on {symbol} in unknown state: {cause}")
+        self.symbol = symbol
+        self.client_order_id = client_order_id
+        self.cause = cause
+
+
 # -------------------------------------------------------------
 # HTTP Katmanı: Retry + Exponential Backoff + TTL Cache
 # -------------------------------------------------------------
@@ -30,23 +46,31 @@ class BinanceHTTPClient:
         self.sem = asyncio.Semaphore(CONFIG.BINANCE.CONCURRENCY)
         self._cache: Dict[str, Tuple[float, Any]] = {}
 
+    def _sign(self, params: dict, headers: dict) -> dict:
+        """Her denemede taze timestamp + imza (params kopyası)."""
+        signed = dict(params)
+        signed["timestamp"] = int(time.time() * 1000)
+        query = urlencode(signed)
+        signed["signature"] = hmac.new(CONFIG.BINANCE.SECRET_KEY.encode(),
+                                       query.encode(), hashlib.sha256).hexdigest()
+        headers["X-MBX-APIKEY"] = CONFIG.BINANCE.API_KEY
+        return signed
+
     async def _request(self, method: str, path: str, params: Optional[dict] = None,
-                       signed: bool = False, futures: bool = False) -> Any:
+                       signed: bool = False, futures: bool = False, use_cache: bool = True,
+                       retries: Optional[int] = None) -> Any:
+        """
+        retries: en fazla tekrar deneme (varsayılan CONFIG.BINANCE.MAX_RETRIES); 0 → tek deneme
+        (emir gönderimi: zaman aşımı sonrası tekrar göndermek ikinci emir demek). Hak bitince son hata yükseltilir.
+        """
         base_url = CONFIG.BINANCE.FAPI_URL if futures else CONFIG.BINANCE.BASE_URL
-        headers = {}
+        headers: Dict[str, str] = {}
         params = params or {}
+        max_attempts = 1 + (CONFIG.BINANCE.MAX_RETRIES if retries is None else max(0, int(retries)))
 
-        if signed:
-            ts = int(time.time() * 1000)
-            params["timestamp"] = ts
-            query = urlencode(params)
-            signature = hmac.new(CONFIG.BINANCE.SECRET_KEY.encode(),
-                                 query.encode(), hashlib.sha256).hexdigest()
-            params["signature"] = signature
-            headers["X-MBX-APIKEY"] = CONFIG.BINANCE.API_KEY
-
+        # imzalı istekler önbelleğe alınmaz (timestamp her seferinde farklı)
         cache_key = f"{method}:{base_url}{path}:{json.dumps(params, sort_keys=True) if params else ''}"
-        ttl = CONFIG.BINANCE.BINANCE_TICKER_TTL
+        ttl = CONFIG.BINANCE.BINANCE_TICKER_TTL if use_cache and not signed else 0
         if ttl > 0 and cache_key in self._cache:
             ts_cache, data = self._cache[cache_key]
             if time.time() - ts_cache < ttl:
@@ -55,22 +79,34 @@ class BinanceHTTPClient:
         attempt = 0
         while True:
             attempt += 1
+            req_params = self._sign(params, headers) if signed else params
             try:
                 async with self.sem:
-                    r = await self.client.request(method, base_url + path, params=params, headers=headers)
+                    r = await self.client.request(method, base_url + path, params=req_params, headers=headers)
                 if r.status_code == 200:
                     data = r.json()
                     if ttl > 0:
                         self._cache[cache_key] = (time.time(), data)
                     return data
-                if r.status_code == 429:
+                if r.status_code == 429 and attempt < max_attempts:
                     retry_after = int(r.headers.get("Retry-After", 1))
                     delay = min(2 ** attempt, 60) + retry_after
                     LOG.warning("Rate limited. Sleeping %ss", delay)
                     await asyncio.sleep(delay)
                     continue
                 r.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                # 4xx (geçersiz sembol / parametre): tekrar denemek sonucu değiştirmez → çağırana ilet
+                if 400 <= e.response.status_code < 500 and e.response.status_code not in (418, 429):
+                    raise
+                if attempt >= max_attempts:
+                    raise
+                delay = min(2 ** attempt, 60)
+                LOG.error("Request error %s, retrying in %s", e, delay)
+                await asyncio.sleep(delay)
             except Exception as e:
+                if attempt >= max_attempts:
+                    raise
                 delay = min(2 ** attempt, 60)
                 LOG.error("Request error %s, retrying in %s", e, delay)
                 await asyncio.sleep(delay)
@@ -98,11 +134,27 @@ class BinanceClient:
     async def get_order_book(self, symbol: str, limit: int = 100) -> Dict[str, Any]:
         return await self.http._request("GET", "/api/v3/depth", {"symbol": symbol.upper(), "limit": limit})
 
+    async def get_futures_order_book(self, symbol: str, limit: int = 100) -> Dict[str, Any]:
+        """USDⓈ-M perp defteri (paper dolumları futures emirleri için buradan); limit en yakın geçerli değere."""
+        limit = min((n for n in _FUTURES_DEPTH_LIMITS if n >= limit), default=_FUTURES_DEPTH_LIMITS[-1])
+        return await self.http._request("GET", "/fapi/v1/depth", {"symbol": symbol.upper(), "limit": limit},
+                                        futures=True)
+
     async def get_recent_trades(self, symbol: str, limit: int = 500) -> List[Dict[str, Any]]:
         return await self.http._request("GET", "/api/v3/trades", {"symbol": symbol.upper(), "limit": limit})
 
-    async def get_agg_trades(self, symbol: str, limit: int = 500) -> List[Dict[str, Any]]:
-        return await self.http._request("GET", "/api/v3/aggTrades", {"symbol": symbol.upper(), "limit": limit})
+    async def get_agg_trades(self, symbol: str, limit: int = 500, from_id: Optional[int] = None,
+                             start_time: Optional[int] = None, end_time: Optional[int] = None) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {"symbol": symbol.upper(), "limit": limit}
+        if from_id is not None:
+            params["fromId"] = int(from_id)
+        if start_time is not None:
+            params["startTime"] = int(start_time)
+        if end_time is not None:
+            params["endTime"] = int(end_time)
+        # sayfalı geçmiş indirme: TTL cache'e yazılmaz (her sayfa tek seferlik)
+        paged = len(params) > 2
+        return await self.http._request("GET", "/api/v3/aggTrades", params, use_cache=not paged)
 
     async def get_klines(self, symbol: str, interval: str = "1m", limit: int = 500) -> List[List[Any]]:
         return await self.http._request("GET", "/api/v3/klines", {"symbol": symbol.upper(), "interval": interval, "limit": limit})
@@ -113,6 +165,11 @@ class BinanceClient:
     async def get_all_24h_tickers(self) -> List[Dict[str, Any]]:
         return await self.http._request("GET", "/api/v3/ticker/24hr")
 
+    async def get_24h_tickers(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """Birden çok sembol tek istekte (symbols=[...])."""
+        syms = json.dumps([s.upper() for s in symbols], separators=(",", ":"))
+        return await self.http._request("GET", "/api/v3/ticker/24hr", {"symbols": syms})
+
     async def get_all_symbols(self) -> List[str]:
         data = await self.http._request("GET", "/api/v3/exchangeInfo")
         return [s["symbol"] for s in data["symbols"]]
@@ -137,6 +194,67 @@ class BinanceClient:
         params = {"symbol": symbol.upper(), "limit": limit}
         return await self.http._request("GET", "/fapi/v1/fundingRate", params=params, futures=True)
 
+    async def get_premium_index(self, symbol: Optional[str] = None) -> Any:
+        """Mark price + lastFundingRate; symbol verilmezse tüm perp'ler tek istekte (liste)."""
+        params = {"symbol": symbol.upper()} if symbol else None
+        return await self.http._request("GET", "/fapi/v1/premiumIndex", params=params, futures=True)
+
+    async def get_open_interest(self, symbol: str) -> Dict[str, Any]:
+        """Perp açık pozisyon (tek sembol; toplu uç yok → fetch_many + semafor ile)."""
+        return await self.http._request("GET", "/fapi/v1/openInterest", {"symbol": symbol.upper()},
+                                        futures=True, use_cache=False)
+
+    async def futures_exchange_info(self) -> Dict[str, Any]:
+        return await self.http._request("GET", "/fapi/v1/exchangeInfo", futures=True)
+
+    # --- OrderManager api yüzeyi (USDⓈ-M futures) ---
+    async def get_price(self, symbol: str) -> Optional[float]:
+        """REST son fiyat — OrderManager sadece WS fiyatı yoksa/bayatsa çağırır."""
+        data = await self.http._request("GET", "/fapi/v1/ticker/price", {"symbol": symbol.upper()}, futures=True)
+        return float(data["price"]) if data and "price" in data else None
+
+    async def get_futures_account(self) -> Dict[str, Any]:
+        return await self.http._request("GET", "/fapi/v2/account", signed=True, futures=True, use_cache=False)
+
+    async def exchange_info(self) -> Dict[str, Any]:
+        return await self.futures_exchange_info()
+
+    async def get_futures_order(self, symbol: str, orig_client_order_id: str) -> Dict[str, Any]:
+        params = {"symbol": symbol.upper(), "origClientOrderId": orig_client_order_id}
+        return await self.http._request("GET", "/fapi/v1/order", params=params, signed=True, futures=True,
+                                        use_cache=False)
+
+    async def create_futures_order(self, symbol: str, side: str, type_: str = "MARKET", quantity: float = 0.0,
+                                   price: Optional[float] = None, extra: Optional[dict] = None) -> Dict[str, Any]:
+        """
+        Emir POST'u hiçbir durumda yeniden gönderilmez (retries=0). Sonucu belirsiz hatada (zaman aşımı / ağ /
+        5xx) emir newClientOrderId ile bir kez sorgulanır: borsada varsa o döner; yoksa veya sorgu da başarısızsa
+        OrderStatusUnknown (client id taşır). Binance aynı id'yi sadece açık emirler arasında reddeder —
+        dolmuş ya da henüz görünmeyen bir MARKET emri yeniden gönderilirse ikinci pozisyon açılır.
+        """
+        params: Dict[str, Any] = {"symbol": symbol.upper(), "side": side.upper(), "type": type_, "quantity": quantity}
+        if price:
+            params["price"] = price
+        if extra:
+            params.update(extra)
+        params.setdefault("newClientOrderId", f"bot-{uuid.uuid4().hex[:28]}")
+        cid = params["newClientOrderId"]
+        try:
+            return await self.http._request("POST", "/fapi/v1/order", params=params, signed=True,
+                                            futures=True, use_cache=False, retries=0)
+        except httpx.HTTPStatusError as e:
+            if 400 <= e.response.status_code < 500:
+                raise   # borsa reddetti (429/418 dahil): emir oluşmadı
+            err: Exception = e
+        except Exception as e:
+            err = e
+        LOG.warning("order %s %s result unknown (%s); querying %s", symbol, side, err, cid)
+        try:
+            return await self.get_futures_order(symbol, cid)
+        except Exception as e:
+            LOG.warning("order %s query failed: %s", cid, e)
+        raise OrderStatusUnknown(symbol, cid, err)
+
     # --- WebSocket ---
     async def ws_subscribe(self, url: str, callback):
         while True:
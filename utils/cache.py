@@ -1,12 +1,35 @@
-
-import sqlite3
+# utils/cache.py
+# - SQLite TTL key/value cache (worker_a yazar, worker_b okur)
+# - Bağlantı/pragma/yazıcı utils/storage ortak katmanında
+# - put: sadece INSERT (trim/purge yok) → maliyet tablo boyundan bağımsız; çağıran yazmayı beklemez
+# - Bellek içi LRU ön katman (write-through): get_latest çoğunlukla diske gitmez. Başka süreç yazdıysa
+#   (PRAGMA data_version değişti) önbellekteki anahtarlar (k, ts) indeksiyle doğrulanır, eskiyenler atılır;
+#   değişim sadece bu sürecin kendi commit'lerindense (storage own_commit) doğrulama atlanır
+# - Sıkıştırıcı: CONFIG.DATABASE.CACHE_COMPACT_INTERVAL sn'de bir arka planda; anahtar başına
+#   (k, ts) indeksiyle son max_rows satırı ve süresi dolmamışları tutar
+# - Değerler pickle protocol 5 (binary); eski JSON metin satırları okunmaya devam eder
+# - ts / ttl milisaniye (eski saniye satırları otomatik olarak süresi dolmuş sayılır)
+# - aput / aget_latest: async kod için loop'u bloklamayan sürümler
+# - Pub/sub: subscribe(*keys) → Subscription.wait() değişen anahtarları döner
+#     * aynı süreç: put/aput commit'inden sonra asyncio event ile anında
+#     * başka süreç: PRAGMA data_version CACHE_WATCH_INTERVAL sn'de bir yoklanır; değiştiyse abone
+#       olunan anahtarların MAX(ts)'i (k, ts) indeksiyle kontrol edilir
+import asyncio
+import logging
 import os
+import pickle
+import threading
 import time
-from typing import Any, Optional, Dict
+from collections import OrderedDict
+from typing import Any, Optional, Dict, List, Set, Tuple
+
+from utils.config import CONFIG
+from utils.storage import get_db, run_db
 
 DB_PATH = os.getenv("CACHE_DB_PATH", "data/cache.sqlite3")
 
-os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+LOG = logging.getLogger("cache")
+LOG.addHandler(logging.NullHandler())
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS kvstore (
@@ -18,54 +41,339 @@ CREATE TABLE IF NOT EXISTS kvstore (
 CREATE INDEX IF NOT EXISTS idx_k_ts ON kvstore(k, ts DESC);
 """
 
-def _conn():
-    conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA synchronous=NORMAL;")
-    return conn
+DB = get_db(DB_PATH)
+DB.script(SCHEMA)
+
+_SQL_INSERT = "INSERT INTO kvstore(k, ts, ttl, v) VALUES(?,?,?,?)"
+_SQL_LATEST = "SELECT v, ts, ttl FROM kvstore WHERE k = ? ORDER BY ts DESC LIMIT 1"
+_SQL_LATEST_TS = "SELECT MAX(ts) FROM kvstore WHERE k = ?"
+# (k, ts) indeksi: anahtarın max_rows'uncu en yeni satırından eskiler (OFFSET max_rows - 1 bağlanır;
+# OFFSET max_rows bir satır fazla tutardı). Aynı ts'li satırlar sınırda korunur.
+_SQL_TRIM = """
+    DELETE FROM kvstore
+    WHERE k = ? AND ts < (
+        SELECT ts FROM kvstore WHERE k = ? ORDER BY ts DESC LIMIT 1 OFFSET ?
+    )
+"""
+_SQL_EXPIRE = "DELETE FROM kvstore WHERE k = ? AND ts + ttl < ?"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def encode(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=5)
+
+
+def decode(v: Any) -> Any:
+    if isinstance(v, (bytes, memoryview)):
+        return pickle.loads(v)
+    return json_loads(v)   # eski JSON metin satırı
+
+
+class _LRU:
+    """key → (ts_ms, ttl_ms, value); thread-safe."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._d: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Tuple[int, int, Any]]:
+        with self._lock:
+            e = self._d.get(key)
+            if e is None:
+                self.misses += 1
+                return None
+            self._d.move_to_end(key)
+            self.hits += 1
+            return e
+
+    def set(self, key: str, entry: Tuple[int, int, Any]) -> None:
+        with self._lock:
+            cur = self._d.get(key)
+            if cur is not None and cur[0] > entry[0]:
+                return   # daha yeni değer zaten bellekte
+            self._d[key] = entry
+            self._d.move_to_end(key)
+            while len(self._d) > self.size:
+                self._d.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        with self._lock:
+            self._d.pop(key, None)
+
+    def items(self):
+        with self._lock:
+            return list(self._d.items())
+
+
+_LRU_CACHE = _LRU(CONFIG.DATABASE.CACHE_LRU_SIZE)
+_max_rows: Dict[str, int] = {}
+_seen_version: Optional[int] = None
+_seen_peer: Optional[int] = None   # yazıcı bağlantısının son doğrulanmış data_version'ı
+_version_lock = threading.Lock()
+_compactor: Optional[threading.Thread] = None
+
+
+def _validate() -> None:
+    """Başka bağlantı commit ettiyse önbellekteki anahtarları en yeni ts ile karşılaştır."""
+    global _seen_version, _seen_peer
+    version = DB.data_version()
+    if version == _seen_version:
+        return
+    with _version_lock:
+        if version == _seen_version:
+            return
+        own = DB.own_commit()
+        # son commit bizim yazıcımızınsa ve yazıcı o ana kadar yabancı commit görmediyse LRU zaten güncel
+        if own is not None and own[0] == version and own[1] == _seen_peer:
+            _seen_version = version
+            return
+        for key, (ts, _, _) in _LRU_CACHE.items():
+            row = DB.query_one(_SQL_LATEST_TS, (key,))
+            # diskte daha yeni satır → başka süreç yazdı (kendi yazmamız henüz commit olmamış olabilir: ts büyük)
+            if row and row[0] is not None and row[0] > ts:
+                _LRU_CACHE.pop(key)
+        _seen_version = version
+        if own is not None:
+            _seen_peer = own[1]
+
+
+_ts_lock = threading.Lock()
+_last_write_ms = 0
+
+
+def _write_ts() -> int:
+    """Süreç içinde kesin artan ts (aynı ms'deki iki put sıralanabilsin, bildirim kaybolmasın)."""
+    global _last_write_ms
+    with _ts_lock:
+        _last_write_ms = max(_now_ms(), _last_write_ms + 1)
+        return _last_write_ms
+
+
+def _prepare(key: str, value: Any, ttl: int, max_rows: int):
+    now = _write_ts()
+    ttl_ms = int(ttl * 1000)
+    _max_rows[key] = int(max_rows)
+    _LRU_CACHE.set(key, (now, ttl_ms, value))   # write-through
+    _ensure_compactor()
+    v = encode(value)
+
+    def job(conn):
+        conn.execute(_SQL_INSERT, (key, now, ttl_ms, v))
+        return key, now
+    return job
+
+
+def _on_write_done(fut) -> None:
+    exc = fut.exception()
+    if exc is not None:
+        LOG.warning("cache write failed: %s", exc)
+        return
+    _publish(*fut.result())
 
-CONN = _conn()
-for stmt in SCHEMA.strip().split(";"):
-    s = stmt.strip()
-    if s:
-        CONN.execute(s)
 
 def put(key: str, value: Any, ttl: int = 120, max_rows: int = 100) -> None:
-    """Store value with TTL (seconds). Keeps only last max_rows for the key."""
-    now = int(time.time())
-    CONN.execute("INSERT INTO kvstore(k, ts, ttl, v) VALUES(?,?,?,?)", (key, now, ttl, json_dumps(value)))
-    # trim old rows
-    CONN.execute("""
-        DELETE FROM kvstore
-        WHERE k = ? AND ts NOT IN (
-            SELECT ts FROM kvstore WHERE k = ? ORDER BY ts DESC LIMIT ?
-        )
-    """, (key, key, max_rows))
-    # purge expired (best-effort)
-    purge_expired()
+    """Store value with TTL (seconds). Eski satırlar sıkıştırıcıda (max_rows) silinir; yazma beklenmez."""
+    DB.submit(_prepare(key, value, ttl, max_rows)).add_done_callback(_on_write_done)
+
+
+async def aput(key: str, value: Any, ttl: int = 120, max_rows: int = 100) -> None:
+    """put + commit'i bekler (başka süreçler okuyabilir hale gelir)."""
+    _publish(*await DB.awrite(_prepare(key, value, ttl, max_rows)))
+
+
+def _fresh(entry: Optional[Tuple[int, int, Any]], now: int) -> Any:
+    if entry is None:
+        return None
+    ts, ttl, value = entry
+    return None if ts + ttl < now else value
+
 
 def get_latest(key: str) -> Optional[Any]:
     """Return latest, non-expired value for key or None."""
-    now = int(time.time())
-    row = CONN.execute("""
-        SELECT v, ts, ttl FROM kvstore
-        WHERE k = ?
-        ORDER BY ts DESC
-        LIMIT 1
-    """, (key,)).fetchone()
+    _validate()
+    now = _now_ms()
+    entry = _LRU_CACHE.get(key)
+    if entry is not None:
+        return _fresh(entry, now)
+    row = DB.query_one(_SQL_LATEST, (key,))
     if not row:
         return None
     v, ts, ttl = row
-    if ts + ttl < now:
+    try:
+        value = decode(v)
+    except Exception as e:
+        LOG.warning("cache decode failed for %s: %s", key, e)
         return None
-    return json_loads(v)
+    _LRU_CACHE.set(key, (ts, ttl, value))
+    return _fresh((ts, ttl, value), now)
+
+
+async def aget_latest(key: str) -> Optional[Any]:
+    # bellek isabeti: loop içinde (data_version kontrolü disk okuması yapmaz)
+    if DB.data_version() == _seen_version:
+        entry = _LRU_CACHE.get(key)
+        if entry is not None:
+            return _fresh(entry, _now_ms())
+    return await run_db(get_latest, key)
+
+
+# ---------------------------------------------------------
+# Sıkıştırıcı
+# ---------------------------------------------------------
+def _compact_job(now: int, max_rows: Dict[str, int]):
+    default = CONFIG.DATABASE.CACHE_MAX_ROWS_PER_KEY
+
+    def job(conn) -> int:
+        n = 0
+        keys = [r[0] for r in conn.execute("SELECT DISTINCT k FROM kvstore").fetchall()]
+        for k in keys:
+            n += conn.execute(_SQL_EXPIRE, (k, now)).rowcount
+            n += conn.execute(_SQL_TRIM, (k, k, max(1, max_rows.get(k, default)) - 1)).rowcount
+        return n
+    return job
+
+
+def compact() -> int:
+    """Süresi dolan ve max_rows dışında kalan satırları siler. Döndürür: silinen satır sayısı."""
+    return DB.write(_compact_job(_now_ms(), dict(_max_rows)))
+
 
 def purge_expired() -> int:
-    now = int(time.time())
-    cur = CONN.execute("DELETE FROM kvstore WHERE ts + ttl < ?", (now,))
-    return cur.rowcount
+    return compact()
+
+
+def _compact_loop() -> None:
+    interval = CONFIG.DATABASE.CACHE_COMPACT_INTERVAL
+    while True:
+        time.sleep(interval)
+        try:
+            compact()
+        except Exception as e:
+            LOG.warning("cache compaction failed: %s", e)
+
+
+def _ensure_compactor() -> None:
+    global _compactor
+    if _compactor is None or not _compactor.is_alive():
+        _compactor = threading.Thread(target=_compact_loop, name="cache-compactor", daemon=True)
+        _compactor.start()
+
+
+# ---------------------------------------------------------
+# Pub/sub
+# ---------------------------------------------------------
+class Subscription:
+    """Bir asyncio loop'una bağlı abonelik; wait() değişen anahtar kümesini döner."""
+
+    def __init__(self, keys: Set[str]):
+        self.keys = keys
+        self.loop = asyncio.get_running_loop()
+        self._changed: Set[str] = set()
+        self._event = asyncio.Event()
+
+    def _notify(self, key: str) -> None:
+        self._changed.add(key)
+        self._event.set()
+
+    async def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Değişiklik olana kadar bekler; timeout dolarsa boş küme."""
+        if not self._changed:
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        changed, self._changed = self._changed, set()
+        self._event.clear()
+        return changed
+
+    def close(self) -> None:
+        unsubscribe(self)
+
+
+_subs: List[Subscription] = []
+_subs_lock = threading.Lock()
+_last_ts: Dict[str, int] = {}          # anahtar → bildirilen son ts
+_watchers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+
+def _publish(key: str, ts: int) -> None:
+    """Yeni satır (key, ts) commit edildi: abonelere haber ver (her thread'den çağrılabilir)."""
+    with _subs_lock:
+        if ts <= _last_ts.get(key, -1):
+            return
+        _last_ts[key] = ts
+        targets = [sub for sub in _subs if key in sub.keys]
+    for sub in targets:
+        try:
+            sub.loop.call_soon_threadsafe(sub._notify, key)
+        except RuntimeError:
+            unsubscribe(sub)   # loop kapanmış
+
+
+def subscribe(*keys: str) -> Subscription:
+    """Çalışan loop içinden çağrılmalı; başka süreçlerin yazmaları için izleyici görevi başlatır."""
+    sub = Subscription(set(keys))
+    seen = _latest_ts(list(sub.keys))   # mevcut satırlar "değişiklik" sayılmasın
+    with _subs_lock:
+        for k, ts in seen.items():
+            _last_ts[k] = max(ts, _last_ts.get(k, -1))
+        _subs.append(sub)
+    task = _watchers.get(sub.loop)
+    if task is None or task.done():
+        _watchers[sub.loop] = sub.loop.create_task(_watch(), name="cache_watch")
+    return sub
+
+
+def unsubscribe(sub: Subscription) -> None:
+    with _subs_lock:
+        if sub in _subs:
+            _subs.remove(sub)
+
+
+def _latest_ts(keys: List[str]) -> Dict[str, int]:
+    out = {}
+    for k in keys:
+        row = DB.query_one(_SQL_LATEST_TS, (k,))
+        if row and row[0] is not None:
+            out[k] = row[0]
+    return out
+
+
+async def _watch() -> None:
+    """data_version yoklaması (disk okuması yok); değişince abone anahtarlarının MAX(ts)'i."""
+    loop = asyncio.get_running_loop()
+    version = DB.data_version()
+    while True:
+        await asyncio.sleep(CONFIG.DATABASE.CACHE_WATCH_INTERVAL)
+        with _subs_lock:
+            keys = sorted({k for sub in _subs if sub.loop is loop for k in sub.keys})
+        if not keys:
+            _watchers.pop(loop, None)
+            return
+        v = DB.data_version()
+        if v == version:
+            continue
+        version = v
+        try:
+            latest = await run_db(_latest_ts, keys)
+        except Exception as e:
+            LOG.warning("cache watch failed: %s", e)
+            continue
+        for k, ts in latest.items():
+            _publish(k, ts)
+
+
+def stats() -> Dict[str, Any]:
+    return {"lru_size": len(_LRU_CACHE.items()), "lru_hits": _LRU_CACHE.hits, "lru_misses": _LRU_CACHE.misses}
+
 
-# small JSON helpers tolerant to basic types
+# small JSON helpers tolerant to basic types (eski metin satırları için)
 import json as _json
 def json_dumps(x: Any) -> str:
     try:
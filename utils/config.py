@@ -14,6 +14,11 @@ from dotenv import load_dotenv
 ENV_PATH = ".env"
 load_dotenv(ENV_PATH, override=True)
 
+# Opsiyonel parametre profili (örn. utils/alpha_optimizer çıktısı): .env değerlerinin üzerine yazar
+TA_PROFILE = os.getenv("TA_PROFILE")
+if TA_PROFILE and os.path.exists(TA_PROFILE):
+    load_dotenv(TA_PROFILE, override=True)
+
 # === Binance Config ===
 @dataclass
 class BinanceConfig:
@@ -22,6 +27,7 @@ class BinanceConfig:
     API_KEY: Optional[str] = os.getenv("BINANCE_API_KEY")
     SECRET_KEY: Optional[str] = os.getenv("BINANCE_SECRET_KEY")
     CONCURRENCY: int = int(os.getenv("BINANCE_CONCURRENCY", 8))
+    MAX_RETRIES: int = int(os.getenv("BINANCE_MAX_RETRIES", 5))   # REST tekrar deneme üst sınırı (emirler hariç: 0)
     TRADES_LIMIT: int = int(os.getenv("TRADES_LIMIT", 500))
     WHALE_USD_THRESHOLD: float = float(os.getenv("WHALE_USD_THRESHOLD", 50000))
     TOP_SYMBOLS_FOR_IO: List[str] = field(
@@ -34,6 +40,11 @@ class BinanceConfig:
     IO_CONCURRENCY: int = int(os.getenv("IO_CONCURRENCY", 5))
     BINANCE_TICKER_TTL: int = int(os.getenv("BINANCE_TICKER_TTL", 5))
     STREAM_INTERVAL: str = os.getenv("STREAM_INTERVAL", "1m")
+    # STREAM_INTERVAL barlarından yerelde türetilen zaman dilimleri (utils/resampler.py)
+    RESAMPLE_TIMEFRAMES: List[str] = field(
+        default_factory=lambda: os.getenv("RESAMPLE_TIMEFRAMES", "5m,15m,1h,4h,1d").split(",")
+    )
+    RESAMPLE_CAPACITY: int = int(os.getenv("RESAMPLE_CAPACITY", 1000))
 
 # Fonksiyon: Binance API keylerini runtime’da güncelle
 def update_binance_keys(api_key: str, secret_key: str):
@@ -46,6 +57,16 @@ class BotConfig:
     PAPER_MODE: bool = os.getenv("PAPER_MODE", "true").lower() == "true"
     EVALUATOR_WINDOW: int = int(os.getenv("EVALUATOR_WINDOW", 60))
     EVALUATOR_THRESHOLD: float = float(os.getenv("EVALUATOR_THRESHOLD", 0.5))
+    RISK_MAX_DAILY_LOSS: float = float(os.getenv("RISK_MAX_DAILY_LOSS", 0.05))
+    # OrderManager: WS fiyatı bu kadar sn'den eskiyse REST'e düşer; bakiye önbelleği uzlaştırma aralığı
+    PRICE_MAX_AGE: float = float(os.getenv("PRICE_MAX_AGE", 5))
+    ACCOUNT_REFRESH_SEC: float = float(os.getenv("ACCOUNT_REFRESH_SEC", 30))
+    PAPER_BALANCE: float = float(os.getenv("PAPER_BALANCE", 10000))
+    # Paper eşleştirme motoru (utils/paper_engine.py): ücretler, defter yenileme yaşı (sn) ve derinliği
+    PAPER_TAKER_FEE: float = float(os.getenv("PAPER_TAKER_FEE", 0.0004))
+    PAPER_MAKER_FEE: float = float(os.getenv("PAPER_MAKER_FEE", 0.0002))
+    PAPER_BOOK_MAX_AGE: float = float(os.getenv("PAPER_BOOK_MAX_AGE", 2))
+    PAPER_BOOK_DEPTH: int = int(os.getenv("PAPER_BOOK_DEPTH", 100))
 
 # === TA Config ===
 @dataclass
@@ -82,6 +103,9 @@ class TAConfig:
     REGIME_WINDOW: int = int(os.getenv("REGIME_WINDOW", 80))
     ENTROPY_M: int = int(os.getenv("ENTROPY_M", 3))
     ENTROPY_R_FACTOR: float = float(os.getenv("ENTROPY_R_FACTOR", 0.2))
+    # ApEn/SampEn: karo (tile) boyutu ve opsiyonel şablon örnekleme (0 = tam hesap)
+    ENTROPY_BLOCK: int = int(os.getenv("ENTROPY_BLOCK", 256))
+    ENTROPY_MAX_TEMPLATES: int = int(os.getenv("ENTROPY_MAX_TEMPLATES", 0))
     LEADLAG_MAX_LAG: int = int(os.getenv("LEADLAG_MAX_LAG", 10))
 
     # alpha_ta ağırlıkları
@@ -91,10 +115,18 @@ class TAConfig:
     W_REGIME: float = float(os.getenv("W_REGIME", 0.20))
     W_LEADLAG: float = float(os.getenv("W_LEADLAG", 0.20))
 
+    # Bar anahtarlı indikatör cache'i (utils/indicator_cache.py) bellek bütçesi
+    INDICATOR_CACHE_MAX_MB: int = int(os.getenv("INDICATOR_CACHE_MAX_MB", 64))
+
 # === System Config ===
 @dataclass
 class SystemConfig:
     MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", 2))
+    # supervisor.py (çok süreçli mod): roller ve süreçler arası mesaj yolu adresi
+    SUPERVISOR_ROLES: List[str] = field(
+        default_factory=lambda: os.getenv("SUPERVISOR_ROLES", "ingest,compute,bot").split(",")
+    )
+    IPC_ADDRESS: str = os.getenv("IPC_ADDRESS", "data/ipc.sock")   # Unix soket yolu veya tcp://host:port
 
 # === IO Config ===
 @dataclass
@@ -123,6 +155,16 @@ class IOConfig:
     TOP_N_MIGRATION: int = int(os.getenv("IO_TOP_N_MIGRATION", 10))
     MAX_SYMBOLS_MARKET: int = int(os.getenv("IO_MAX_SYMBOLS_MARKET", 30))
     QUOTE_ASSET: str = os.getenv("IO_QUOTE_ASSET", "USDT")
+    # Arka plan /io snapshot servisi (utils/io_snapshot.py), saniye
+    SNAPSHOT_INTERVAL: int = int(os.getenv("IO_SNAPSHOT_INTERVAL", 30))
+    SNAPSHOT_MIN_INTERVAL: int = int(os.getenv("IO_SNAPSHOT_MIN_INTERVAL", 5))
+    SNAPSHOT_STALE_AFTER: int = int(os.getenv("IO_SNAPSHOT_STALE_AFTER", 120))
+    # Yerel aggTrades deposu (utils/trade_store.py): uzun cashflow pencereleri gerçek trade'lerle
+    TRADE_STORE_ENABLED: bool = os.getenv("IO_TRADE_STORE_ENABLED", "true").lower() == "true"
+    TRADE_STORE_DIR: str = os.getenv("IO_TRADE_STORE_DIR", "data/trades")
+    TRADE_STORE_RETENTION_H: float = float(os.getenv("IO_TRADE_STORE_RETENTION_H", 26))
+    TRADE_STORE_MAX_PAGES: int = int(os.getenv("IO_TRADE_STORE_MAX_PAGES", 5))     # sembol başına, tur başına
+    TRADE_STORE_RUN_PAGES: int = int(os.getenv("IO_TRADE_STORE_RUN_PAGES", 90))    # tüm semboller ortak, tur başına (~360 ağırlık)
 
 # === Telegram Config ===
 @dataclass
@@ -134,6 +176,20 @@ class TelegramConfig:
 @dataclass
 class DatabaseConfig:
     DB_PATH: str = os.getenv("DB_PATH", "data/bot.db")
+    # utils/storage.py: ortak SQLite katmanı (okuyucu havuzu + tek yazıcı)
+    READ_POOL_SIZE: int = int(os.getenv("DB_READ_POOL_SIZE", 4))
+    MMAP_SIZE: int = int(os.getenv("DB_MMAP_SIZE", 256 * 1024 * 1024))
+    BUSY_TIMEOUT_MS: int = int(os.getenv("DB_BUSY_TIMEOUT_MS", 5000))
+    STATEMENT_CACHE: int = int(os.getenv("DB_STATEMENT_CACHE", 256))
+    # utils/cache.py: bellek içi LRU ön katman + arka plan sıkıştırıcı
+    CACHE_LRU_SIZE: int = int(os.getenv("CACHE_LRU_SIZE", 256))
+    CACHE_COMPACT_INTERVAL: float = float(os.getenv("CACHE_COMPACT_INTERVAL", 60))
+    CACHE_MAX_ROWS_PER_KEY: int = int(os.getenv("CACHE_MAX_ROWS_PER_KEY", 100))
+    CACHE_WATCH_INTERVAL: float = float(os.getenv("CACHE_WATCH_INTERVAL", 0.25))   # başka süreç yazmaları
+    # utils/db.py write-behind: sinyal/karar/paper trade kayıtları kuyruktan toplu yazılır
+    WRITE_QUEUE_MAX: int = int(os.getenv("DB_WRITE_QUEUE_MAX", 10000))
+    WRITE_BATCH_SIZE: int = int(os.getenv("DB_WRITE_BATCH_SIZE", 500))
+    WRITE_FLUSH_INTERVAL: float = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", 0.5))
 
 # === Master Config ===
 @dataclass
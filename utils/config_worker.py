@@ -1,16 +1,21 @@
 
 # Which tasks Worker A should run and their intervals (seconds)
+# Opsiyonel alanlar (utils/scheduler.py): timeout (varsayılan interval), priority (küçük = önce, varsayılan 10),
+# jitter (sn, her tura rastgele gecikme)
 WORKER_A_TASKS = [
-    {"name": "ticker", "interval": 10},       # Binance ticker (prices) every 10s
-    {"name": "funding", "interval": 60},      # Funding rates every 60s (if available)
-    # {"name": "oi", "interval": 120},        # Open interest example
+    {"name": "ticker", "interval": 10, "priority": 0, "timeout": 8},          # /api/v3/ticker/24hr (tek istek) every 10s
+    {"name": "funding", "interval": 60, "priority": 5, "jitter": 2},          # /fapi/v1/premiumIndex (tek istek) every 60s
+    {"name": "oi", "interval": 120, "priority": 10, "jitter": 5},             # /fapi/v1/openInterest (sembol başına)
 ]
 
+# Aynı anda çalışabilecek en fazla worker_a görevi (yavaş görev diğerlerini bekletmez)
+WORKER_A_MAX_CONCURRENCY = 4
+
 # Which markets/symbols to watch (examples; adjust in your repo)
 SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
 
 # Worker B decision loop frequency
-WORKER_B_INTERVAL = 5  # seconds
+WORKER_B_INTERVAL = 5  # seconds (eski periyodik döngü; worker_b artık cache bildirimleriyle uyanıyor)
 
 # General cache setup
 CACHE_TTL_SECONDS = {
@@ -1,15 +1,31 @@
 # utils/db.py
-import sqlite3
+# - log_signal / log_decision / log_paper_trade event loop'u bloklamaz: kayıt sınırlı bir kuyruğa
+#   eklenir, toplayıcı thread executemany ile toplu transaction'larda yazar
+#   (CONFIG.DATABASE.WRITE_BATCH_SIZE satır veya WRITE_FLUSH_INTERVAL sn, hangisi önce gelirse)
+# - ts kuyruğa eklenme anında alınır (yazma gecikmesi zaman damgasını kaydırmaz)
+# - Yazma utils/storage ortak katmanındaki tek yazıcı bağlantı üzerinden (aynı pragmalar, group commit)
+# - Kuyruk doluysa kayıt atılır ve sayılır (bellek sınırlı); flush() / shutdown() bekleyenleri yazar
+# - writer_metrics(): kuyruk derinliği, yazılan/atılan satır, flush gecikmesi
+import atexit
+import logging
+import queue
 import os
-from datetime import datetime
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.config import CONFIG
+from utils.storage import get_db
 
 DB_PATH = os.getenv("DB_PATH", "data/paper_trades.db")
 
+LOG = logging.getLogger("db")
+LOG.addHandler(logging.NullHandler())
+
 def init_db():
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
+    get_db(DB_PATH).script("""
     CREATE TABLE IF NOT EXISTS paper_trades (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         symbol TEXT,
@@ -18,10 +34,9 @@ def init_db():
         price REAL,
         source TEXT,
         executed BOOLEAN DEFAULT 0,
-        ts DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    c.execute("""
+        ts DATETIME DEFAULT CURRENT_TIMESTAMP,
+        pnl REAL
+    );
     CREATE TABLE IF NOT EXISTS signals (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         symbol TEXT,
@@ -30,9 +45,7 @@ def init_db():
         payload TEXT,
         source TEXT,
         ts DATETIME DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    c.execute("""
+    );
     CREATE TABLE IF NOT EXISTS decisions (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         symbol TEXT,
@@ -43,36 +56,164 @@ def init_db():
         ts DATETIME DEFAULT CURRENT_TIMESTAMP
     )
     """)
-    conn.commit()
-    conn.close()
-
-def log_paper_trade(symbol, side, qty, price, source="signal"):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO paper_trades (symbol, side, qty, price, source, executed)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (symbol, side, qty, price, source, True))
-    conn.commit()
-    conn.close()
+    # eski dosyalar: dolum başına gerçekleşen PnL kolonu (paper_engine) sonradan eklendi
+    db = get_db(DB_PATH)
+    if "pnl" not in {r[1] for r in db.query("PRAGMA table_info(paper_trades)")}:
+        db.execute("ALTER TABLE paper_trades ADD COLUMN pnl REAL")
+
+_SQL_PAPER_TRADE = "INSERT INTO paper_trades (symbol, side, qty, price, source, executed, ts, pnl) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+_SQL_SIGNAL = "INSERT INTO signals (symbol, signal_type, strength, payload, source, ts) VALUES (?, ?, ?, ?, ?, ?)"
+_SQL_DECISION = "INSERT INTO decisions (symbol, decision, strength, reason, executed, ts) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def _now() -> str:
+    # CURRENT_TIMESTAMP ile aynı biçim (UTC)
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class DBWriter:
+    """Sınırlı kuyruk + toplayıcı thread (write-behind); yazma storage yazıcısında."""
+
+    def __init__(self, path: str = DB_PATH, max_queue: Optional[int] = None,
+                 batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.path = path
+        self.batch_size = int(batch_size or CONFIG.DATABASE.WRITE_BATCH_SIZE)
+        self.flush_interval = float(flush_interval if flush_interval is not None else CONFIG.DATABASE.WRITE_FLUSH_INTERVAL)
+        self._q: queue.Queue = queue.Queue(maxsize=int(max_queue or CONFIG.DATABASE.WRITE_QUEUE_MAX))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, sql: str, params: Tuple[Any, ...]) -> bool:
+        """Kaydı kuyruğa ekler (bloklamaz). Kuyruk doluysa False."""
+        if self._thread is None:
+            self.start()
+        try:
+            self._q.put_nowait((sql, params))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                LOG.warning("db write queue full, dropped=%d", self.dropped)
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Kuyruktaki her şey yazılana kadar bekler (thread içinden çağrılmamalı)."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._q.empty()
+        done = threading.Event()
+        try:
+            self._q.put((None, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Bekleyenleri yazar ve thread'i durdurur (kapanış hook'u)."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self.flush(timeout)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        database = get_db(self.path)
+        while True:
+            batch: List[Tuple[str, Any]] = []
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                # boşken süresiz bekle; ilk kayıttan sonra en fazla flush_interval
+                timeout = None
+                if batch:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                try:
+                    sql, params = self._q.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if sql is None:
+                    waiters.append(params)   # flush işareti: eldekileri hemen yaz
+                    break
+                batch.append((sql, params))
+            if batch:
+                self._write(database, batch)
+            for w in waiters:
+                w.set()
+            if self._stopping and self._q.empty():
+                return
+
+    def _write(self, database, batch: List[Tuple[str, Any]]) -> None:
+        t0 = time.perf_counter()
+        grouped: Dict[str, List[Any]] = defaultdict(list)
+        for sql, params in batch:
+            grouped[sql].append(params)
+        try:
+            # tek transaction (storage yazıcı thread'i)
+            database.write(lambda conn: [conn.executemany(sql, rows) for sql, rows in grouped.items()])
+            self.written += len(batch)
+        except Exception as e:
+            self.errors += 1
+            LOG.warning("db batch write failed (%d rows): %s", len(batch), e)
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.batches += 1
+        self.last_flush_ms = ms
+        self.max_flush_ms = max(self.max_flush_ms, ms)
+        self._total_flush_ms += ms
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._q.qsize(),
+            "queue_max": self._q.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "batches": self.batches,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "avg_flush_ms": round(self._total_flush_ms / self.batches, 3) if self.batches else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 3),
+        }
+
+
+WRITER = DBWriter()
+
+
+def flush(timeout: Optional[float] = 5.0) -> bool:
+    return WRITER.flush(timeout)
+
+
+def shutdown(timeout: Optional[float] = 5.0) -> None:
+    WRITER.stop(timeout)
+
+
+def writer_metrics() -> Dict[str, Any]:
+    return WRITER.metrics()
+
+
+atexit.register(shutdown)
+
+
+def log_paper_trade(symbol, side, qty, price, source="signal", pnl=None):
+    WRITER.submit(_SQL_PAPER_TRADE, (symbol, side, qty, price, source, True, _now(), pnl))
 
 def log_signal(symbol, signal_type, strength, payload: str, source="strategy"):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO signals (symbol, signal_type, strength, payload, source)
-        VALUES (?, ?, ?, ?, ?)
-    """, (symbol, signal_type, strength, payload, source))
-    conn.commit()
-    conn.close()
+    WRITER.submit(_SQL_SIGNAL, (symbol, signal_type, strength, payload, source, _now()))
 
 def log_decision(symbol, decision, strength, reason=""):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO decisions (symbol, decision, strength, reason, executed)
-        VALUES (?, ?, ?, ?, ?)
-    """, (symbol, decision, strength, reason, True))
-    conn.commit()
-    conn.close()
-  
+    WRITER.submit(_SQL_DECISION, (symbol, decision, strength, reason, True, _now()))
@@ -0,0 +1,195 @@
+# utils/indicator_cache.py
+# Bar anahtarlı indikatör / alpha_ta sonuç cache'i (process içi, LRU)
+# - Anahtar: (symbol, interval, son kapanmış bar open_time, fonksiyon, parametre hash)
+# - Aynı kapanmış barlar üzerinde aynı hesap tekrar edilmez (/t BTC x N kullanıcı)
+# - Boyut sınırı byte cinsinden (CONFIG.TA.INDICATOR_CACHE_MAX_MB); aşılınca LRU tahliye
+# - DataFrame bar kimliğini df.attrs["symbol"], df.attrs["interval"] ve "open_time" kolonundan alır.
+#   df.attrs["closed"] True değilse (son bar hâlâ oluşuyor olabilir) veya bu bilgiler yoksa
+#   cache devre dışı kalır, fonksiyon normal çalışır.
+# - Dönen nesneler paylaşılır: salt-okunur kabul edin.
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.config import CONFIG
+
+_MISS = object()
+
+_INTERVAL_UNITS_MS = {"s": 1000, "m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def interval_to_ms(interval: str) -> int:
+    """Binance interval ("1m", "4h", "1d" ...) → milisaniye."""
+    unit = interval[-1]
+    if unit == "M":
+        return int(interval[:-1]) * 30 * 86_400_000
+    return int(interval[:-1]) * _INTERVAL_UNITS_MS[unit.lower()]
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """Yaklaşık bellek (byte). pandas/numpy nesneleri için gerçek buffer boyutu."""
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        mu = obj.memory_usage(deep=True)
+        return int(mu.sum() if hasattr(mu, "sum") else mu)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if _depth > 4:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_size(v, _depth + 1) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def fingerprint(obj: Any) -> Hashable:
+    """Parametreleri hashlenebilir, kararlı bir anahtara çevirir."""
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        return ("pd", obj.shape, h.hexdigest())
+    if isinstance(obj, np.ndarray):
+        return ("np", obj.shape, hashlib.blake2b(np.ascontiguousarray(obj).tobytes(), digest_size=16).hexdigest())
+    if isinstance(obj, dict):
+        return tuple(sorted((str(k), fingerprint(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(fingerprint(v) for v in obj)
+    if hasattr(obj, "__dataclass_fields__"):
+        return fingerprint(vars(obj))
+    return repr(obj)
+
+
+def bar_key(df: Any) -> Optional[Tuple[str, str, int, int]]:
+    """(symbol, interval, son open_time, satır sayısı) veya None."""
+    if not isinstance(df, pd.DataFrame) or df.empty or "open_time" not in df.columns:
+        return None
+    symbol = df.attrs.get("symbol")
+    interval = df.attrs.get("interval")
+    if not symbol or not interval or not df.attrs.get("closed"):
+        return None
+    try:
+        return (str(symbol), str(interval), int(df["open_time"].iloc[-1]), len(df))
+    except Exception:
+        return None
+
+
+class IndicatorCache:
+    """Thread-safe, byte bütçeli LRU cache + hit/miss istatistikleri."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self._data: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._data:
+                _, (_, sz) = self._data.popitem(last=False)
+                self._bytes -= sz
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+INDICATOR_CACHE = IndicatorCache(getattr(CONFIG.TA, "INDICATOR_CACHE_MAX_MB", 64) * 1024 * 1024)
+
+
+def bar_cached(name: str, ignore: Tuple[str, ...] = ()) -> Callable:
+    """
+    İlk argümanı DataFrame olan fonksiyonlar için dekoratör (sync veya async).
+    ignore: anahtara girmeyecek kwargs (örn. max_workers).
+    CONFIG.TA değerleri de anahtara dahildir (ağırlık/eşik değişince cache geçersizleşir).
+    """
+    def make_key(df, args, kwargs) -> Optional[Tuple]:
+        bk = bar_key(df)
+        if bk is None:
+            return None
+        params = (fingerprint(args),
+                  fingerprint({k: v for k, v in kwargs.items() if k not in ignore}),
+                  fingerprint(CONFIG.TA))
+        return bk + (name, hashlib.blake2b(repr(params).encode(), digest_size=16).hexdigest())
+
+    def deco(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(df, *args, **kwargs):
+                key = make_key(df, args, kwargs)
+                if key is None:
+                    return await fn(df, *args, **kwargs)
+                hit = INDICATOR_CACHE.get(key, _MISS)
+                if hit is not _MISS:
+                    return hit
+                res = await fn(df, *args, **kwargs)
+                INDICATOR_CACHE.put(key, res)
+                return res
+            async_wrapper.uncached = fn
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(df, *args, **kwargs):
+            key = make_key(df, args, kwargs)
+            if key is None:
+                return fn(df, *args, **kwargs)
+            hit = INDICATOR_CACHE.get(key, _MISS)
+            if hit is not _MISS:
+                return hit
+            res = fn(df, *args, **kwargs)
+            INDICATOR_CACHE.put(key, res)
+            return res
+        wrapper.uncached = fn
+        return wrapper
+    return deco
+
+
+def cache_stats() -> Dict[str, Any]:
+    return INDICATOR_CACHE.stats()
@@ -0,0 +1,137 @@
+# utils/io_fetch.py
+# /io için toplu veri çekme planlayıcısı
+# - Bir /io çalıştırmasında gereken kaynaklar tüm semboller için toplanır ve tekilleştirilir:
+#     * 24h ticker: tek istek (symbols=[...])
+#     * funding: tek /fapi/v1/premiumIndex isteği (tüm perp'ler, lastFundingRate)
+#     * perp listesi: /fapi/v1/exchangeInfo (saatlik cache) — perp'i olmayan spot semboller için
+#       futures funding hiç istenmez (eski akışta bu istekler hata → sonsuz retry idi)
+#     * klines: yerel resampler'da varsa REST yok
+#     * trades: TRADE_STORE_ENABLED ise yerel aggTrades deposu artımlı senkronlanır (sadece yeni id'ler)
+#       ve en uzun cashflow penceresi kadar gerçek zaman damgalı trade verilir
+# - Sembol başı istekler (klines, depth, trades) hepsi aynı anda başlatılır; eşzamanlılık
+#   BinanceHTTPClient semaforu (global limit) ile sınırlı → toplam süre ≈ en yavaş tek istek
+# - Çıktı formatı eski _fetch_symbol_pack ile aynı (sembol → pack dict)
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from utils.config import CONFIG
+from utils.resampler import RESAMPLERS
+from utils.trade_store import RequestBudget, get_downloader
+
+LOG = logging.getLogger("io_fetch")
+LOG.addHandler(logging.NullHandler())
+
+_PERP_TTL = 3600
+_perp_cache: Dict[str, Any] = {"ts": 0.0, "symbols": None}
+
+
+async def perp_symbols(api) -> Optional[Set[str]]:
+    """USDⓈ-M perpetual sembolleri (saatlik cache); alınamazsa None (→ funding atlanmaz, premiumIndex haritası belirler)."""
+    now = time.time()
+    if _perp_cache["symbols"] is not None and now - _perp_cache["ts"] < _PERP_TTL:
+        return _perp_cache["symbols"]
+    try:
+        info = await api.futures_exchange_info()
+        syms = {s["symbol"] for s in info.get("symbols", [])
+                if s.get("contractType") == "PERPETUAL" and s.get("status") == "TRADING"}
+    except Exception as e:
+        LOG.warning("futures exchangeInfo failed: %s", e)
+        return _perp_cache["symbols"]
+    _perp_cache.update(ts=now, symbols=syms)
+    return syms
+
+
+async def _safe(coro, default: Any) -> Any:
+    try:
+        return await coro
+    except Exception as e:
+        LOG.warning("io fetch failed: %s", e)
+        return default
+
+
+class IOFetchPlan:
+    """Bir /io çalıştırması için kaynak planı + eşzamanlı yürütme."""
+
+    def __init__(self, api, kline_interval: Optional[str] = None, kline_limit: int = 200,
+                 depth_limit: int = 100, trades_limit: Optional[int] = None):
+        self.api = api
+        self.kline_interval = kline_interval or CONFIG.BINANCE.STREAM_INTERVAL
+        self.kline_limit = kline_limit
+        self.depth_limit = depth_limit
+        self.trades_limit = trades_limit or CONFIG.BINANCE.TRADES_LIMIT
+
+    async def _tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        data = await _safe(self.api.get_24h_tickers(symbols), [])
+        if isinstance(data, dict):
+            data = [data]
+        return {t.get("symbol"): t for t in data or [] if isinstance(t, dict)}
+
+    async def _funding(self) -> Dict[str, Dict[str, Any]]:
+        data = await _safe(self.api.get_premium_index(), [])
+        if isinstance(data, dict):
+            data = [data]
+        return {
+            p["symbol"]: {"symbol": p["symbol"], "fundingRate": p.get("lastFundingRate", 0),
+                          "fundingTime": p.get("nextFundingTime"), "markPrice": p.get("markPrice")}
+            for p in data or [] if isinstance(p, dict) and "symbol" in p
+        }
+
+    async def _klines(self, symbol: str) -> Any:
+        kl = RESAMPLERS.klines(symbol, self.kline_interval, self.kline_limit)
+        if kl is not None:
+            return kl
+        kl = await _safe(self.api.get_klines(symbol, interval=self.kline_interval, limit=self.kline_limit), [])
+        RESAMPLERS.seed(symbol, self.kline_interval, kl)
+        return kl
+
+    async def _trades(self, symbol: str, budget: RequestBudget) -> Any:
+        if not CONFIG.IO.TRADE_STORE_ENABLED:
+            return await _safe(self.api.get_recent_trades(symbol, limit=self.trades_limit), [])
+        dl = get_downloader(self.api)
+        try:
+            await dl.sync(symbol, budget=budget)
+        except Exception as e:
+            LOG.warning("aggTrades sync failed %s: %s", symbol, e)
+        since = int(time.time() * 1000) - max(CONFIG.IO.CASHFLOW_TIMEFRAMES.values()) * 60_000
+        return await asyncio.to_thread(dl.store.arrays, symbol, since)
+
+    async def fetch(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        if not symbols:
+            return {}
+        bulk = asyncio.gather(self._tickers(symbols), self._funding(), perp_symbols(self.api))
+        budget = RequestBudget()   # aggTrades: bu turdaki tüm semboller için ortak istek bütçesi
+        per_symbol = asyncio.gather(*[
+            asyncio.gather(
+                self._klines(sym),
+                _safe(self.api.get_order_book(sym, limit=self.depth_limit), {}),
+                self._trades(sym, budget),
+            )
+            for sym in symbols
+        ])
+        (tickers, funding, perps), packs = await asyncio.gather(bulk, per_symbol)
+
+        # toplu ticker'da eksik kalan (örn. geçersiz sembol listede) → tekil fallback
+        missing = [s for s in symbols if s not in tickers]
+        if missing:
+            extra = await asyncio.gather(*[_safe(self.api.get_24h_ticker(s), {}) for s in missing])
+            tickers.update({s: t for s, t in zip(missing, extra)})
+
+        out: Dict[str, Dict[str, Any]] = {}
+        for sym, (kl, ob, tr) in zip(symbols, packs):
+            has_perp = sym in funding if perps is None else sym in perps
+            out[sym] = {
+                "klines": kl,
+                "order_book": ob,
+                "trades": tr if tr is not None else [],   # dict listesi (REST "time") veya TradeArrays
+                "ticker": tickers.get(sym, {}),
+                "funding": funding.get(sym, {"fundingRate": 0}) if has_perp else {"fundingRate": 0},
+                "oi": None,
+                "liquidations": None,
+            }
+        return out
@@ -0,0 +1,165 @@
+# utils/io_snapshot.py
+# /io snapshot servisi — arka planda periyodik hesaplanan, versiyonlu ve zaman damgalı snapshot'lar
+# - build_multi_snapshot sonuçları CONFIG.IO.SNAPSHOT_INTERVAL saniyede bir yenilenir
+# - /io ve /io <coin> son snapshot'tan milisaniyeler içinde render edilir; yaş/bayatlık bilgisi snapshot'ta
+# - Tek uçuş (single-flight): aynı anda gelen istekler tek bir hesaplamayı bekler, N kullanıcı = 1 hesap
+# - notify(): kapanan kline barında (kline_pipeline.on_close) erken yenileme tetikler (SNAPSHOT_MIN_INTERVAL ile sınırlı)
+# - Snapshot nesnesi değiştirilmez; yenisi hazır olunca tek atamayla değiştirilir
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from utils.config import CONFIG
+
+LOG = logging.getLogger("io_snapshot")
+LOG.addHandler(logging.NullHandler())
+
+
+class IOSnapshot(NamedTuple):
+    version: int
+    ts: float                      # oluşturulma zamanı (epoch sn)
+    build_seconds: float
+    symbols: Tuple[str, ...]
+    data: Dict[str, Dict[str, Any]]
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.ts)
+
+    def is_stale(self, stale_after: Optional[float] = None) -> bool:
+        return self.age > (CONFIG.IO.SNAPSHOT_STALE_AFTER if stale_after is None else stale_after)
+
+
+def staleness_label(ts: float, stale_after: Optional[float] = None, version: Optional[int] = None) -> str:
+    """Rapor altına eklenecek kısa yaş satırı."""
+    age = max(0.0, time.time() - ts)
+    stale_after = CONFIG.IO.SNAPSHOT_STALE_AFTER if stale_after is None else stale_after
+    when = time.strftime("%H:%M:%S", time.localtime(ts))
+    ver = f" v{version}" if version is not None else ""
+    mark = "⚠️ bayat veri" if age > stale_after else "🕒"
+    return f"{mark} {when} ({age:.0f} sn önce{ver})"
+
+
+class IOSnapshotService:
+    """
+    builder: async (symbols) -> {symbol: snapshot}
+    resolver: async () -> symbols (örn. TOP_SYMBOLS_FOR_IO / AUTO hacim sıralı)
+    """
+
+    def __init__(self, builder: Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]],
+                 resolver: Callable[[], Awaitable[List[str]]],
+                 interval: Optional[float] = None, min_interval: Optional[float] = None):
+        self.builder = builder
+        self.resolver = resolver
+        self.interval = float(interval if interval is not None else CONFIG.IO.SNAPSHOT_INTERVAL)
+        self.min_interval = float(min_interval if min_interval is not None else CONFIG.IO.SNAPSHOT_MIN_INTERVAL)
+        self._snap: Optional[IOSnapshot] = None
+        self._version = 0
+        self._inflight: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._extra: Dict[str, Tuple[float, Dict[str, Any]]] = {}   # snapshot dışı /io <coin> istekleri
+        self.last_error: Optional[str] = None
+
+    # ---------------------------------------------------------
+    # Okuma
+    # ---------------------------------------------------------
+    def latest(self) -> Optional[IOSnapshot]:
+        return self._snap
+
+    async def get(self) -> IOSnapshot:
+        """Son snapshot; hiç yoksa (ilk çağrı) hesaplanmasını bekler. Servis çalışmıyorsa başlatır."""
+        self.start()
+        if self._snap is None:
+            await self.refresh()
+        if self._snap is None:
+            raise RuntimeError(self.last_error or "snapshot hazır değil")
+        return self._snap
+
+    async def get_symbol(self, symbol: str, single_builder: Callable[[str], Awaitable[Dict[str, Any]]]
+                         ) -> Tuple[Dict[str, Any], float]:
+        """Snapshot'ta olmayan sembol için tekil hesap (interval süresince cache'li). Döndürür: (snap, ts)."""
+        snap = self._snap
+        if snap is not None and symbol in snap.data:
+            return snap.data[symbol], snap.ts
+        hit = self._extra.get(symbol)
+        if hit and time.time() - hit[0] < self.interval:
+            return hit[1], hit[0]
+        data = await single_builder(symbol)
+        ts = time.time()
+        if len(self._extra) > 256:
+            self._extra.clear()
+        self._extra[symbol] = (ts, data)
+        return data, ts
+
+    # ---------------------------------------------------------
+    # Yenileme
+    # ---------------------------------------------------------
+    async def refresh(self) -> Optional[IOSnapshot]:
+        """Tek uçuş: devam eden hesap varsa onu bekler."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._build())
+        return await asyncio.shield(self._inflight)
+
+    async def _build(self) -> Optional[IOSnapshot]:
+        t0 = time.perf_counter()
+        try:
+            symbols = await self.resolver()
+            data = await self.builder(symbols) if symbols else {}
+        except Exception as e:
+            self.last_error = str(e)
+            LOG.warning("io snapshot refresh failed: %s", e)
+            return self._snap
+        self._version += 1
+        self._snap = IOSnapshot(self._version, time.time(), time.perf_counter() - t0, tuple(symbols), data)
+        self.last_error = None
+        self._extra.clear()
+        return self._snap
+
+    def notify(self) -> None:
+        """Akış güncellemesi: bir sonraki yenilemeyi öne çeker (min_interval'dan sık değil)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self) -> None:
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                LOG.exception("io snapshot loop error")
+            await asyncio.sleep(self.min_interval)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, self.interval - self.min_interval))
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._run(), name="io_snapshot")
+            except RuntimeError:
+                pass   # çalışan loop yok; get() çağrısında başlar
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self._snap
+        return {
+            "version": snap.version if snap else 0,
+            "age": snap.age if snap else None,
+            "build_seconds": snap.build_seconds if snap else None,
+            "symbols": len(snap.symbols) if snap else 0,
+            "running": self._task is not None and not self._task.done(),
+            "last_error": self.last_error,
+        }
@@ -3,7 +3,9 @@
 import math
 import statistics
 import time
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
 
 from utils.config import CONFIG  # ✅ config entegre
 
@@ -69,24 +71,64 @@ def calc_liquidity_layers(order_book: Dict[str, Any], price: float, pct_levels=N
     return layers
 
 
-def calc_taker_ratio(trades: List[Dict[str, Any]]) -> Optional[float]:
+class TradeArrays(NamedTuple):
+    """Trade listesinin tek seferde parse edilmiş, ts'ye göre sıralı hali."""
+    ts: np.ndarray            # int64 ms
+    qty: np.ndarray           # float64
+    price: np.ndarray         # float64
+    is_buyer_maker: np.ndarray  # bool
+    # (başlangıç ms, bitiş ms): bu aralıktaki trade'lerin tamamı dizide; None → bilinmiyor (REST listesi)
+    coverage: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+
+def trades_to_arrays(trades: Union[List[Dict[str, Any]], TradeArrays], now: Optional[int] = None) -> Optional[TradeArrays]:
+    """
+    REST/WS trade dict'lerini numpy dizilerine çevirir (float() her alan için bir kez).
+    Zaman: "ts", yoksa "time"/"T", o da yoksa `now`. Parse hatasında None.
+    """
+    if isinstance(trades, TradeArrays):
+        return trades
+    now = int(time.time() * 1000) if now is None else now
+    n = len(trades)
     try:
-        buys = sum(float(t["qty"]) for t in trades if not t.get("isBuyerMaker"))
-        sells = sum(float(t["qty"]) for t in trades if t.get("isBuyerMaker"))
-        total = buys + sells
-        return (buys - sells) / total if total > 0 else None
+        # ts → REST "time" (trades) / "T" (aggTrades) → yoksa now
+        ts = np.fromiter((t.get("ts", t.get("time", t.get("T", now))) for t in trades), dtype=np.int64, count=n)
+        qty = np.fromiter((float(t["qty"]) for t in trades), dtype=np.float64, count=n)
+        price = np.fromiter((float(t.get("price", 0)) for t in trades), dtype=np.float64, count=n)
+        ibm = np.fromiter((bool(t.get("isBuyerMaker")) for t in trades), dtype=bool, count=n)
     except Exception:
         return None
+    if n > 1 and np.any(ts[1:] < ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+        ts, qty, price, ibm = ts[order], qty[order], price[order], ibm[order]
+    return TradeArrays(ts, qty, price, ibm)
 
 
-def calc_vwap_taker_ratio(trades: List[Dict[str, Any]]) -> Optional[float]:
-    try:
-        buy_notional = sum(float(t["qty"]) * float(t.get("price", 0)) for t in trades if not t.get("isBuyerMaker"))
-        sell_notional = sum(float(t["qty"]) * float(t.get("price", 0)) for t in trades if t.get("isBuyerMaker"))
-        total = buy_notional + sell_notional
-        return (buy_notional - sell_notional) / total if total > 0 else None
-    except Exception:
+def _ratio(buy: float, sell: float) -> Optional[float]:
+    total = buy + sell
+    return (buy - sell) / total if total > 0 else None
+
+
+def calc_taker_ratio(trades: Union[List[Dict[str, Any]], TradeArrays]) -> Optional[float]:
+    ta = trades_to_arrays(trades)
+    if ta is None:
+        return None
+    buy = float(ta.qty[~ta.is_buyer_maker].sum())
+    sell = float(ta.qty[ta.is_buyer_maker].sum())
+    return _ratio(buy, sell)
+
+
+def calc_vwap_taker_ratio(trades: Union[List[Dict[str, Any]], TradeArrays]) -> Optional[float]:
+    ta = trades_to_arrays(trades)
+    if ta is None:
         return None
+    notional = ta.qty * ta.price
+    buy = float(notional[~ta.is_buyer_maker].sum())
+    sell = float(notional[ta.is_buyer_maker].sum())
+    return _ratio(buy, sell)
 
 
 def normalize_funding(funding_rate: float) -> Optional[float]:
@@ -114,15 +156,49 @@ def normalize_liquidations(liquidations: Optional[float]) -> Optional[float]:
 # --- Çoklu Zaman Dilimi Cashflow ---
 # ===============================
 
-def calc_cashflow_ratios(trades: List[Dict[str, Any]]) -> Dict[str, Dict[str, Optional[float]]]:
-    now = int(time.time() * 1000)
+# kapsamın bitişi "now"dan en fazla bu kadar geride olabilir (senkronizasyon → snapshot arası süre)
+COVERAGE_SLACK_MS = 60_000
+
+
+def calc_cashflow_ratios(trades: Union[List[Dict[str, Any]], TradeArrays],
+                         now: Optional[int] = None) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Tüm CASHFLOW_TIMEFRAMES pencereleri tek geçişte:
+    trade'ler ts'ye göre sıralı → buy/sell qty ve notional için sondan kümülatif toplamlar;
+    her pencere [cutoff, ∞) bir searchsorted ile bulunur (O(F log T)).
+    trades.coverage biliniyorsa kapsamın dışına taşan pencereler "covered": False ve None oranla döner
+    (kısmi veriden hesaplanan oran tüm pencereyi temsil etmez); bilinmiyorsa "covered": None.
+    """
+    now = int(time.time() * 1000) if now is None else now
+    ta = trades_to_arrays(trades, now)
+    frames = CONFIG.IO.CASHFLOW_TIMEFRAMES
+    if ta is None:
+        return {"ratios": {label: {"taker_ratio": None, "vwap_taker_ratio": None, "covered": None}
+                           for label in frames}}
+
+    buy = ~ta.is_buyer_maker
+    notional = ta.qty * ta.price
+    # suffix[i] = sum(x[i:]) — pencereler hep "şimdi"de bittiği için fark almaya (iptal hatası) gerek yok
+    cols = np.stack([np.where(buy, ta.qty, 0.0), np.where(buy, 0.0, ta.qty),
+                     np.where(buy, notional, 0.0), np.where(buy, 0.0, notional)])
+    suffix = np.zeros((4, len(ta) + 1))
+    suffix[:, :-1] = np.cumsum(cols[:, ::-1], axis=1)[:, ::-1]
+
+    cutoffs = np.array([now - minutes * 60 * 1000 for minutes in frames.values()], dtype=np.int64)
+    idx = np.searchsorted(ta.ts, cutoffs, side="left")
+    if ta.coverage is None:
+        covered = [None] * len(cutoffs)
+    else:
+        lo, hi = ta.coverage
+        head_ok = hi >= now - COVERAGE_SLACK_MS
+        covered = [bool(head_ok and lo <= c) for c in cutoffs]
     ratios = {}
-    for label, minutes in CONFIG.IO.CASHFLOW_TIMEFRAMES.items():
-        cutoff = now - minutes * 60 * 1000
-        sub_trades = [t for t in trades if t.get("ts", now) >= cutoff]
+    for label, i, cov in zip(frames, idx, covered):
+        bq, sq, bn, sn = suffix[:, i]
         ratios[label] = {
-            "taker_ratio": calc_taker_ratio(sub_trades),
-            "vwap_taker_ratio": calc_vwap_taker_ratio(sub_trades)
+            "taker_ratio": _ratio(float(bq), float(sq)) if cov is not False else None,
+            "vwap_taker_ratio": _ratio(float(bn), float(sn)) if cov is not False else None,
+            "covered": cov,
         }
     return {"ratios": ratios}
 
@@ -140,14 +216,20 @@ def build_io_snapshot(
     funding,
     oi: Optional[float] = None,
     liquidations: Optional[float] = None,
-    with_cashflow: bool = True
+    with_cashflow: bool = True,
+    now: Optional[int] = None,
 ):
+    """trades: dict listesi veya trades_to_arrays() çıktısı (TradeArrays) — bir kez parse edilir."""
+    now = int(time.time() * 1000) if now is None else now
+    trades = trades_to_arrays(trades, now) if trades is not None else None
     momentum = calc_momentum(klines)
     volatility = calc_volatility(klines)
     obi = calc_obi(order_book)
     liquidity_layers = calc_liquidity_layers(order_book, float(ticker.get("lastPrice", 0)))
-    taker_ratio = calc_taker_ratio(trades)
-    vwap_taker_ratio = calc_vwap_taker_ratio(trades)
+    # genel oranlar son TRADES_LIMIT trade üzerinden (trade deposundan gelen uzun seride de aynı anlam)
+    recent = TradeArrays(*(a[-CONFIG.BINANCE.TRADES_LIMIT:] for a in trades[:4])) if trades is not None else None
+    taker_ratio = calc_taker_ratio(recent) if recent is not None else None
+    vwap_taker_ratio = calc_vwap_taker_ratio(recent) if recent is not None else None
     funding_rate = float(funding.get("fundingRate", 0))
     funding_norm = normalize_funding(funding_rate)
     oi_norm = normalize_oi(oi)
@@ -191,7 +273,7 @@ def build_io_snapshot(
     }
 
     if with_cashflow:
-        snapshot.update(calc_cashflow_ratios(trades))
+        snapshot.update(calc_cashflow_ratios(trades if trades is not None else [], now))
 
     return snapshot
 
@@ -200,19 +282,28 @@ def build_io_snapshot(
 # --- Çoklu Sembol Snapshot ---
 # ===============================
 
-def build_multi_snapshot(symbols_data: Dict[str, Dict[str, Any]], with_cashflow: bool = True) -> Dict[str, Any]:
+def build_multi_snapshot(symbols_data: Dict[str, Dict[str, Any]], with_cashflow: bool = True,
+                         trade_arrays: Optional[Dict[str, TradeArrays]] = None,
+                         now: Optional[int] = None) -> Dict[str, Any]:
+    """
+    trade_arrays: sembol → TradeArrays (önceden parse edilmiş / yerel trade deposundan);
+    verilmeyen semboller için data["trades"] kullanılır. Tüm semboller aynı `now` ile pencerelenir.
+    """
+    now = int(time.time() * 1000) if now is None else now
+    trade_arrays = trade_arrays or {}
     result = {}
     for symbol, data in symbols_data.items():
         snapshot = build_io_snapshot(
             symbol=symbol,
             klines=data.get("klines", []),
             order_book=data.get("order_book", {}),
-            trades=data.get("trades", []),
+            trades=trade_arrays.get(symbol, data.get("trades", [])),
             ticker=data.get("ticker", {}),
             funding=data.get("funding", {}),
             oi=data.get("oi"),
             liquidations=data.get("liquidations"),
-            with_cashflow=with_cashflow
+            with_cashflow=with_cashflow,
+            now=now,
         )
         result[symbol] = snapshot
     return result
@@ -0,0 +1,261 @@
+# utils/ipc.py
+# Süreçler arası yerel mesaj yolu (supervisor.py: ingest / compute / bot)
+# - Hub: supervisor sürecinde Unix domain socket sunucusu (AF_UNIX yoksa 127.0.0.1 TCP)
+# - BusClient: her alt süreç bağlanır, konulara abone olur, yayın yapar
+# - Çerçeve: 4 byte uzunluk + pickle(protocol 5) (kind, topic, payload)
+#     ("sub", topic, None) abonelik, ("pub", topic, payload) yayın
+# - Hub yayını gönderen hariç o konuya abone herkese iletir; yavaş alıcının yazma tamponu
+#   HUB_MAX_BUFFER'ı aşarsa o alıcı için mesaj atılır (bot yavaşladı diye ingest beklemez)
+# - İstemci bağlantı koparsa yeniden bağlanır ve aboneliklerini tekrar gönderir
+# - İstek/yanıt: serve(topic, fn) + request(topic, payload) — yanıt istemciye özel "reply.*" konusundan döner
+#   (örn. bot → compute /t raporu)
+# - Güvenlik: çerçeveler pickle → sadece yerel süreçler. Unix soketi 0600; tcp:// yalnızca loopback adres
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import itertools
+import logging
+import os
+import pickle
+import socket
+import struct
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+LOG = logging.getLogger("ipc")
+LOG.addHandler(logging.NullHandler())
+
+_HDR = struct.Struct("!I")
+HUB_MAX_BUFFER = 8 * 1024 * 1024
+
+Handler = Callable[[Any], Optional[Awaitable[None]]]
+
+
+def _encode(kind: str, topic: str, payload: Any) -> bytes:
+    body = pickle.dumps((kind, topic, payload), protocol=5)
+    return _HDR.pack(len(body)) + body
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[str, str, Any]:
+    hdr = await reader.readexactly(_HDR.size)
+    body = await reader.readexactly(_HDR.unpack(hdr)[0])
+    return pickle.loads(body)
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def _tcp_address(address: str) -> Optional[Tuple[str, int]]:
+    """'tcp://127.0.0.1:7788' → (host, port); Unix soket yolu ise None. Loopback dışı adres reddedilir."""
+    if address.startswith("tcp://"):
+        host, port = address[6:].rsplit(":", 1)
+        if not _is_loopback(host):
+            raise ValueError(f"ipc address must be loopback (pickle frames): {address}")
+        return host.strip("[]"), int(port)
+    if not hasattr(socket, "AF_UNIX"):
+        return "127.0.0.1", 7788
+    return None
+
+
+class Hub:
+    """Konu bazlı yönlendirici (supervisor içinde)."""
+
+    def __init__(self, address: str):
+        self.address = address
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subs: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self._conns: Set[asyncio.StreamWriter] = set()
+        self.forwarded = 0
+        self.dropped = 0
+
+    async def start(self) -> None:
+        tcp = _tcp_address(self.address)
+        if tcp is None:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            d = os.path.dirname(self.address)
+            if d:
+                os.makedirs(d, exist_ok=True)
+            self._server = await asyncio.start_unix_server(self._serve, path=self.address)
+            os.chmod(self.address, 0o600)   # sadece aynı kullanıcının süreçleri bağlanabilir
+        else:
+            self._server = await asyncio.start_server(self._serve, host=tcp[0], port=tcp[1])
+        LOG.info("ipc hub listening on %s", self.address)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        topics: List[str] = []
+        self._conns.add(writer)
+        try:
+            while True:
+                kind, topic, payload = await _read_frame(reader)
+                if kind == "sub":
+                    self._subs.setdefault(topic, set()).add(writer)
+                    topics.append(topic)
+                elif kind == "pub":
+                    self._forward(writer, topic, _encode("pub", topic, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception:
+            LOG.exception("ipc hub connection error")
+        finally:
+            self._conns.discard(writer)
+            for t in topics:
+                self._subs.get(t, set()).discard(writer)
+            writer.close()
+
+    def _forward(self, sender: asyncio.StreamWriter, topic: str, frame: bytes) -> None:
+        for w in list(self._subs.get(topic, ())):
+            if w is sender or w.is_closing():
+                continue
+            if w.transport.get_write_buffer_size() > HUB_MAX_BUFFER:
+                self.dropped += 1
+                continue
+            w.write(frame)
+            self.forwarded += 1
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for w in list(self._conns):
+                w.close()   # bağlantı görevleri IncompleteReadError ile kendiliğinden biter
+            await asyncio.sleep(0)
+            await self._server.wait_closed()
+            self._server = None
+        if _tcp_address(self.address) is None and os.path.exists(self.address):
+            os.unlink(self.address)
+
+
+class BusClient:
+    """Alt süreç tarafı: publish(topic, payload) / subscribe(topic, handler)."""
+
+    def __init__(self, address: str, name: str = ""):
+        self.address = address
+        self.name = name
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self._reply_topic = f"reply.{name}.{os.getpid()}"
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._serving: Set[asyncio.Task] = set()
+        self._rid = itertools.count(1)
+        self._handlers[self._reply_topic] = [self._on_reply]
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        tcp = _tcp_address(self.address)
+        if tcp is None:
+            return await asyncio.open_unix_connection(self.address)
+        return await asyncio.open_connection(tcp[0], tcp[1])
+
+    async def start(self, timeout: float = 10.0) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=f"bus:{self.name}")
+        await asyncio.wait_for(self._connected.wait(), timeout)
+
+    async def _run(self) -> None:
+        delay = 0.2
+        while True:
+            try:
+                reader, writer = await self._open()
+            except (OSError, ConnectionError):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+                continue
+            delay = 0.2
+            self._writer = writer
+            for topic in self._handlers:
+                writer.write(_encode("sub", topic, None))
+            self._connected.set()
+            try:
+                while True:
+                    _, topic, payload = await _read_frame(reader)
+                    self.received += 1
+                    await self._dispatch(topic, payload)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                LOG.warning("ipc bus connection lost (%s), reconnecting", self.name)
+            finally:
+                self._connected.clear()
+                self._writer = None
+                writer.close()
+
+    async def _dispatch(self, topic: str, payload: Any) -> None:
+        for h in self._handlers.get(topic, ()):
+            try:
+                res = h(payload)
+                if asyncio.iscoroutine(res):
+                    await res
+            except Exception:
+                LOG.exception("ipc handler error on %s", topic)
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        first = topic not in self._handlers
+        self._handlers.setdefault(topic, []).append(handler)
+        if first and self._writer is not None:
+            self._writer.write(_encode("sub", topic, None))
+
+    # ---------------------------------------------------------
+    # İstek / yanıt
+    # ---------------------------------------------------------
+    def serve(self, topic: str, fn: Callable[[Any], Awaitable[Any]]) -> None:
+        """topic isteklerini fn ile yanıtlar; her istek ayrı task (alma döngüsü beklemez)."""
+        async def call(msg: Dict[str, Any]) -> None:
+            try:
+                reply = {"id": msg["id"], "ok": True, "result": await fn(msg["payload"])}
+            except Exception as e:
+                LOG.exception("ipc serve %s failed", topic)
+                reply = {"id": msg["id"], "ok": False, "error": str(e)}
+            self.publish(msg["reply_to"], reply)
+
+        def spawn(msg: Dict[str, Any]) -> None:
+            task = asyncio.get_running_loop().create_task(call(msg))
+            self._serving.add(task)
+            task.add_done_callback(self._serving.discard)
+
+        self.subscribe(topic, spawn)
+
+    def _on_reply(self, msg: Dict[str, Any]) -> None:
+        fut = self._pending.pop(msg.get("id"), None)
+        if fut is not None and not fut.done():
+            fut.set_result(msg)
+
+    async def request(self, topic: str, payload: Any, timeout: float = 60.0) -> Any:
+        rid = next(self._rid)
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[rid] = fut
+        try:
+            if not self.publish(topic, {"id": rid, "reply_to": self._reply_topic, "payload": payload}):
+                raise ConnectionError("ipc bus not connected")
+            msg = await asyncio.wait_for(fut, timeout)
+        finally:
+            self._pending.pop(rid, None)
+        if not msg.get("ok"):
+            raise RuntimeError(msg.get("error", "remote error"))
+        return msg.get("result")
+
+    def publish(self, topic: str, payload: Any) -> bool:
+        """Bloklamaz; bağlantı yoksa mesaj atılır (False)."""
+        w = self._writer
+        if w is None or w.is_closing():
+            self.dropped += 1
+            return False
+        w.write(_encode("pub", topic, payload))
+        self.sent += 1
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,69 @@
+# utils/kline_pipeline.py
+# WS kline mesajlarının işlenmesi — main.py (tek süreç) ve supervisor.py (ingest / compute / bot) ortak kullanır
+# - mirror_kline: yerel çoklu zaman dilimi barları (RESAMPLERS) + kapanan her zaman diliminde Kalman durumu; O(1)
+# - on_close: kapanan barda çağrılacak dinleyiciler (örn. /io snapshot servisinin erken yenilemesi)
+# - process_kline: mirror_kline + kapanan barda strateji → signal_handler.publish_signal
+
+import logging
+from typing import Any, Callable, Dict, List
+
+from utils import ta_utils
+from utils.config import CONFIG
+from utils.resampler import RESAMPLERS
+
+LOG = logging.getLogger("kline_pipeline")
+LOG.addHandler(logging.NullHandler())
+
+_CLOSE_LISTENERS: List[Callable[[], None]] = []
+
+
+def build_stream_list(symbols, interval):
+    return [f"{s.lower()}@kline_{interval}" for s in symbols] + [f"{s.lower()}@ticker" for s in symbols]
+
+
+def on_close(fn: Callable[[], None]) -> None:
+    """Kapanan bar dinleyicisi (senkron, hafif olmalı); aynı fonksiyon iki kez eklenmez."""
+    if fn not in _CLOSE_LISTENERS:
+        _CLOSE_LISTENERS.append(fn)
+
+
+def mirror_kline(data: Dict[str, Any]) -> bool:
+    """Döndürür: bar kapandı mı."""
+    k = data.get("k", {})
+    # Üst zaman dilimleri (5m/15m/1h/4h/1d) aynı akıştan türetilir; açık bar da kısmi bar için işlenir
+    symbol = data.get("s")
+    closed_tfs = RESAMPLERS.update_kline(symbol, k)
+    # Sadece kapanan mumlar
+    if not k.get("x"):
+        return False
+    # Kalıcı Kalman durumu (alpha_ta ısıttıysa): taban bar + bu barla kapanan üst zaman dilimleri
+    ta_utils.update_kalman_state(symbol, k.get("i", CONFIG.BINANCE.STREAM_INTERVAL), float(k["c"]), int(k["t"]))
+    r = RESAMPLERS.get(symbol) if closed_tfs else None
+    for tf in closed_tfs:
+        ring = r.rings[tf]
+        ta_utils.update_kalman_state(symbol, tf, ring.last("close"), ring.last_time)
+    for fn in _CLOSE_LISTENERS:
+        try:
+            fn()
+        except Exception:
+            LOG.exception("kline close listener failed")
+    return True
+
+
+async def process_kline(data: Dict[str, Any], strategies: Dict[str, Any]) -> None:
+    from handlers import signal_handler
+    if not mirror_kline(data):
+        return
+    k = data["k"]
+    symbol = data.get("s")
+    strat = strategies.get(symbol)
+    if strat:
+        sig = strat.on_new_close(float(k["c"]), k.get("t"))
+        if sig:
+            await signal_handler.publish_signal(
+                "rsi_macd",
+                symbol,
+                sig["type"],
+                strength=sig["strength"],
+                payload=sig["payload"],
+            )
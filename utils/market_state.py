@@ -0,0 +1,180 @@
+# utils/market_state.py
+# OrderManager'ın emir öncesi ihtiyaç duyduğu piyasa/hesap durumu — karar anında REST çağrısı yok
+# - PriceBook: WS ticker / bookTicker mesajlarından son fiyat + en iyi bid/ask (O(1) güncelleme)
+#     main.py bridge → handlers/ticker_handler, supervisor compute → bus "ticker"
+# - SymbolFilters: exchangeInfo'dan önceden hesaplanmış sembol tablosu (stepSize, tickSize, minQty, minNotional)
+#     round_qty / round_price tamsayı adım aritmetiği ile (float artığı yok)
+# - AccountSnapshot: bakiye önbelleği; arka planda periyodik uzlaştırma (reconcile), emirden sonra
+#     invalidate() ile erken yenileme — karar yolu sadece önbellekten okur
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Dict, Optional, Tuple
+
+LOG = logging.getLogger("market_state")
+LOG.addHandler(logging.NullHandler())
+
+
+class PriceBook:
+    __slots__ = ("_px",)
+
+    def __init__(self):
+        self._px: Dict[str, Tuple[float, float, float, float]] = {}   # symbol → (last, bid, ask, monotonic ts)
+
+    def update(self, data: Dict[str, Any]) -> None:
+        """24hr ticker ({"s","c","b","a"}) veya bookTicker ({"s","b","a"}) payload'ı."""
+        symbol = data.get("s") or data.get("symbol")
+        if not symbol:
+            return
+        try:
+            bid = float(data.get("b") or 0.0)
+            ask = float(data.get("a") or 0.0)
+            last = float(data.get("c") or data.get("lastPrice") or 0.0)
+        except (TypeError, ValueError):
+            return
+        if not last:
+            if not (bid > 0 and ask > 0):
+                return   # fiyat alanı yok (örn. funding mesajı): zaman damgası yenilenmez
+            last = (bid + ask) / 2
+        if last <= 0:
+            return
+        self._px[symbol] = (last, bid, ask, time.monotonic())
+
+    def set(self, symbol: str, price: float) -> None:
+        self._px[symbol] = (float(price), 0.0, 0.0, time.monotonic())
+
+    def get(self, symbol: str, max_age: Optional[float] = None, side: Optional[str] = None) -> Optional[float]:
+        """side verilirse karşı taraf (BUY → ask, SELL → bid), yoksa son fiyat; max_age'den eskiyse None."""
+        e = self._px.get(symbol)
+        if e is None or (max_age is not None and time.monotonic() - e[3] > max_age):
+            return None
+        if side == "BUY" and e[2] > 0:
+            return e[2]
+        if side == "SELL" and e[1] > 0:
+            return e[1]
+        return e[0]
+
+    def age(self, symbol: str) -> Optional[float]:
+        e = self._px.get(symbol)
+        return None if e is None else time.monotonic() - e[3]
+
+
+class SymbolFilter:
+    __slots__ = ("step", "tick", "min_qty", "min_notional", "_qd", "_pd")
+
+    def __init__(self, step: float = 0.0, tick: float = 0.0, min_qty: float = 0.0, min_notional: float = 0.0):
+        self.step = step
+        self.tick = tick
+        self.min_qty = min_qty
+        self.min_notional = min_notional
+        self._qd = _decimals(step)
+        self._pd = _decimals(tick)
+
+    def round_qty(self, qty: float) -> float:
+        """Aşağı yuvarlar (stepSize katı)."""
+        if self.step <= 0:
+            return qty
+        return round(math.floor(qty / self.step + 1e-9) * self.step, self._qd)
+
+    def round_price(self, price: float) -> float:
+        if self.tick <= 0:
+            return price
+        return round(round(price / self.tick) * self.tick, self._pd)
+
+    def check(self, qty: float, price: float) -> Optional[str]:
+        """Geçersizse hata kodu, değilse None."""
+        if qty <= 0 or qty < self.min_qty:
+            return "min_qty"
+        if self.min_notional and qty * price < self.min_notional:
+            return "min_notional"
+        return None
+
+
+def _decimals(step: float) -> int:
+    if step <= 0:
+        return 8
+    return max(0, int(round(-math.log10(step)))) if step < 1 else 0
+
+
+_PASS = SymbolFilter()
+
+
+class SymbolFilters:
+    """exchangeInfo → sembol başına SymbolFilter (spot ve USDⓈ-M futures formatları)."""
+
+    def __init__(self):
+        self._table: Dict[str, SymbolFilter] = {}
+        self.loaded_at = 0.0
+
+    def load(self, info: Dict[str, Any]) -> int:
+        table: Dict[str, SymbolFilter] = {}
+        for s in (info or {}).get("symbols", []):
+            f = {x.get("filterType"): x for x in s.get("filters", [])}
+            lot = f.get("MARKET_LOT_SIZE") or f.get("LOT_SIZE") or {}
+            if not float(lot.get("stepSize", 0) or 0):
+                lot = f.get("LOT_SIZE") or {}
+            notional = f.get("MIN_NOTIONAL") or f.get("NOTIONAL") or {}
+            table[s["symbol"]] = SymbolFilter(
+                step=float(lot.get("stepSize", 0) or 0),
+                tick=float((f.get("PRICE_FILTER") or {}).get("tickSize", 0) or 0),
+                min_qty=float(lot.get("minQty", 0) or 0),
+                min_notional=float(notional.get("notional") or notional.get("minNotional") or 0),
+            )
+        self._table = table
+        self.loaded_at = time.time()
+        return len(table)
+
+    def get(self, symbol: str) -> SymbolFilter:
+        """Bilinmeyen sembol için yuvarlamasız geçiş filtresi."""
+        return self._table.get(symbol, _PASS)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+class AccountSnapshot:
+    """
+    Bakiye önbelleği. fetch: async () → {"totalWalletBalance": ...}.
+    max_age=0 → her çağrıda yenile (backtest: SimBroker bellek içi).
+    """
+
+    def __init__(self, fetch, max_age: float = 30.0):
+        self._fetch = fetch
+        self.max_age = float(max_age)
+        self.balance_usdt: Optional[float] = None
+        self.raw: Dict[str, Any] = {}
+        self.updated = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> Optional[float]:
+        async with self._lock:
+            try:
+                acc = await self._fetch()
+            except Exception as e:
+                LOG.warning("account refresh failed: %s", e)
+                return self.balance_usdt
+            self.raw = acc or {}
+            self.balance_usdt = float(self.raw.get("totalWalletBalance", 0) or 0)
+            self.updated = time.monotonic()
+            return self.balance_usdt
+
+    async def balance(self) -> Optional[float]:
+        if self.balance_usdt is None or time.monotonic() - self.updated >= self.max_age:
+            return await self.refresh()
+        return self.balance_usdt
+
+    def invalidate(self) -> None:
+        """Emir sonrası: bir sonraki kararı bekletmeden arka planda uzlaştır."""
+        if self._refresh_task is None or self._refresh_task.done():
+            try:
+                self._refresh_task = asyncio.get_running_loop().create_task(self.refresh())
+            except RuntimeError:
+                self.updated = 0.0
+
+
+PRICES = PriceBook()
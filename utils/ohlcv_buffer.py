@@ -0,0 +1,142 @@
+# utils/ohlcv_buffer.py
+# Sembol başına kompakt OHLCV halka tamponu (ring buffer)
+# - Önceden ayrılmış numpy dizileri: fiyat/hacim float64 (opsiyonel float32), zaman int64
+# - O(1) append; aynı open_time tekrar gelirse son bar yerinde güncellenir (WS tekrarları / kısmi bar)
+# - Çift yazım (i ve i+capacity) sayesinde son n bar her zaman bitişik:
+#   view()/frame() kopyasız (zero-copy) pencere döner; ta_utils fonksiyonları frame()'i doğrudan kabul eder
+# - Görünümler bir sonraki append'e kadar geçerlidir; saklanacaksa .copy() alın
+
+from __future__ import annotations
+
+from typing import Any, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("open", "high", "low", "close", "volume")
+_FIELD_IDX = {f: i for i, f in enumerate(FIELDS)}
+
+
+class OHLCVRing:
+    __slots__ = ("capacity", "dtype", "_px", "_t", "_head", "_size")
+
+    def __init__(self, capacity: int = 500, dtype: Any = np.float64):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._px = np.zeros((len(FIELDS), 2 * self.capacity), dtype=self.dtype)
+        self._t = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._head = 0   # bir sonraki yazma pozisyonu
+        self._size = 0
+
+    # ---------------------------------------------------------
+    # Yazma
+    # ---------------------------------------------------------
+    def append(self, open_time: int, o: float, h: float, l: float, c: float, v: float = 0.0) -> None:
+        """Yeni bar ekler; open_time son barla aynıysa son barı günceller."""
+        if self._size and int(open_time) == self.last_time:
+            idx = (self._head - 1) % self.capacity
+        else:
+            idx = self._head
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+        j = idx + self.capacity
+        row = (o, h, l, c, v)
+        self._px[:, idx] = row
+        self._px[:, j] = row
+        self._t[idx] = self._t[j] = int(open_time)
+
+    def append_close(self, close: float, open_time: Optional[int] = None) -> None:
+        """Sadece kapanış fiyatı olan akışlar için (o=h=l=c, v=0)."""
+        if open_time is None:
+            open_time = self.last_time + 1 if self._size else 0
+        self.append(open_time, close, close, close, close, 0.0)
+
+    def append_kline(self, k: Any) -> None:
+        """Binance WS kline dict'i ("k" alanı) veya REST kline listesi."""
+        if isinstance(k, dict):
+            self.append(int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"]))
+        else:
+            self.append(int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]))
+
+    def extend_klines(self, klines: Sequence[Sequence[Any]]) -> None:
+        """REST /klines listesini toplu yükler (vektörel parse)."""
+        if not len(klines):
+            return
+        klines = klines[-self.capacity:]
+        arr = np.array([k[1:6] for k in klines], dtype=float)
+        times = np.array([k[0] for k in klines], dtype=np.int64)
+        start = 0
+        if self._size and int(times[0]) == self.last_time:
+            self.append(int(times[0]), *arr[0])
+            start = 1
+        n = len(times) - start
+        if n <= 0:
+            return
+        idx = (self._head + np.arange(n)) % self.capacity
+        self._px[:, idx] = arr[start:].T
+        self._px[:, idx + self.capacity] = arr[start:].T
+        self._t[idx] = times[start:]
+        self._t[idx + self.capacity] = times[start:]
+        self._head = (self._head + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    @classmethod
+    def from_klines(cls, klines: Sequence[Sequence[Any]], capacity: Optional[int] = None,
+                    dtype: Any = np.float64) -> "OHLCVRing":
+        ring = cls(capacity or max(len(klines), 1), dtype=dtype)
+        ring.extend_klines(klines)
+        return ring
+
+    # ---------------------------------------------------------
+    # Okuma (kopyasız)
+    # ---------------------------------------------------------
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_time(self) -> int:
+        return int(self._t[(self._head - 1) % self.capacity]) if self._size else -1
+
+    def _span(self, n: Optional[int]) -> slice:
+        n = self._size if n is None else max(0, min(int(n), self._size))
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    def view(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """Son n değerin bitişik görünümü (eskiden yeniye)."""
+        if field in ("time", "open_time"):
+            return self._t[self._span(n)]
+        return self._px[_FIELD_IDX[field], self._span(n)]
+
+    def times(self, n: Optional[int] = None) -> np.ndarray:
+        return self.view("time", n)
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.view("close")
+
+    def last(self, field: str = "close") -> Optional[float]:
+        if not self._size:
+            return None
+        return float(self._px[_FIELD_IDX[field], (self._head - 1) % self.capacity])
+
+    def frame(self, n: Optional[int] = None, columns: Optional[Iterable[str]] = None,
+              with_time: bool = True) -> pd.DataFrame:
+        """
+        ta_utils'e verilebilecek DataFrame. Fiyat kolonları tampona kopyasız bağlıdır.
+        columns: sadece istenen OHLCV kolonları (varsayılan hepsi).
+        """
+        sl = self._span(n)
+        cols: List[str] = list(columns) if columns is not None else list(FIELDS)
+        if cols == list(FIELDS):
+            df = pd.DataFrame(self._px[:, sl].T, columns=cols, copy=False)
+        else:
+            df = pd.DataFrame({c: self._px[_FIELD_IDX[c], sl] for c in cols}, copy=False)
+        if with_time:
+            df.insert(0, "open_time", self._t[sl])
+        return df
+
+    def nbytes(self) -> int:
+        return int(self._px.nbytes + self._t.nbytes)
@@ -1,34 +1,89 @@
 # utils/order_manager.py
+# - Fiyat: WS ticker/bookTicker durumu (market_state.PRICES); yoksa/bayatsa api.get_price (REST / SimBroker)
+# - Bakiye: AccountSnapshot önbelleği, start() ile arka planda periyodik uzlaştırma; paper modda paper equity
+#   (PAPER_BALANCE + paper motorunun gerçekleşen PnL − ücret)
+# - Miktar: exchangeInfo'dan önceden hesaplanmış stepSize/tickSize/minNotional tablosu (SymbolFilters)
+# - Paper mod: emirler paper_engine.PAPER'da yerel emir defterine karşı dolar (kayma, ücret, kısmi dolum)
+# → karar → emir gecikmesini tek emir isteği belirler
 import os
 import logging
 from typing import Optional, Dict, Any
-from . import binance_api, db
+from .binance_api import OrderStatusUnknown, get_binance_api
+from .config import CONFIG
+from .market_state import PRICES, AccountSnapshot, PriceBook, SymbolFilters
+from .paper_engine import PAPER, PaperExchange
 import asyncio
-import math
+import time
 
 LOG = logging.getLogger("order_manager")
 LOG.addHandler(logging.NullHandler())
 
 PAPER_MODE = os.getenv("PAPER_MODE", "true").lower() in ("1","true","yes")
 
+_FILTERS_TTL = 3600   # exchangeInfo yenileme (sn)
+
 class OrderManager:
-    def __init__(self, api_module=binance_api, risk_per_trade: float = 0.01, leverage: int = 1, paper_mode: Optional[bool] = None):
-        self.api = api_module
+    def __init__(self, api_module=None, risk_per_trade: float = 0.01, leverage: int = 1, paper_mode: Optional[bool] = None,
+                 prices: Optional[PriceBook] = PRICES, account_max_age: Optional[float] = None,
+                 paper: PaperExchange = PAPER):
+        self.api = api_module if api_module is not None else get_binance_api()
         self.risk_per_trade = risk_per_trade
         self.leverage = leverage
         self.paper_mode = PAPER_MODE if paper_mode is None else paper_mode
-        self._exchange_info = None
+        self.prices = prices
+        self.paper = paper
+        self.filters = SymbolFilters()
+        self.account = AccountSnapshot(
+            self.api.get_futures_account,
+            CONFIG.BOT.ACCOUNT_REFRESH_SEC if account_max_age is None else account_max_age,
+        )
+        self._reconcile_task: Optional[asyncio.Task] = None
 
     async def init_exchange_info(self):
-        if self._exchange_info is None:
-            self._exchange_info = await self.api.exchange_info()
+        if self.filters.loaded_at and time.time() - self.filters.loaded_at < _FILTERS_TTL:
+            return
+        try:
+            n = self.filters.load(await self.api.exchange_info())
+            LOG.info("symbol filters loaded: %d", n)
+        except Exception as e:
+            LOG.warning("exchange_info failed: %s", e)
+
+    async def start(self):
+        """Filtre tablosunu yükler, bakiye uzlaştırma döngüsünü başlatır."""
+        await self.init_exchange_info()
+        if self.paper_mode:
+            self.paper.start()   # bekleyen paper limit emirleri için defter yenileme
+        elif self._reconcile_task is None:
+            self._reconcile_task = asyncio.get_running_loop().create_task(self._reconcile_loop(),
+                                                                          name="account_reconcile")
+
+    def stop(self):
+        if self.paper_mode:
+            self.paper.stop()
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            self._reconcile_task = None
+
+    async def _reconcile_loop(self):
+        while True:
+            await self.account.refresh()
+            await self.init_exchange_info()
+            await asyncio.sleep(max(1.0, self.account.max_age / 2))
 
     async def get_futures_balance(self) -> Optional[float]:
+        if self.paper_mode:
+            return CONFIG.BOT.PAPER_BALANCE + self.paper.realized_pnl()
+        return await self.account.balance()
+
+    async def get_price(self, symbol: str, side: Optional[str] = None) -> Optional[float]:
+        if self.prices is not None:
+            px = self.prices.get(symbol, max_age=CONFIG.BOT.PRICE_MAX_AGE, side=side)
+            if px is not None:
+                return px
         try:
-            acc = await self.api.get_futures_account()
-            return float(acc.get("totalWalletBalance", 0))
+            return await self.api.get_price(symbol)
         except Exception as e:
-            LOG.warning("get_futures_balance failed: %s", e)
+            LOG.warning("get_price %s failed: %s", symbol, e)
             return None
 
     async def calc_futures_qty(self, balance_usdt: float, entry_price: float, risk_pct: Optional[float] = None, leverage: Optional[int] = None) -> float:
@@ -40,12 +95,16 @@ class OrderManager:
         qty = notional / entry_price
         return float(qty)
 
-    async def place_futures_market(self, symbol: str, side: str, qty: float, extra: dict = None):
+    async def place_futures_market(self, symbol: str, side: str, qty: float, extra: dict = None,
+                                   ref_price: Optional[float] = None):
         LOG.info("place_futures_market %s %s %s", symbol, side, qty)
         if self.paper_mode:
-            db.log_paper_trade(symbol, side, qty, None, source="signal")
-            return {"paper": True, "symbol": symbol, "side": side, "qty": qty}
-        return await self.api.create_futures_order(symbol, side, "MARKET", quantity=qty, extra=extra)
+            # dolum fiyatı defterden (yoksa ref_price); paper_trades kaydını PAPER.on_fill yazar
+            fill = await self.paper.market(symbol, side, qty, ref_price=ref_price, tag="signal")
+            return dict(fill, paper=True, qty=qty)
+        result = await self.api.create_futures_order(symbol, side, "MARKET", quantity=qty, extra=extra)
+        self.account.invalidate()
+        return result
 
     async def process_decision(self, decision: Dict[str, Any]):
         symbol = decision.get("symbol")
@@ -55,16 +114,29 @@ class OrderManager:
         if dec == "HOLD":
             LOG.info("Decision HOLD for %s: %s", symbol, reason)
             return {"ok": True, "note": "HOLD"}
+        if not self.filters.loaded_at:
+            await self.init_exchange_info()
         balance = await self.get_futures_balance()
         if balance is None:
             LOG.warning("Cannot read futures balance; aborting decision")
             return {"ok": False, "error": "no_balance"}
         base_risk = self.risk_per_trade
         scaled_risk = min(0.5, base_risk * (0.5 + strength))
-        price = await self.api.get_price(symbol)
+        price = await self.get_price(symbol, side=dec)
         if price is None:
             return {"ok": False, "error": "no_price"}
-        qty = await self.calc_futures_qty(balance, price, risk_pct=scaled_risk)
-        result = await self.place_futures_market(symbol, dec, qty)
+        flt = self.filters.get(symbol)
+        qty = flt.round_qty(await self.calc_futures_qty(balance, price, risk_pct=scaled_risk))
+        err = flt.check(qty, price)
+        if err:
+            LOG.info("Decision %s %s skipped: %s (qty=%s price=%s)", dec, symbol, err, qty, price)
+            return {"ok": False, "error": err}
+        try:
+            result = await self.place_futures_market(symbol, dec, qty, ref_price=price)
+        except OrderStatusUnknown as e:
+            # emir borsada olabilir: yeniden gönderme; bakiye/pozisyon uzlaştırması çözer
+            LOG.error("Decision %s %s: %s", dec, symbol, e)
+            self.account.invalidate()
+            return {"ok": False, "error": "order_unknown", "clientOrderId": e.client_order_id}
         LOG.info("Executed %s %s qty=%s result=%s", dec, symbol, qty, result)
         return {"ok": True, "result": result}
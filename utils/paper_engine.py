@@ -0,0 +1,529 @@
+# utils/paper_engine.py
+# Paper trading eşleştirme motoru — emirler yerel emir defterine (canlı perp REST depth veya replay) karşı dolar
+# - Market: karşı taraf seviyeleri yürünür (kayma), defter derinliği yetmezse kısmi dolum, kalan iptal (IOC);
+#   tüketilen likidite bir sonraki defter güncellemesine kadar yerel defterden düşülür
+# - Limit: fiyatı karşı tarafı kesiyorsa önce taker olarak dolar, kalanı defterde bekler; kuyruk pozisyonu =
+#   girişte aynı fiyattaki seviye miktarı. on_trade (aynı fiyatta işlem) kuyruğu ilerletir, fiyatın içinden
+#   geçen işlem / karşı tarafın fiyatı kesmesi (update_book) maker olarak doldurur; seviye küçülürse kuyruk da kısalır
+# - Ücret: taker / maker (CONFIG.BOT.PAPER_TAKER_FEE / PAPER_MAKER_FEE), notional üzerinden
+# - Durum sıkışık numpy dizilerinde (struct-of-arrays): emir başına ~75 byte, eşleştirme sembol maskesiyle vektörel;
+#   kapasite dolunca biten emirler atılır (compact), gerekirse diziler iki katına büyür
+# - Pozisyon: sembol başına net miktar, ortalama giriş, gerçekleşen PnL, ücret
+# - Dolumlar on_fill ile bildirilir; PAPER (global) db.log_paper_trade'e gerçek dolum fiyatı ve dolumun
+#   gerçekleşen PnL'i (kapanan kısım − ücret) ile yazar → RiskManager günlük zararı buradan toplar
+#
+# Kullanım:
+#   fill = await PAPER.market("BTCUSDT", "BUY", 0.01)                 # defter bayatsa futures REST depth çekilir
+#   oid = PAPER.submit_limit("BTCUSDT", "SELL", 0.01, 65000.0)["id"]
+#   PAPER.update_book("BTCUSDT", bids, asks); PAPER.on_trade("BTCUSDT", 65000.0, 0.5)
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.config import CONFIG
+
+LOG = logging.getLogger("paper_engine")
+LOG.addHandler(logging.NullHandler())
+
+NEW, PARTIALLY_FILLED, FILLED, CANCELED = 0, 1, 2, 3
+STATUS = ("NEW", "PARTIALLY_FILLED", "FILLED", "CANCELED")
+MARKET, LIMIT = 0, 1
+
+_EMPTY = np.empty((0, 2), dtype=np.float64)
+_EPS = 1e-12
+
+FillCallback = Callable[[str, str, float, float, float, str, float], None]   # symbol, side, qty, price, fee, tag, pnl
+
+
+def _levels(rows: Sequence[Sequence[Any]], descending: bool) -> np.ndarray:
+    if rows is None or len(rows) == 0:
+        return _EMPTY
+    a = np.asarray(rows, dtype=np.float64)[:, :2]
+    a = a[a[:, 1] > 0]
+    order = np.argsort(-a[:, 0] if descending else a[:, 0], kind="stable")
+    return a[order]
+
+
+class _Book:
+    __slots__ = ("bids", "asks", "ts")
+
+    def __init__(self):
+        self.bids = _EMPTY   # (price, qty), fiyat azalan
+        self.asks = _EMPTY   # (price, qty), fiyat artan
+        self.ts = 0.0
+
+
+def _walk(levels: np.ndarray, qty: float, limit: Optional[float], buy: bool):
+    """Seviyeleri yürür → (take dizisi, dolan miktar, notional); limit varsa sadece limit içindeki seviyeler."""
+    if not len(levels):
+        return None, 0.0, 0.0
+    p = levels[:, 0]
+    if limit is not None:
+        k = int(np.searchsorted(p, limit, side="right")) if buy else int(np.searchsorted(-p, -limit, side="right"))
+        p = p[:k]
+    q = levels[:len(p), 1]
+    cum = np.cumsum(q)
+    take = np.clip(qty - (cum - q), 0.0, q)
+    filled = float(take.sum())
+    return take, filled, float(take @ p)
+
+
+def _level_qty_at(levels: np.ndarray, prices: np.ndarray, descending: bool) -> np.ndarray:
+    """Her fiyat için defterdeki tam o seviyenin miktarı (yoksa 0) — tek searchsorted."""
+    out = np.zeros(len(prices))
+    if not len(levels) or not len(prices):
+        return out
+    p = levels[:, 0]
+    tol = _EPS * np.maximum(1.0, prices)
+    if descending:
+        idx = np.searchsorted(-p, -(prices + tol), side="left")
+    else:
+        idx = np.searchsorted(p, prices - tol, side="left")
+    j = np.minimum(idx, len(p) - 1)
+    hit = (idx < len(p)) & (np.abs(p[j] - prices) <= tol)
+    out[hit] = levels[j[hit], 1]
+    return out
+
+
+def _depth_within(levels: np.ndarray, prices: np.ndarray, buy: bool) -> np.ndarray:
+    """Her limit fiyatı için kesen karşı taraf likiditesi: alış → ask ≤ fiyat, satış → bid ≥ fiyat toplamı."""
+    if not len(levels) or not len(prices):
+        return np.zeros(len(prices))
+    p = levels[:, 0]
+    k = np.searchsorted(p, prices, side="right") if buy else np.searchsorted(-p, -prices, side="right")
+    cum = np.concatenate(([0.0], np.cumsum(levels[:, 1])))
+    return cum[k]
+
+
+class PaperExchange:
+    def __init__(self, api=None, taker_fee: Optional[float] = None, maker_fee: Optional[float] = None,
+                 book_max_age: Optional[float] = None, depth: Optional[int] = None,
+                 on_fill: Optional[FillCallback] = None, capacity: int = 1024):
+        self._api = api
+        self.taker_fee = CONFIG.BOT.PAPER_TAKER_FEE if taker_fee is None else float(taker_fee)
+        self.maker_fee = CONFIG.BOT.PAPER_MAKER_FEE if maker_fee is None else float(maker_fee)
+        self.book_max_age = CONFIG.BOT.PAPER_BOOK_MAX_AGE if book_max_age is None else float(book_max_age)
+        self.depth = int(depth or CONFIG.BOT.PAPER_BOOK_DEPTH)
+        self.on_fill = on_fill
+        self.books: Dict[str, _Book] = {}
+        # semboller / etiketler (int indeks)
+        self._sym_idx: Dict[str, int] = {}
+        self._syms: List[str] = []
+        self._tag_idx: Dict[str, int] = {}
+        self._tags: List[str] = []
+        # emirler (struct-of-arrays)
+        self._n = 0
+        self._next_id = 1
+        self._alloc(max(16, int(capacity)))
+        # pozisyonlar (sembol indeksine göre)
+        self.pos = np.zeros(8)
+        self.avg = np.zeros(8)
+        self.realized = np.zeros(8)
+        self.fees = np.zeros(8)
+        self.fills = 0
+        self._poll_task: Optional[asyncio.Task] = None
+
+    # ---------------------------------------------------------
+    # Depolama
+    # ---------------------------------------------------------
+    def _alloc(self, cap: int) -> None:
+        old = self._n
+        def grow(name: str, dtype) -> None:
+            a = np.zeros(cap, dtype=dtype)
+            if old:
+                a[:old] = getattr(self, name)[:old]
+            setattr(self, name, a)
+        grow("oid", np.int64)
+        grow("sym", np.int32)
+        grow("tag", np.int16)
+        grow("side", np.int8)        # +1 BUY, -1 SELL
+        grow("otype", np.int8)       # MARKET / LIMIT
+        grow("status", np.int8)
+        grow("price", np.float64)    # limit fiyatı (market: 0)
+        grow("qty", np.float64)
+        grow("filled", np.float64)
+        grow("notional", np.float64) # Σ dolum miktarı × fiyat → ortalama fiyat
+        grow("fee", np.float64)
+        grow("ahead", np.float64)    # kuyrukta önümüzdeki miktar (limit)
+        grow("ts", np.float64)
+
+    def _new_row(self) -> int:
+        if self._n == len(self.oid):
+            self.compact()
+            if self._n > len(self.oid) // 2:
+                self._alloc(len(self.oid) * 2)
+        i = self._n
+        self._n += 1
+        return i
+
+    def compact(self) -> int:
+        """Biten (FILLED/CANCELED) emirleri atar; döndürür: kalan emir sayısı."""
+        n = self._n
+        keep = np.flatnonzero(self.status[:n] < FILLED)
+        if len(keep) == n:
+            return n
+        for name in ("oid", "sym", "tag", "side", "otype", "status", "price", "qty", "filled",
+                     "notional", "fee", "ahead", "ts"):
+            a = getattr(self, name)
+            a[:len(keep)] = a[keep]
+        self._n = len(keep)
+        return self._n
+
+    def _row(self, order_id: int) -> Optional[int]:
+        i = int(np.searchsorted(self.oid[:self._n], order_id))   # oid artan, compact sırayı korur
+        return i if i < self._n and self.oid[i] == order_id else None
+
+    def _sym(self, symbol: str) -> int:
+        i = self._sym_idx.get(symbol)
+        if i is None:
+            i = self._sym_idx[symbol] = len(self._syms)
+            self._syms.append(symbol)
+            if i >= len(self.pos):
+                for name in ("pos", "avg", "realized", "fees"):
+                    a = getattr(self, name)
+                    setattr(self, name, np.concatenate([a, np.zeros(len(a))]))
+        return i
+
+    def _tag(self, tag: str) -> int:
+        i = self._tag_idx.get(tag)
+        if i is None:
+            i = self._tag_idx[tag] = len(self._tags)
+            self._tags.append(tag)
+        return i
+
+    # ---------------------------------------------------------
+    # Emir defteri
+    # ---------------------------------------------------------
+    def update_book(self, symbol: str, bids: Sequence[Sequence[Any]], asks: Sequence[Sequence[Any]],
+                    ts: Optional[float] = None) -> None:
+        """Tam defter görüntüsü (REST depth / WS partial depth / replay) → bekleyen limitler eşleştirilir."""
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = _Book()
+        book.bids = _levels(bids, descending=True)
+        book.asks = _levels(asks, descending=False)
+        book.ts = time.time() if ts is None else float(ts)
+        self._match_resting(symbol)
+
+    def book_age(self, symbol: str) -> Optional[float]:
+        book = self.books.get(symbol)
+        return None if book is None or not book.ts else time.time() - book.ts
+
+    async def ensure_book(self, symbol: str) -> None:
+        age = self.book_age(symbol)
+        if age is not None and age <= self.book_max_age:
+            return
+        if self._api is None:
+            from utils.binance_api import get_binance_api
+            self._api = get_binance_api()
+        try:
+            ob = await self._api.get_futures_order_book(symbol, limit=self.depth)   # perp defteri (spot değil)
+        except Exception as e:
+            LOG.warning("paper order book %s failed: %s", symbol, e)
+            return
+        self.update_book(symbol, ob.get("bids", []), ob.get("asks", []))
+
+    @staticmethod
+    def _consume(levels: np.ndarray, take: np.ndarray) -> np.ndarray:
+        if take is None or not len(take):
+            return levels
+        levels = levels.copy()
+        levels[:len(take), 1] -= take
+        return levels[levels[:, 1] > _EPS]
+
+    # ---------------------------------------------------------
+    # Dolum / pozisyon
+    # ---------------------------------------------------------
+    def _fill(self, i: int, qty: float, px: float, maker: bool) -> None:
+        # _walk'ın cumsum artığı emri aşmasın (executedQty > origQty olmaz)
+        qty = min(float(qty), float(self.qty[i] - self.filled[i]))
+        if qty <= _EPS:
+            return
+        fee = qty * px * (self.maker_fee if maker else self.taker_fee)
+        self.filled[i] += qty
+        self.notional[i] += qty * px
+        self.fee[i] += fee
+        if self.filled[i] >= self.qty[i] - _EPS:
+            self.filled[i] = self.qty[i]
+            self.status[i] = FILLED
+        else:
+            self.status[i] = PARTIALLY_FILLED
+        s = int(self.sym[i])
+        side = int(self.side[i])
+        pos = self.pos[s]
+        signed = side * qty
+        pnl = -fee
+        if pos == 0 or pos * signed > 0:
+            self.avg[s] = (self.avg[s] * abs(pos) + px * qty) / (abs(pos) + qty)
+        else:
+            close = min(qty, abs(pos))
+            gain = close * (px - self.avg[s]) * (1.0 if pos > 0 else -1.0)
+            self.realized[s] += gain
+            pnl += gain
+            if qty > abs(pos) + _EPS:
+                self.avg[s] = px   # yön değişti: kalan miktar yeni giriş
+            elif abs(pos + signed) <= _EPS:
+                self.avg[s] = 0.0
+        self.pos[s] = pos + signed
+        self.fees[s] += fee
+        self.fills += 1
+        if self.on_fill is not None:
+            try:
+                self.on_fill(self._syms[s], "BUY" if side > 0 else "SELL", qty, px, fee,
+                             self._tags[int(self.tag[i])], float(pnl))
+            except Exception:
+                LOG.exception("paper on_fill failed")
+
+    def _take(self, i: int, book: Optional[_Book], limit: Optional[float]) -> None:
+        """Emri karşı taraf likiditesine karşı taker olarak doldurur (tek dolum, yürünen seviyelerin VWAP'ı)."""
+        if book is None:
+            return
+        buy = self.side[i] > 0
+        levels = book.asks if buy else book.bids
+        take, filled, notional = _walk(levels, self.qty[i] - self.filled[i], limit, buy)
+        if filled <= _EPS:
+            return
+        self._fill(i, filled, notional / filled, maker=False)
+        if buy:
+            book.asks = self._consume(book.asks, take)
+        else:
+            book.bids = self._consume(book.bids, take)
+
+    # ---------------------------------------------------------
+    # Emirler
+    # ---------------------------------------------------------
+    def _open(self, symbol: str, side: str, qty: float, otype: int, price: float, tag: str) -> int:
+        i = self._new_row()
+        self.oid[i] = self._next_id
+        self._next_id += 1
+        self.sym[i] = self._sym(symbol)
+        self.tag[i] = self._tag(tag)
+        self.side[i] = 1 if side.upper() == "BUY" else -1
+        self.otype[i] = otype
+        self.status[i] = NEW
+        self.price[i] = price
+        self.qty[i] = float(qty)
+        self.filled[i] = self.notional[i] = self.fee[i] = self.ahead[i] = 0.0
+        self.ts[i] = time.time()
+        return i
+
+    def submit_market(self, symbol: str, side: str, qty: float, ref_price: Optional[float] = None,
+                      tag: str = "paper") -> Dict[str, Any]:
+        """
+        Defter yoksa ref_price verildiyse tamamı o fiyattan (taker) dolar; derinlik yetmezse kalan iptal.
+        """
+        i = self._open(symbol, side, qty, MARKET, 0.0, tag)
+        book = self.books.get(symbol)
+        if book is not None and (len(book.asks) if self.side[i] > 0 else len(book.bids)):
+            self._take(i, book, None)
+        elif ref_price:
+            self._fill(i, float(qty), float(ref_price), maker=False)
+        if self.status[i] != FILLED:
+            self.status[i] = CANCELED   # IOC: kalan miktar defterde beklemez
+        return self._report(i)
+
+    def submit_limit(self, symbol: str, side: str, qty: float, price: float, tag: str = "paper") -> Dict[str, Any]:
+        i = self._open(symbol, side, qty, LIMIT, float(price), tag)
+        book = self.books.get(symbol)
+        self._take(i, book, float(price))
+        if self.status[i] != FILLED and book is not None:
+            buy = self.side[i] > 0
+            self.ahead[i] = _level_qty_at(book.bids if buy else book.asks, np.array([float(price)]), buy)[0]
+        return self._report(i)
+
+    def cancel(self, order_id: int) -> bool:
+        i = self._row(order_id)
+        if i is None or self.status[i] >= FILLED:
+            return False
+        self.status[i] = CANCELED
+        return True
+
+    def _resting(self, symbol: str) -> np.ndarray:
+        s = self._sym_idx.get(symbol)
+        if s is None:
+            return np.empty(0, dtype=np.int64)
+        n = self._n
+        return np.flatnonzero((self.sym[:n] == s) & (self.status[:n] < FILLED) & (self.otype[:n] == LIMIT))
+
+    def _match_resting(self, symbol: str) -> None:
+        rows = self._resting(symbol)
+        if not len(rows):
+            return
+        book = self.books[symbol]
+        buy = self.side[rows] > 0
+        px = self.price[rows]
+        # kuyruk: kendi tarafımızdaki seviye küçüldüyse önümüzdeki miktar da en fazla o kadardır
+        own = np.where(buy, _level_qty_at(book.bids, px, descending=True), _level_qty_at(book.asks, px, descending=False))
+        self.ahead[rows] = np.minimum(self.ahead[rows], own)
+        # karşı taraf fiyatımızı kesti → maker olarak limit fiyatından dolum (kesen likidite kadar)
+        for b in (True, False):
+            side_rows = rows[buy == b]
+            if not len(side_rows):
+                continue
+            levels = book.asks if b else book.bids
+            spx = self.price[side_rows]
+            avail = _depth_within(levels, spx, b)
+            cand = avail > _EPS
+            if not cand.any():
+                continue
+            side_rows, spx, avail = side_rows[cand], spx[cand], avail[cand]
+            # fiyat önceliği (iyi fiyat önce), eşitlikte zaman (satır sırası); likidite fiyat sırasında azalmaz →
+            # öncekilerin kalanı toplamı (cumsum) ayrıldıktan sonra kalan kadar dolar
+            order = np.lexsort((side_rows, -spx if b else spx))
+            side_rows, spx, avail = side_rows[order], spx[order], avail[order]
+            rem = self.qty[side_rows] - self.filled[side_rows]
+            before = np.cumsum(rem) - rem
+            fill = np.clip(avail - before, 0.0, rem)
+            total = float(fill.sum())
+            if total <= _EPS:
+                continue
+            for i, q in zip(side_rows[fill > _EPS], fill[fill > _EPS]):
+                self._fill(int(i), float(q), float(self.price[i]), maker=True)
+            take, _, _ = _walk(levels, total, None, b)
+            if b:
+                book.asks = self._consume(book.asks, take)
+            else:
+                book.bids = self._consume(book.bids, take)
+
+    def on_trade(self, symbol: str, price: float, qty: float, buyer_maker: Optional[bool] = None) -> None:
+        """
+        Piyasada gerçekleşen işlem (aggTrade / replay). buyer_maker=True → satıcı agresif, alış
+        limitlerimizi etkiler; None → iki taraf da.
+        """
+        rows = self._resting(symbol)
+        if not len(rows):
+            return
+        price = float(price)
+        buy = self.side[rows] > 0
+        px = self.price[rows]
+        hit_buys = buyer_maker is None or buyer_maker
+        hit_sells = buyer_maker is None or not buyer_maker
+        # fiyatın içinden geçildi → tamamı dolar
+        through = rows[(hit_buys & buy & (px > price)) | (hit_sells & ~buy & (px < price))]
+        for i in through:
+            self._fill(int(i), float(self.qty[i] - self.filled[i]), float(self.price[i]), maker=True)
+        # aynı fiyat → tek FIFO kuyruk: emrin başlangıcı = max(kendi önündeki miktar, önceki emrimizin sonu);
+        # işlem hacmi bu kuyruğu baştan tüketir (running max + cumsum, emir başına döngü yok)
+        at = rows[((hit_buys & buy) | (hit_sells & ~buy)) & (np.abs(px - price) <= _EPS * max(1.0, price))]
+        if not len(at):
+            return
+        budget = float(qty)
+        rem = self.qty[at] - self.filled[at]
+        before = np.cumsum(rem) - rem
+        start = np.maximum.accumulate(self.ahead[at] - before) + before
+        fill = np.clip(budget - start, 0.0, rem)
+        self.ahead[at] = np.maximum(self.ahead[at] - budget, 0.0)
+        for i, q in zip(at[fill > _EPS], fill[fill > _EPS]):
+            self._fill(int(i), float(q), price, maker=True)
+
+    # ---------------------------------------------------------
+    # Raporlar
+    # ---------------------------------------------------------
+    def _report(self, i: int) -> Dict[str, Any]:
+        filled = float(self.filled[i])
+        return {
+            "id": int(self.oid[i]), "symbol": self._syms[int(self.sym[i])],
+            "side": "BUY" if self.side[i] > 0 else "SELL",
+            "type": "MARKET" if self.otype[i] == MARKET else "LIMIT",
+            "status": STATUS[int(self.status[i])], "origQty": float(self.qty[i]), "executedQty": filled,
+            "avgPrice": float(self.notional[i] / filled) if filled > 0 else None,
+            "fee": float(self.fee[i]), "price": float(self.price[i]) or None,
+            "queueAhead": float(self.ahead[i]) if self.otype[i] == LIMIT else None,
+        }
+
+    def order(self, order_id: int) -> Optional[Dict[str, Any]]:
+        i = self._row(order_id)
+        return None if i is None else self._report(i)
+
+    def open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        n = self._n
+        mask = self.status[:n] < FILLED
+        if symbol is not None:
+            s = self._sym_idx.get(symbol)
+            if s is None:
+                return []
+            mask &= self.sym[:n] == s
+        return [self._report(int(i)) for i in np.flatnonzero(mask)]
+
+    def position(self, symbol: str) -> Dict[str, Any]:
+        s = self._sym_idx.get(symbol)
+        if s is None:
+            return {"symbol": symbol, "qty": 0.0, "avg_price": 0.0, "realized": 0.0, "fees": 0.0, "unrealized": 0.0}
+        book = self.books.get(symbol)
+        mark = None
+        if book is not None and len(book.bids) and len(book.asks):
+            mark = (book.bids[0, 0] + book.asks[0, 0]) / 2
+        pos = float(self.pos[s])
+        return {
+            "symbol": symbol, "qty": pos, "avg_price": float(self.avg[s]),
+            "realized": float(self.realized[s]), "fees": float(self.fees[s]),
+            "unrealized": float((mark - self.avg[s]) * pos) if mark is not None and pos else 0.0,
+        }
+
+    def realized_pnl(self) -> float:
+        """Tüm sembollerde gerçekleşen PnL − ücretler (paper equity = PAPER_BALANCE + bu)."""
+        n = len(self._syms)
+        return float(self.realized[:n].sum() - self.fees[:n].sum())
+
+    def quote(self, symbol: str, side: str, qty: float) -> Dict[str, Any]:
+        """Durumu değiştirmeden market emri fiyatı: {filled, avg_price, fee, slippage_bps}."""
+        book = self.books.get(symbol)
+        buy = side.upper() == "BUY"
+        levels = (book.asks if buy else book.bids) if book is not None else _EMPTY
+        _, filled, notional = _walk(levels, float(qty), None, buy)
+        if filled <= _EPS:
+            return {"filled": 0.0, "avg_price": None, "fee": 0.0, "slippage_bps": None}
+        avg = notional / filled
+        best = float(levels[0, 0])
+        return {"filled": filled, "avg_price": avg, "fee": notional * self.taker_fee,
+                "slippage_bps": abs(avg - best) / best * 1e4}
+
+    def stats(self) -> Dict[str, Any]:
+        n = self._n
+        return {"orders": n, "open": int((self.status[:n] < FILLED).sum()), "fills": self.fills,
+                "capacity": len(self.oid), "symbols": len(self._syms), "books": len(self.books)}
+
+    # ---------------------------------------------------------
+    # Async (canlı paper mod)
+    # ---------------------------------------------------------
+    async def market(self, symbol: str, side: str, qty: float, ref_price: Optional[float] = None,
+                     tag: str = "paper") -> Dict[str, Any]:
+        await self.ensure_book(symbol)
+        return self.submit_market(symbol, side, qty, ref_price=ref_price, tag=tag)
+
+    async def aquote(self, symbol: str, side: str, qty: float) -> Dict[str, Any]:
+        await self.ensure_book(symbol)
+        return self.quote(symbol, side, qty)
+
+    async def _poll_loop(self, interval: float) -> None:
+        # bekleyen limit emri olan sembollerin defteri periyodik yenilenir (update_book → eşleştirme)
+        while True:
+            n = self._n
+            live = np.unique(self.sym[:n][(self.status[:n] < FILLED) & (self.otype[:n] == LIMIT)])
+            for s in live:
+                await self.ensure_book(self._syms[int(s)])
+            await asyncio.sleep(interval)
+
+    def start(self, interval: Optional[float] = None) -> None:
+        if self._poll_task is None:
+            self._poll_task = asyncio.get_running_loop().create_task(
+                self._poll_loop(interval or max(0.5, self.book_max_age)), name="paper_engine")
+
+    def stop(self) -> None:
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+
+
+def _log_fill(symbol: str, side: str, qty: float, price: float, fee: float, tag: str, pnl: float) -> None:
+    from utils import db
+    db.log_paper_trade(symbol, side, qty, price, source=tag, pnl=pnl)
+
+
+PAPER = PaperExchange(on_fill=_log_fill)
@@ -0,0 +1,251 @@
+# utils/resampler.py
+# 1m taban barlardan çoklu zaman dilimi (5m/15m/1h/4h/1d ...) OHLCV üretimi — artımlı
+# - Her kapanan 1m bar her zaman dilimindeki açık kovaya (bucket) O(1) eklenir:
+#     open = ilk, high = max, low = min, close = son, volume = toplam
+# - Kova, son dakikası kapandığı anda kapanır ve o zaman diliminin OHLCVRing'ine yazılır
+#   (bir sonraki kovanın ilk dakikası beklenmez)
+# - Kısmi bar: kapanmamış 1m güncellemeleri (WS x=False) ayrı tutulur; partial() / frame(include_partial=True)
+#   kapanmış dakikalar + canlı dakikayı birleştirir. Kapanmış barlar (frame) bundan etkilenmez.
+# - Eksik kova (akış kova ortasında başladı / dakika kaçtı) yazılmaz, geçmiş korunur; son bar bayatlayınca
+#   (RESAMPLERS._ready) bir sonraki REST seed eksik barı tamamlar. Geçmiş sadece gerçek boşlukta
+#   (tam kova, ama son bardan bir kova sonra değil) sıfırlanır — yanlış OHLC üretmektense eksik veri.
+# - Haftalık kovalar Binance gibi Pazartesi 00:00 UTC hizalıdır.
+# - RESAMPLERS: sembol bazlı kayıt; main.kline_processor besler, ta_handler / io_handler okur.
+
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.config import CONFIG
+from utils.indicator_cache import interval_to_ms
+from utils.ohlcv_buffer import FIELDS, OHLCVRing
+
+_WEEK_MS = 604_800_000
+_WEEK_OFFSET_MS = 4 * 86_400_000   # 1970-01-01 Perşembe → ilk Pazartesi
+
+
+def bucket_start(open_time: int, tf_ms: int) -> int:
+    """open_time'ın ait olduğu kovanın başlangıcı (UTC hizalı)."""
+    if tf_ms == _WEEK_MS:
+        return (open_time - _WEEK_OFFSET_MS) // tf_ms * tf_ms + _WEEK_OFFSET_MS
+    return open_time // tf_ms * tf_ms
+
+
+class _Bucket:
+    __slots__ = ("start", "o", "h", "l", "c", "v", "next_t", "complete")
+
+    def __init__(self, start: int, t: int, o: float, h: float, l: float, c: float, v: float, base_ms: int):
+        self.start = start
+        self.o, self.h, self.l, self.c, self.v = o, h, l, c, v
+        self.next_t = t + base_ms
+        self.complete = t == start   # kovanın ilk dakikasından başladı mı
+
+    def add(self, t: int, h: float, l: float, c: float, v: float, base_ms: int) -> None:
+        if t != self.next_t:
+            self.complete = False
+        if h > self.h:
+            self.h = h
+        if l < self.l:
+            self.l = l
+        self.c = c
+        self.v += v
+        self.next_t = t + base_ms
+
+
+class MultiTimeframeResampler:
+    """Tek sembol: taban (1m) halka tampon + her zaman dilimi için kapanmış bar halkası."""
+
+    def __init__(self, symbol: str, timeframes: Optional[Sequence[str]] = None, base: str = "1m",
+                 capacity: int = 1000):
+        self.symbol = symbol
+        self.base = base
+        self.base_ms = interval_to_ms(base)
+        self.capacity = int(capacity)
+        tfs = [tf for tf in (timeframes or CONFIG.BINANCE.RESAMPLE_TIMEFRAMES) if tf != base]
+        self.tf_ms: Dict[str, int] = {tf: interval_to_ms(tf) for tf in tfs}
+        for tf, ms in self.tf_ms.items():
+            if ms % self.base_ms:
+                raise ValueError(f"{tf} is not a multiple of {base}")
+        self.rings: Dict[str, OHLCVRing] = {tf: OHLCVRing(self.capacity) for tf in [base, *tfs]}
+        self._acc: Dict[str, Optional[_Bucket]] = {tf: None for tf in tfs}
+        self._live: Optional[tuple] = None   # kapanmamış taban bar (t, o, h, l, c, v)
+
+    # ---------------------------------------------------------
+    # Besleme
+    # ---------------------------------------------------------
+    def update(self, open_time: int, o: float, h: float, l: float, c: float, v: float,
+               closed: bool = True) -> List[str]:
+        """Taban bar ekler. Döndürür: bu barla kapanan zaman dilimleri."""
+        t = int(open_time)
+        if not closed:
+            self._live = (t, o, h, l, c, v)
+            return []
+        base_ring = self.rings[self.base]
+        if len(base_ring) and t < base_ring.last_time:
+            return []   # geç gelen / tekrar eden eski bar
+        if len(base_ring) and t == base_ring.last_time:
+            return []   # aynı kapanmış bar ikinci kez
+        base_ring.append(t, o, h, l, c, v)
+        if self._live is not None and self._live[0] <= t:
+            self._live = None
+
+        closed_tfs = []
+        for tf, ms in self.tf_ms.items():
+            start = bucket_start(t, ms)
+            acc = self._acc[tf]
+            if acc is not None and acc.start != start:
+                self._finalize(tf, acc)   # son dakikası hiç gelmedi
+                acc = None
+            if acc is None:
+                acc = self._acc[tf] = _Bucket(start, t, o, h, l, c, v, self.base_ms)
+            else:
+                acc.add(t, h, l, c, v, self.base_ms)
+            if acc.next_t == start + ms:
+                self._finalize(tf, acc)
+                self._acc[tf] = None
+                closed_tfs.append(tf)
+        return closed_tfs
+
+    def update_kline(self, k: Dict[str, Any]) -> List[str]:
+        """Binance WS kline ("k" alanı)."""
+        return self.update(int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]),
+                           float(k["v"]), closed=bool(k.get("x", True)))
+
+    def _finalize(self, tf: str, acc: _Bucket) -> None:
+        ring = self.rings[tf]
+        ms = self.tf_ms[tf]
+        if not (acc.complete and acc.next_t == acc.start + ms):
+            return   # eksik kova: yanlış bar yazma, seed'li geçmişe dokunma
+        if len(ring):
+            if acc.start <= ring.last_time:
+                return   # REST seed bu kovayı zaten kapanmış olarak getirdi
+            if acc.start != ring.last_time + ms:
+                ring = self.rings[tf] = OHLCVRing(self.capacity)   # seri boşluğu → geçmişi sıfırla (REST seed tamamlar)
+        ring.append(acc.start, acc.o, acc.h, acc.l, acc.c, acc.v)
+
+    def seed(self, interval: str, klines: Sequence[Sequence[Any]], now_ms: Optional[int] = None) -> None:
+        """REST /klines ile bir zaman dilimini doldurur; kapanmamış barlar atılır."""
+        if interval not in self.rings:
+            return
+        ms = self.base_ms if interval == self.base else self.tf_ms[interval]
+        now_ms = int(time.time() * 1000) if now_ms is None else int(now_ms)
+        kl = [k for k in klines if int(k[0]) + ms <= now_ms]
+        if not kl:
+            return
+        ring = OHLCVRing.from_klines(kl, capacity=self.capacity)
+        cur = self.rings[interval]
+        # seed'den sonra akıştan kapanmış barlar geldiyse koru
+        if len(cur) and cur.last_time > ring.last_time:
+            t = cur.times()
+            idx = np.flatnonzero(t > ring.last_time)
+            if int(t[idx[0]]) == ring.last_time + ms:
+                cols = [cur.view(f) for f in FIELDS]
+                for i in idx:
+                    ring.append(int(t[i]), *(float(col[i]) for col in cols))
+        self.rings[interval] = ring
+
+    # ---------------------------------------------------------
+    # Okuma
+    # ---------------------------------------------------------
+    def closed_count(self, interval: str) -> int:
+        ring = self.rings.get(interval)
+        return len(ring) if ring is not None else 0
+
+    def partial(self, interval: str) -> Optional[tuple]:
+        """Açık kovanın anlık OHLCV'si (open_time, o, h, l, c, v) — kapanmış dakikalar + canlı dakika."""
+        live = self._live
+        if interval == self.base:
+            return live
+        ms = self.tf_ms.get(interval)
+        if ms is None:
+            return None
+        acc = self._acc[interval]
+        if live is not None:
+            lstart = bucket_start(live[0], ms)
+            if acc is not None and acc.start == lstart:
+                return (acc.start, acc.o, max(acc.h, live[2]), min(acc.l, live[3]), live[4], acc.v + live[5])
+            if acc is None or lstart > acc.start:
+                return (lstart,) + tuple(live[1:])
+        if acc is None:
+            return None
+        return (acc.start, acc.o, acc.h, acc.l, acc.c, acc.v)
+
+    def frame(self, interval: str, n: Optional[int] = None, include_partial: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Kapanmış barlar (kopyasız, attrs: symbol/interval/closed=True → indikatör cache'e uygun).
+        include_partial=True → açık bar eklenmiş kopya (closed=False).
+        """
+        ring = self.rings.get(interval)
+        if ring is None:
+            return None
+        df = ring.frame(n)
+        df.attrs.update({"symbol": self.symbol, "interval": interval, "closed": True})
+        if include_partial:
+            p = self.partial(interval)
+            if p is not None and (not len(ring) or p[0] > ring.last_time):
+                row = pd.DataFrame([p], columns=["open_time", "open", "high", "low", "close", "volume"])
+                df = pd.concat([df, row], ignore_index=True)
+                df.attrs.update({"symbol": self.symbol, "interval": interval, "closed": False})
+        return df
+
+    def klines(self, interval: str, n: Optional[int] = None) -> Optional[np.ndarray]:
+        """REST /klines satır düzeninde (open_time, o, h, l, c, v) kapanmış barlar — io_utils uyumlu."""
+        ring = self.rings.get(interval)
+        if ring is None:
+            return None
+        return np.column_stack([ring.times(n).astype(float)] + [ring.view(f, n) for f in FIELDS])
+
+
+class ResamplerRegistry:
+    """Sembol → MultiTimeframeResampler. Sadece akıştan beslenen semboller kayıtlıdır."""
+
+    def __init__(self):
+        self._by_symbol: Dict[str, MultiTimeframeResampler] = {}
+
+    def get(self, symbol: str, create: bool = False) -> Optional[MultiTimeframeResampler]:
+        r = self._by_symbol.get(symbol)
+        if r is None and create:
+            r = self._by_symbol[symbol] = MultiTimeframeResampler(
+                symbol, base=CONFIG.BINANCE.STREAM_INTERVAL, capacity=CONFIG.BINANCE.RESAMPLE_CAPACITY)
+        return r
+
+    def update_kline(self, symbol: str, k: Dict[str, Any]) -> List[str]:
+        return self.get(symbol, create=True).update_kline(k)
+
+    def supports(self, symbol: str, interval: str) -> bool:
+        r = self._by_symbol.get(symbol)
+        return r is not None and interval in r.rings
+
+    def _ready(self, symbol: str, interval: str, n: int) -> Optional[MultiTimeframeResampler]:
+        """En az n kapanmış bar var ve son bar güncel mi (akış durmuşsa bayat veri verilmez)."""
+        r = self._by_symbol.get(symbol)
+        if r is None or r.closed_count(interval) < n:
+            return None
+        ms = interval_to_ms(interval)
+        if r.rings[interval].last_time + 2 * ms <= int(time.time() * 1000):
+            return None
+        return r
+
+    def frame(self, symbol: str, interval: str, n: int) -> Optional[pd.DataFrame]:
+        """Son n kapanmış bar; yoksa None (çağıran REST'e düşer)."""
+        r = self._ready(symbol, interval, n)
+        return r.frame(interval, n) if r is not None else None
+
+    def klines(self, symbol: str, interval: str, n: int) -> Optional[np.ndarray]:
+        r = self._ready(symbol, interval, n)
+        return r.klines(interval, n) if r is not None else None
+
+    def seed(self, symbol: str, interval: str, klines: Sequence[Sequence[Any]], now_ms: Optional[int] = None) -> None:
+        r = self._by_symbol.get(symbol)
+        if r is not None:
+            r.seed(interval, klines, now_ms)
+
+    def symbols(self) -> Iterable[str]:
+        return self._by_symbol.keys()
+
+
+RESAMPLERS = ResamplerRegistry()
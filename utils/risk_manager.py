@@ -3,29 +3,25 @@
 
 import time
 import os
-from utils.config import RISK_MAX_DAILY_LOSS, DB_PATH
-import sqlite3
+from utils.config import CONFIG
+from utils.db import DB_PATH
+from utils.storage import get_db
 
 class RiskManager:
     """
     Basic risk controls:
-    - daily loss tracking using paper_trades table (only approximate).
+    - daily loss tracking using realized PnL of paper fills (paper_trades.pnl).
     - per-trade max notional limit.
     - cool-off on exceeding daily loss threshold.
     """
-    def __init__(self, db_path=DB_PATH, max_daily_loss=RISK_MAX_DAILY_LOSS):
-        self.db = db_path
-        self.max_daily_loss = max_daily_loss
+    def __init__(self, db_path=DB_PATH, max_daily_loss=None):
+        self.db = get_db(db_path)
+        self.max_daily_loss = CONFIG.BOT.RISK_MAX_DAILY_LOSS if max_daily_loss is None else max_daily_loss
 
     def _get_today_pl(self):
-        # approximate: sum buys/sells via paper_trades (notional) - for live use positions reconciliation needed
-        conn = sqlite3.connect(self.db)
-        c = conn.cursor()
-        # This assumes small scale: define P/L as difference between executed buys and sells for simplicity.
-        # Better: store realized P/L from fills. This is a placeholder to prevent runaway risk.
-        c.execute("SELECT SUM(CASE WHEN side='BUY' THEN -qty*COALESCE(price,0) WHEN side='SELL' THEN qty*COALESCE(price,0) ELSE 0 END) as pl FROM paper_trades WHERE date(ts)=date('now')")
-        row = c.fetchone()
-        conn.close()
+        # bugünkü gerçekleşen PnL: paper_engine her dolumda kapanan kısmın kâr/zararı − ücret yazar (pnl);
+        # açık pozisyonun notional'ı zarar sayılmaz. pnl'siz eski kayıtlar 0.
+        row = self.db.query_one("SELECT SUM(COALESCE(pnl, 0)) FROM paper_trades WHERE date(ts)=date('now')")
         pl = row[0] if row and row[0] is not None else 0.0
         return pl
 
@@ -0,0 +1,177 @@
+# utils/scheduler.py
+# Heap tabanlı, son tarih (deadline) farkındalıklı periyodik görev zamanlayıcı (jobs/worker_a)
+# - Her görevin bir sonraki çalışma zamanı heap'te; döngü sadece en yakın zamana kadar uyur (1 sn yoklama yok)
+# - Sabit ritim: sonraki çalışma = planlanan + interval (görev süresi kaymaya eklenmez); kaçırılan
+#   aralıklar telafi edilmez, atlanır
+# - jitter: her çalışmaya [0, jitter] sn rastgele gecikme (aynı anda patlayan istekleri yayar)
+# - Hâlâ çalışan görevin yeni turu başlatılmaz (skip), birikme olmaz
+# - Görev başına timeout (varsayılan: interval) ve öncelik (küçük = önce); eşzamanlılık max_concurrent ile
+#   sınırlı, slot beklerken öncelik sırası geçerli
+# - Metrikler: çalışma süresi histogramı, başlama gecikmesi (lag), skip/timeout/hata sayıları
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+LOG = logging.getLogger("scheduler")
+LOG.addHandler(logging.NullHandler())
+
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class TaskStats:
+    __slots__ = ("runs", "skipped", "timeouts", "errors", "hist", "last_duration", "max_duration",
+                 "total_duration", "last_lag", "max_lag", "total_lag", "last_run")
+
+    def __init__(self):
+        self.runs = self.skipped = self.timeouts = self.errors = 0
+        self.hist = [0] * (len(DURATION_BUCKETS) + 1)   # son kova: > en büyük sınır
+        self.last_duration = self.max_duration = self.total_duration = 0.0
+        self.last_lag = self.max_lag = self.total_lag = 0.0
+        self.last_run: Optional[float] = None
+
+    def observe(self, duration: float, lag: float) -> None:
+        self.runs += 1
+        self.hist[bisect.bisect_left(DURATION_BUCKETS, duration)] += 1
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.total_lag += lag
+        self.last_run = time.time()
+
+    def as_dict(self) -> Dict[str, Any]:
+        n = max(1, self.runs)
+        labels = [f"<={b}" for b in DURATION_BUCKETS] + [f">{DURATION_BUCKETS[-1]}"]
+        return {
+            "runs": self.runs, "skipped": self.skipped, "timeouts": self.timeouts, "errors": self.errors,
+            "duration_hist": dict(zip(labels, self.hist)),
+            "last_duration": round(self.last_duration, 4), "avg_duration": round(self.total_duration / n, 4),
+            "max_duration": round(self.max_duration, 4),
+            "last_lag": round(self.last_lag, 4), "avg_lag": round(self.total_lag / n, 4),
+            "max_lag": round(self.max_lag, 4), "last_run": self.last_run,
+        }
+
+
+class ScheduledTask:
+    __slots__ = ("name", "fn", "interval", "timeout", "priority", "jitter", "next_base", "running", "stats")
+
+    def __init__(self, name: str, fn: Callable[[], Awaitable[Any]], interval: float,
+                 timeout: Optional[float] = None, priority: int = 10, jitter: float = 0.0):
+        self.name = name
+        self.fn = fn
+        self.interval = float(interval)
+        self.timeout = float(timeout) if timeout else self.interval
+        self.priority = int(priority)
+        self.jitter = float(jitter)
+        self.next_base = 0.0                  # jitter'sız planlanan zaman (ritim bundan ilerler)
+        self.running: Optional[asyncio.Task] = None
+        self.stats = TaskStats()
+
+
+class TaskScheduler:
+    def __init__(self, tasks: Iterable[ScheduledTask], max_concurrent: int = 4):
+        self.tasks: Dict[str, ScheduledTask] = {t.name: t for t in tasks}
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._heap: List[tuple] = []          # (due, priority, seq, name)
+        self._ready: List[tuple] = []         # (priority, due, seq, name) — zamanı gelmiş, slot bekliyor
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._running = 0
+
+    @classmethod
+    def from_config(cls, specs: Iterable[Dict[str, Any]], task_map: Dict[str, Callable[[], Awaitable[Any]]],
+                    max_concurrent: int = 4) -> "TaskScheduler":
+        """WORKER_A_TASKS ({name, interval, timeout?, priority?, jitter?}) + TASK_MAP."""
+        tasks = []
+        for spec in specs:
+            fn = task_map.get(spec["name"])
+            if fn is None:
+                LOG.warning("no task function for %s", spec["name"])
+                continue
+            tasks.append(ScheduledTask(spec["name"], fn, spec["interval"], spec.get("timeout"),
+                                       spec.get("priority", 10), spec.get("jitter", 0.0)))
+        return cls(tasks, max_concurrent=max_concurrent)
+
+    def _push(self, t: ScheduledTask) -> None:
+        due = t.next_base + (random.uniform(0.0, t.jitter) if t.jitter > 0 else 0.0)
+        heapq.heappush(self._heap, (due, t.priority, next(self._seq), t.name))
+
+    def _advance(self, t: ScheduledTask, now: float) -> None:
+        """Bir sonraki ritim noktası; geride kalınan aralıklar atlanır."""
+        nxt = t.next_base + t.interval
+        if nxt <= now:
+            nxt += ((now - nxt) // t.interval + 1) * t.interval
+        t.next_base = nxt
+        self._push(t)
+
+    async def _execute(self, t: ScheduledTask, due: float) -> None:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await asyncio.wait_for(t.fn(), timeout=t.timeout)
+        except asyncio.TimeoutError:
+            t.stats.timeouts += 1
+            LOG.warning("task %s timed out after %.1fs", t.name, t.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            t.stats.errors += 1
+            LOG.exception("task %s failed", t.name)
+        finally:
+            t.stats.observe(loop.time() - start, max(0.0, start - due))
+            t.running = None
+            self._running -= 1
+            if self._wake is not None:
+                self._wake.set()
+
+    def _start(self, t: ScheduledTask, due: float) -> None:
+        self._running += 1
+        t.running = asyncio.get_running_loop().create_task(self._execute(t, due), name=f"task:{t.name}")
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        now = loop.time()
+        for t in self.tasks.values():
+            t.next_base = now
+            self._push(t)
+        try:
+            while True:
+                now = loop.time()
+                while self._heap and self._heap[0][0] <= now:
+                    due, prio, seq, name = heapq.heappop(self._heap)
+                    t = self.tasks[name]
+                    if t.running is not None:
+                        t.stats.skipped += 1   # önceki tur sürüyor → bu tur atlanır
+                        self._advance(t, now)
+                    else:
+                        heapq.heappush(self._ready, (prio, due, seq, name))
+                while self._ready and self._running < self.max_concurrent:
+                    prio, due, seq, name = heapq.heappop(self._ready)
+                    t = self.tasks[name]
+                    self._start(t, due)
+                    self._advance(t, now)
+                timeout = max(0.0, self._heap[0][0] - loop.time()) if self._heap else None
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for t in self.tasks.values():
+                if t.running is not None:
+                    t.running.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: dict(t.stats.as_dict(), interval=t.interval, priority=t.priority,
+                           running=t.running is not None)
+                for name, t in self.tasks.items()}
@@ -1,18 +1,23 @@
 # utils/signal_evaluator.py
+# - Sembol başı zaman penceresi: deque + çalışan BUY/SELL güç toplamları (ekleme ve süre aşımında O(1))
+# - Süre aşımı zamanlayıcı ile (pencere en eski sinyalin bitiş anında temizlenir), sonraki sinyal beklenmez
+# - Karar dict'indeki "signals" listesi sadece BUY/SELL kararı üretildiğinde oluşturulur
 import asyncio
-from typing import Dict, Any, Optional
+from collections import deque
+from typing import Callable, Dict, Any, Optional
 from utils import db
 import time
 import json
 
 class Signal:
-    def __init__(self, source: str, symbol: str, type_: str, strength: float = 0.5, payload: Optional[Dict] = None):
+    def __init__(self, source: str, symbol: str, type_: str, strength: float = 0.5, payload: Optional[Dict] = None,
+                 ts: Optional[float] = None):
         self.source = source
         self.symbol = symbol.upper()
         self.type = type_.upper()
         self.strength = float(strength)
         self.payload = payload or {}
-        self.ts = time.time()
+        self.ts = time.time() if ts is None else float(ts)
 
     def to_dict(self):
         return {
@@ -24,15 +29,51 @@ class Signal:
             "ts": self.ts
         }
 
+class _Window:
+    """Tek sembolün penceresi: (ts, sinyal) deque'i + çalışan toplamlar."""
+    __slots__ = ("items", "buy", "sell")
+
+    def __init__(self):
+        self.items: deque = deque()
+        self.buy = 0.0
+        self.sell = 0.0
+
+    def push(self, sig: Signal) -> None:
+        self.items.append((sig.ts, sig))
+        if sig.type == "BUY":
+            self.buy += sig.strength
+        elif sig.type == "SELL":
+            self.sell += sig.strength
+
+    def expire(self, cutoff: float) -> None:
+        items = self.items
+        while items and items[0][0] < cutoff:
+            _, s = items.popleft()
+            if s.type == "BUY":
+                self.buy -= s.strength
+            elif s.type == "SELL":
+                self.sell -= s.strength
+        if not items:
+            self.buy = self.sell = 0.0   # float birikim hatasını sıfırla
+
+    def deadline(self, window_seconds: float) -> Optional[float]:
+        return self.items[0][0] + window_seconds if self.items else None
+
+
 class SignalEvaluator:
-    def __init__(self, decision_callback=None, loop=None, window_seconds: int = 10, threshold: float = 0.3):
+    def __init__(self, decision_callback=None, loop=None, window_seconds: int = 10, threshold: float = 0.3,
+                 clock: Optional[Callable[[], float]] = None):
         self.queue: asyncio.Queue = asyncio.Queue()
         self.loop = loop or asyncio.get_event_loop()
         self.window_seconds = window_seconds
         self.threshold = threshold
         self.decision_callback = decision_callback
         self.running = False
-        self.buf = {}
+        self.buf: Dict[str, _Window] = {}
+        # backtest için sanal saat verilebilir (varsayılan: duvar saati)
+        self.clock = clock or time.time
+        self._wake: Optional[asyncio.Event] = None
+        self._expiry_task: Optional[asyncio.Task] = None
 
     async def publish(self, signal: Signal):
         try:
@@ -46,8 +87,7 @@ class SignalEvaluator:
         while self.running:
             try:
                 sig = await self.queue.get()
-                self._buffer_signal(sig)
-                decision = self._aggregate_and_decide(sig.symbol)
+                decision = self.evaluate(sig)
                 if decision:
                     try:
                         db.log_decision(decision["symbol"], decision["decision"], decision["strength"], decision.get("reason", ""))
@@ -61,30 +101,54 @@ class SignalEvaluator:
             except Exception as e:
                 print("SignalEvaluator loop error:", e)
 
+    def evaluate(self, sig: Signal) -> Optional[Dict[str, Any]]:
+        """Sinyali pencereye ekler ve sembol için kararı döner (senkron; backtest de bunu kullanır)."""
+        self._buffer_signal(sig)
+        return self._aggregate_and_decide(sig.symbol)
+
     def _buffer_signal(self, sig: Signal):
-        lst = self.buf.setdefault(sig.symbol, [])
-        lst.append( (sig.ts, sig) )
-        cutoff = time.time() - self.window_seconds
-        self.buf[sig.symbol] = [ (t,s) for (t,s) in lst if t >= cutoff ]
+        win = self.buf.get(sig.symbol)
+        if win is None:
+            win = self.buf[sig.symbol] = _Window()
+        was_empty = not win.items
+        win.push(sig)
+        win.expire(self.clock() - self.window_seconds)
+        if was_empty and self._wake is not None:
+            self._wake.set()   # zamanlayıcı yeni bir bitiş anı beklemeli
+
+    def expire(self, now: Optional[float] = None) -> Optional[float]:
+        """Süresi dolan sinyalleri tüm pencerelerden atar. Döndürür: bir sonraki bitiş anı (yoksa None)."""
+        cutoff = (self.clock() if now is None else now) - self.window_seconds
+        nxt = None
+        for symbol in list(self.buf):
+            win = self.buf[symbol]
+            win.expire(cutoff)
+            d = win.deadline(self.window_seconds)
+            if d is None:
+                del self.buf[symbol]
+            elif nxt is None or d < nxt:
+                nxt = d
+        return nxt
+
+    async def _expiry_loop(self):
+        self._wake = asyncio.Event()
+        while self.running:
+            nxt = self.expire()
+            self._wake.clear()
+            timeout = None if nxt is None else max(0.0, nxt - self.clock())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
 
     def _aggregate_and_decide(self, symbol: str) -> Optional[Dict[str, Any]]:
-        items = self.buf.get(symbol, [])
-        if not items:
+        win = self.buf.get(symbol)
+        if win is None or not win.items:
             return None
-        buy = 0.0
-        sell = 0.0
-        signals_list = []
-        for _, s in items:
-            signals_list.append(s.to_dict())
-            if s.type == "BUY":
-                buy += s.strength
-            elif s.type == "SELL":
-                sell += s.strength
-        count = max(1, len(items))
-        buy /= count
-        sell /= count
+        count = len(win.items)
+        buy = win.buy / count
+        sell = win.sell / count
         diff = buy - sell
-        decision = "HOLD"
         strength = abs(diff)
         reason = f"agg_buy={buy:.3f}, agg_sell={sell:.3f}, diff={diff:.3f}"
         if diff >= self.threshold:
@@ -98,12 +162,18 @@ class SignalEvaluator:
             "decision": decision,
             "strength": strength,
             "reason": reason,
-            "signals": signals_list,
-            "ts": time.time()
+            # sinyal dict'leri sadece emir üreten kararda (HOLD'da pencere kopyalanmaz)
+            "signals": [s.to_dict() for _, s in win.items] if decision != "HOLD" else [],
+            "ts": self.clock()
         }
 
     def start(self):
+        self.running = True
         self.loop.create_task(self._process_loop())
+        self._expiry_task = self.loop.create_task(self._expiry_loop())
 
     def stop(self):
         self.running = False
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            self._expiry_task = None
@@ -0,0 +1,283 @@
+# utils/storage.py
+# Ortak SQLite erişim katmanı — tüm modüller (db, cache, paper_utils, apikey_utils, risk_manager) bunu kullanır
+# - Veritabanı dosyası başına tek Database nesnesi (get_db): okuyucu bağlantı havuzu + tek yazıcı thread
+# - Her bağlantıda aynı pragmalar: WAL, synchronous=NORMAL, mmap, busy_timeout, temp_store=MEMORY
+# - Prepared statement cache: sqlite3 cached_statements (CONFIG.DATABASE.STATEMENT_CACHE)
+# - Yazıcı thread kuyruktaki işleri tek transaction'da toplar (group commit); her iş kendi SAVEPOINT'inde,
+#   biri hata verirse sadece o geri alınır
+# - Async facade: aquery/aquery_one/aexecute/awrite ve run_db(fn, ...) → handler'lar loop'u disk I/O'da bloklamaz
+# - data_version(): ayrı bağlantıda PRAGMA data_version — başka bağlantı/süreç commit ettiğinde değişir
+# - own_commit(): yazıcının son commit'inden hemen sonraki (data_version, yazıcı bağlantısının data_version'ı);
+#   değişimin sadece bu sürecin yazmalarından gelip gelmediğini ayırmak için (cache._validate)
+# - close_all(): yazıcıları boşaltır, bağlantıları kapatır (atexit)
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import functools
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.config import CONFIG
+
+LOG = logging.getLogger("storage")
+LOG.addHandler(logging.NullHandler())
+
+_GROUP_MAX = 256   # tek transaction'da en fazla iş
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False,
+                           cached_statements=CONFIG.DATABASE.STATEMENT_CACHE,
+                           timeout=CONFIG.DATABASE.BUSY_TIMEOUT_MS / 1000.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={int(CONFIG.DATABASE.MMAP_SIZE)}")
+    conn.execute(f"PRAGMA busy_timeout={int(CONFIG.DATABASE.BUSY_TIMEOUT_MS)}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+class Database:
+    """Tek SQLite dosyası: okuyucu havuzu + tek yazıcı."""
+
+    def __init__(self, path: str, readers: Optional[int] = None):
+        self.path = path
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self.max_readers = int(readers or CONFIG.DATABASE.READ_POOL_SIZE)
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._version_lock = threading.Lock()
+        self._own_commit: Optional[Tuple[int, int]] = None
+        self._closed = False
+
+    # ---------------------------------------------------------
+    # Okuma (havuz)
+    # ---------------------------------------------------------
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._reader_lock:
+            if self._reader_count < self.max_readers:
+                self._reader_count += 1
+                return _connect(self.path)
+        return self._readers.get()
+
+    def read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._acquire()
+        try:
+            return fn(conn)
+        finally:
+            self._readers.put(conn)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        return self.read(lambda c: c.execute(sql, params).fetchall())
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        return self.read(lambda c: c.execute(sql, params).fetchone())
+
+    def data_version(self) -> int:
+        """Sabit bir bağlantıdan PRAGMA data_version (disk okuması yok; değişim = başka bağlantıda commit)."""
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = _connect(self.path)
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def own_commit(self) -> Optional[Tuple[int, int]]:
+        """
+        Yazıcının son commit'i sonrası (data_version(), yazıcı bağlantısında data_version); hiç commit yoksa None.
+        Yazıcı bağlantısının değeri kendi commit'leriyle değişmez → ikinci eleman sadece başka bağlantılarla artar.
+        """
+        return self._own_commit
+
+    # ---------------------------------------------------------
+    # Yazma (tek thread)
+    # ---------------------------------------------------------
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Yazma işini kuyruğa ekler; Future fn'in dönüşünü (commit sonrası) taşır."""
+        if self._closed:
+            raise RuntimeError(f"database closed: {self.path}")
+        self._ensure_writer()
+        fut: Future = Future()
+        self._jobs.put((fn, fut))
+        return fut
+
+    def write(self, fn: Callable[[sqlite3.Connection], Any], timeout: Optional[float] = None) -> Any:
+        return self.submit(fn).result(timeout)
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """Tek ifade; döndürür: rowcount."""
+        return self.write(lambda c: c.execute(sql, params).rowcount)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        rows = list(rows)
+        return self.write(lambda c: c.executemany(sql, rows).rowcount)
+
+    def script(self, sql: str) -> None:
+        """';' ile ayrılmış şema ifadeleri (executescript transaction'ı kapattığı için tek tek)."""
+        stmts = [s.strip() for s in sql.split(";") if s.strip()]
+        self.write(lambda c: [c.execute(s) for s in stmts])
+
+    def _ensure_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                name = f"sqlite-writer:{os.path.basename(self.path)}"
+                self._writer = threading.Thread(target=self._write_loop, name=name, daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        conn = _connect(self.path)
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                group = [job]
+                stop = False
+                while len(group) < _GROUP_MAX:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        stop = True
+                        break
+                    group.append(job)
+                self._run_group(conn, group)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _note_commit(self, conn: sqlite3.Connection) -> None:
+        # future'lar çözülmeden önce; sıra önemli: önce genel sürüm, sonra yazıcınınki
+        # (arada gelen yabancı commit ikincisinde görünür)
+        try:
+            version = self.data_version()
+            self._own_commit = (version, conn.execute("PRAGMA data_version").fetchone()[0])
+        except sqlite3.Error as e:
+            self._own_commit = None   # bilinmiyor → okuyucular tam doğrulama yapar
+            LOG.debug("data_version after commit failed: %s", e)
+
+    def _run_group(self, conn: sqlite3.Connection, group: List[tuple]) -> None:
+        group = [(fn, fut) for fn, fut in group if fut.set_running_or_notify_cancel()]
+        if not group:
+            return
+        results: List[tuple] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, fut in group:
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((fut, True, fn(conn)))
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    results.append((fut, False, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # commit olmadı → gruptaki tüm işler başarısız
+            LOG.warning("sqlite write group failed: %s", e)
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            results = [(fut, False, e) for _, fut in group]
+        else:
+            self._note_commit(conn)
+        for fut, ok, value in results:
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
+
+    # ---------------------------------------------------------
+    # Async facade
+    # ---------------------------------------------------------
+    async def aquery(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        return await run_db(self.query, sql, params)
+
+    async def aquery_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        return await run_db(self.query_one, sql, params)
+
+    async def awrite(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.wrap_future(self.submit(fn))
+
+    async def aexecute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        return await self.awrite(lambda c: c.execute(sql, params).rowcount)
+
+    async def aexecutemany(self, sql: str, rows: Iterable[Sequence[Any]]) -> int:
+        rows = list(rows)
+        return await self.awrite(lambda c: c.executemany(sql, rows).rowcount)
+
+    # ---------------------------------------------------------
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is not None:
+            self._jobs.put(None)
+            self._writer.join(timeout)
+            self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+                self._version_conn = None
+
+
+_DBS: Dict[str, Database] = {}
+_DBS_LOCK = threading.Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+def get_db(path: str) -> Database:
+    """Dosya başına tek Database (mutlak yola göre)."""
+    key = os.path.abspath(path)
+    db = _DBS.get(key)
+    if db is None or db._closed:
+        with _DBS_LOCK:
+            db = _DBS.get(key)
+            if db is None or db._closed:
+                db = _DBS[key] = Database(path)
+    return db
+
+
+async def run_db(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Senkron storage fonksiyonunu (örn. apikey_utils.get_apikey) loop dışında çalıştırır."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(max_workers=CONFIG.DATABASE.READ_POOL_SIZE, thread_name_prefix="sqlite-io")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+
+def close_all(timeout: Optional[float] = 5.0) -> None:
+    with _DBS_LOCK:
+        dbs = list(_DBS.values())
+        _DBS.clear()
+    for db in dbs:
+        db.close(timeout)
+
+
+atexit.register(close_all)
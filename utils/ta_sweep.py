@@ -0,0 +1,330 @@
+# utils/ta_sweep.py
+# Vektörel parametre tarama (sweep) motoru
+# - Bir indikatörü periyot ızgarasının tamamı için tek geçişte hesaplar:
+#     * EMA/MACD: alpha vektörüyle yığılmış (stacked) EWM — zaman döngüsü bir kez, parametreler vektörel
+#     * RSI: cumsum tabanlı çoklu pencere kayan ortalama
+#     * Rejim: ta_utils.detect_regime (prefix-sum eğim) pencere başına
+#     * alpha_ta ağırlıkları/eşikleri: bileşen skor matrisi × ağırlık ızgarası (tek matris çarpımı)
+# - Her konfigürasyonu saklı geçmiş üzerinde skorlar (pozisyon → getiri → sharpe/dd/trade sayısı)
+# - Semboller ProcessPoolExecutor ile çekirdeklere dağıtılır; sonuç pandas tablo
+#
+# Kullanım:
+#   from utils.ta_sweep import run_sweep
+#   table = run_sweep({"BTCUSDT": df, "ETHUSDT": df2}, interval="1h")
+#   python -m utils.ta_sweep BTCUSDT ETHUSDT --interval 1h --limit 1000
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.config import CONFIG
+from utils.indicator_cache import interval_to_ms
+from utils import ta_utils
+
+ALPHA_COMPONENTS = ("kalman_score", "hilbert_score", "entropy_score", "regime_score", "leadlag_score")
+ALPHA_WEIGHT_FIELDS = ("W_KALMAN", "W_HILBERT", "W_ENTROPY", "W_REGIME", "W_LEADLAG")
+
+
+# =============================================================
+# Çoklu parametre indikatörleri (tek geçiş)
+# =============================================================
+
+def ewm_stack(x: np.ndarray, spans: Sequence[float]) -> np.ndarray:
+    """
+    pandas ewm(span, adjust=False).mean() ile aynı; tüm span'ler tek zaman döngüsünde.
+    x: (n,) veya (R, n) — 2D ise satır başına kendi span'i (len(spans) == R).
+    Döndürür: (len(spans), n)
+    """
+    alpha = 2.0 / (np.asarray(spans, dtype=float) + 1.0)
+    x = np.asarray(x, dtype=float)
+    X = np.broadcast_to(x, (len(alpha), x.shape[-1])) if x.ndim == 1 else x
+    out = np.empty(X.shape, dtype=float)
+    out[:, 0] = X[:, 0]
+    a, b = alpha, 1.0 - alpha
+    for t in range(1, X.shape[1]):
+        out[:, t] = a * X[:, t] + b * out[:, t - 1]
+    return out
+
+
+def rolling_mean_stack(x: np.ndarray, windows: Sequence[int]) -> np.ndarray:
+    """Çoklu pencere kayan ortalama (min_periods=window), tek cumsum. Döndürür: (W, n)"""
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    cs = np.concatenate(([0.0], np.cumsum(x)))
+    w = np.asarray(windows, dtype=int)[:, None]
+    t = np.arange(n)[None, :]
+    lo = np.clip(t + 1 - w, 0, None)
+    out = (cs[t + 1] - cs[lo]) / w
+    out[t < w - 1] = np.nan
+    return out
+
+
+def rsi_grid(close: np.ndarray, periods: Sequence[int]) -> np.ndarray:
+    """ta_utils.rsi ile aynı tanım (basit kayan ortalama), tüm periyotlar için. (P, n)"""
+    delta = np.diff(np.asarray(close, dtype=float), prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = rolling_mean_stack(gain, periods)
+    avg_loss = rolling_mean_stack(loss, periods)
+    rs = avg_gain / (avg_loss + 1e-12)
+    return 100 - (100 / (1 + rs))
+
+
+def macd_grid(close: np.ndarray, combos: Sequence[Tuple[int, int, int]]) -> np.ndarray:
+    """(fast, slow, signal) kombinasyonları için MACD histogramı. (K, n)"""
+    spans = sorted({c[0] for c in combos} | {c[1] for c in combos})
+    E = dict(zip(spans, ewm_stack(close, spans)))
+    lines = np.vstack([E[f] - E[s] for f, s, _ in combos])
+    signal = ewm_stack(lines, [c[2] for c in combos])
+    return lines - signal
+
+
+def ema_cross_grid(close: np.ndarray, pairs: Sequence[Tuple[int, int]]) -> np.ndarray:
+    """(fast, slow) çiftleri için EMA farkı. (K, n)"""
+    spans = sorted({p[0] for p in pairs} | {p[1] for p in pairs})
+    E = dict(zip(spans, ewm_stack(close, spans)))
+    return np.vstack([E[f] - E[s] for f, s in pairs])
+
+
+def regime_grid(df: pd.DataFrame, windows: Sequence[int]) -> np.ndarray:
+    """ta_utils.detect_regime pencere ızgarası. (W, n)"""
+    return np.vstack([ta_utils.detect_regime(df, window=w).to_numpy() for w in windows])
+
+
+# =============================================================
+# Skorlama (tüm konfigürasyonlar vektörel)
+# =============================================================
+
+def periods_per_year(interval: str) -> float:
+    return 365 * 86_400_000 / interval_to_ms(interval)
+
+
+def score_positions(positions: np.ndarray, close: np.ndarray, fee: float = 0.0004,
+                    interval: str = "1h") -> Dict[str, np.ndarray]:
+    """
+    positions: (K, n) ∈ {-1, 0, 1}; t barında alınan pozisyon t+1 getirisini kazanır.
+    fee: pozisyon değişimi başına oran (taker ücreti).
+    """
+    close = np.asarray(close, dtype=float)
+    ret = np.zeros_like(close)
+    ret[1:] = close[1:] / close[:-1] - 1.0
+    pos = np.nan_to_num(np.asarray(positions, dtype=float))
+    prev = np.zeros_like(pos)
+    prev[:, 1:] = pos[:, :-1]
+    turnover = np.abs(pos - prev)
+    pnl = prev * ret[None, :] - fee * turnover
+    equity = np.cumsum(pnl, axis=1)
+    drawdown = equity - np.maximum.accumulate(equity, axis=1)
+    std = pnl.std(axis=1)
+    sharpe = np.where(std > 0, pnl.mean(axis=1) / (std + 1e-12) * math.sqrt(periods_per_year(interval)), 0.0)
+    return {
+        "total_return": equity[:, -1],
+        "sharpe": sharpe,
+        "max_drawdown": drawdown.min(axis=1),
+        "trades": (turnover > 0).sum(axis=1),
+    }
+
+
+def _table(family: str, params: List[Dict[str, Any]], metrics: Dict[str, np.ndarray]) -> pd.DataFrame:
+    df = pd.DataFrame(metrics)
+    df.insert(0, "params", params)
+    df.insert(0, "family", family)
+    return df
+
+
+def default_grid() -> Dict[str, Any]:
+    """CONFIG.TA değerleri etrafında makul bir ızgara."""
+    ta = CONFIG.TA
+    rsi_p = sorted({max(2, ta.RSI_PERIOD + d) for d in (-7, -4, -2, 0, 2, 4, 7, 14)})
+    fast = sorted({max(2, ta.MACD_FAST + d) for d in (-4, -2, 0, 3)})
+    slow = sorted({ta.MACD_SLOW + d for d in (-5, 0, 4, 9)})
+    sig = sorted({max(2, ta.MACD_SIGNAL + d) for d in (-2, 0, 3)})
+    ema_p = sorted(set(ta.EMA_PERIODS) | {10, 20, 50, 100})
+    return {
+        "rsi": rsi_p,
+        "macd": [(f, s, g) for f, s, g in itertools.product(fast, slow, sig) if f < s],
+        "ema": [(a, b) for a, b in itertools.combinations(ema_p, 2)],
+        "regime": sorted({max(10, ta.REGIME_WINDOW + d) for d in (-40, -20, 0, 20, 40)}),
+        "alpha_weights": None,   # bileşen serisi gerektirir (aşağıya bkz.)
+    }
+
+
+def sweep_symbol(df: pd.DataFrame, grid: Optional[Dict[str, Any]] = None, fee: float = 0.0004,
+                 interval: str = "1h", components: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Tek sembol için tüm ızgarayı skorlar; sonuç tablosu döner."""
+    grid = grid or default_grid()
+    close = df["close"].to_numpy(dtype=float)
+    parts: List[pd.DataFrame] = []
+
+    if grid.get("rsi"):
+        r = rsi_grid(close, grid["rsi"])
+        pos = np.where(r < 30, 1.0, np.where(r > 70, -1.0, 0.0))
+        parts.append(_table("rsi", [{"RSI_PERIOD": p} for p in grid["rsi"]],
+                            score_positions(pos, close, fee, interval)))
+    if grid.get("macd"):
+        h = macd_grid(close, grid["macd"])
+        parts.append(_table("macd", [{"MACD_FAST": f, "MACD_SLOW": s, "MACD_SIGNAL": g} for f, s, g in grid["macd"]],
+                            score_positions(np.sign(h), close, fee, interval)))
+    if grid.get("ema"):
+        d = ema_cross_grid(close, grid["ema"])
+        parts.append(_table("ema", [{"EMA_PERIODS": [a, b]} for a, b in grid["ema"]],
+                            score_positions(np.where(d > 0, 1.0, -1.0), close, fee, interval)))
+    if grid.get("regime"):
+        g = regime_grid(df, grid["regime"])
+        parts.append(_table("regime", [{"REGIME_WINDOW": w} for w in grid["regime"]],
+                            score_positions(np.sign(g), close, fee, interval)))
+    if components is not None and grid.get("alpha_weights"):
+        weights, thresholds = grid["alpha_weights"]
+        parts.append(sweep_alpha_weights(components, close, weights, thresholds, fee, interval))
+
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+# =============================================================
+# alpha_ta ağırlık / eşik taraması
+# =============================================================
+
+def alpha_component_series(df: pd.DataFrame, ref_close: Optional[pd.Series] = None,
+                           lookback: int = 200, step: int = 1, start: Optional[int] = None) -> pd.DataFrame:
+    """
+    compute_alpha_ta bileşen skorlarını bar bazında üretir (her bar için son `lookback` bar).
+    Pahalıdır: sonuçları cache'leyin (bkz. alpha_optimizer). step>1 → ara barlar ileri doldurulur.
+    """
+    n = len(df)
+    start = lookback if start is None else max(start, 2)
+    rows = np.full((n, len(ALPHA_COMPONENTS)), np.nan)
+    for t in range(start, n, step):
+        win = df.iloc[max(0, t + 1 - lookback):t + 1]
+        ref = ref_close.iloc[max(0, t + 1 - lookback):t + 1] if ref_close is not None else None
+        d = ta_utils.compute_alpha_ta(win, ref_series=ref).get("detail", {})
+        if d:
+            d = {**d, "leadlag_score": d.get("leadlag", {}).get("score", 0.0)}
+            rows[t] = [d.get(c, 0.0) for c in ALPHA_COMPONENTS]
+    out = pd.DataFrame(rows, index=df.index, columns=list(ALPHA_COMPONENTS))
+    return out.ffill() if step > 1 else out
+
+
+def alpha_positions(components: np.ndarray, weights: np.ndarray,
+                    thresholds: Sequence[Tuple[float, float]]) -> np.ndarray:
+    """
+    components: (n, 5), weights: (G, 5), thresholds: T adet (long, short).
+    Döndürür: (G*T, n) pozisyon matrisi — skorlar tek matris çarpımıyla.
+    """
+    scores = np.clip(np.nan_to_num(components) @ np.asarray(weights, dtype=float).T, -1.0, 1.0).T  # (G, n)
+    th = np.asarray(thresholds, dtype=float)
+    longs = scores[:, None, :] >= th[None, :, 0, None]
+    shorts = scores[:, None, :] <= th[None, :, 1, None]
+    pos = np.where(longs, 1.0, np.where(shorts, -1.0, 0.0))
+    return pos.reshape(-1, scores.shape[1])
+
+
+def sweep_alpha_weights(components: pd.DataFrame, close: np.ndarray, weights: np.ndarray,
+                        thresholds: Sequence[Tuple[float, float]], fee: float = 0.0004,
+                        interval: str = "1h") -> pd.DataFrame:
+    pos = alpha_positions(components[list(ALPHA_COMPONENTS)].to_numpy(), weights, thresholds)
+    params = [
+        {**dict(zip(ALPHA_WEIGHT_FIELDS, map(float, w))),
+         "ALPHA_LONG_THRESHOLD": float(lt), "ALPHA_SHORT_THRESHOLD": float(st)}
+        for w in np.asarray(weights) for lt, st in thresholds
+    ]
+    return _table("alpha_weights", params, score_positions(pos, close, fee, interval))
+
+
+def weight_simplex_grid(step: float = 0.1, k: int = len(ALPHA_COMPONENTS)) -> np.ndarray:
+    """Toplamı 1 olan negatif olmayan ağırlık ızgarası (step çözünürlüğünde)."""
+    m = int(round(1 / step))
+    combos = [c for c in itertools.product(range(m + 1), repeat=k) if sum(c) == m]
+    return np.asarray(combos, dtype=float) / m
+
+
+# =============================================================
+# Çoklu sembol + process pool
+# =============================================================
+
+def _sweep_job(args: Tuple[str, pd.DataFrame, Optional[Dict[str, Any]], float, str]) -> pd.DataFrame:
+    symbol, df, grid, fee, interval = args
+    try:
+        table = sweep_symbol(df, grid, fee=fee, interval=interval)
+    except Exception as e:
+        print(f"[SWEEP ERROR] {symbol}: {e}")
+        return pd.DataFrame()
+    table.insert(0, "symbol", symbol)
+    return table
+
+
+def run_sweep(history: Dict[str, pd.DataFrame], grid: Optional[Dict[str, Any]] = None,
+              processes: Optional[int] = None, fee: float = 0.0004, interval: str = "1h") -> pd.DataFrame:
+    """
+    history: {symbol: OHLCV DataFrame}. Semboller süreçlere dağıtılır.
+    Döndürür: symbol bazında tüm konfigürasyonların tablosu (sharpe'a göre sıralı).
+    """
+    jobs = [(sym, df, grid, fee, interval) for sym, df in history.items()
+            if isinstance(df, pd.DataFrame) and not df.empty]
+    if not jobs:
+        return pd.DataFrame()
+    processes = processes or ta_utils._get_max_workers(default=2)
+    if processes <= 1 or len(jobs) == 1:
+        tables = [_sweep_job(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as ex:
+            tables = list(ex.map(_sweep_job, jobs))
+    table = pd.concat([t for t in tables if not t.empty], ignore_index=True)
+    return table.sort_values("sharpe", ascending=False, ignore_index=True)
+
+
+def summarize(table: pd.DataFrame) -> pd.DataFrame:
+    """Semboller arası ortalama: family + params başına."""
+    if table.empty:
+        return table
+    t = table.assign(key=table["params"].map(lambda p: repr(sorted(p.items()))))
+    agg = t.groupby(["family", "key"], sort=False).agg(
+        params=("params", "first"), symbols=("symbol", "nunique"),
+        sharpe=("sharpe", "mean"), total_return=("total_return", "mean"),
+        max_drawdown=("max_drawdown", "min"), trades=("trades", "sum"),
+    ).reset_index(drop=False).drop(columns="key")
+    return agg.sort_values("sharpe", ascending=False, ignore_index=True)
+
+
+async def load_history(symbols: Iterable[str], interval: str = "1h", limit: int = 1000) -> Dict[str, pd.DataFrame]:
+    """Binance'ten kapanmış bar geçmişi (ta_handler.fetch_ohlcv ile aynı format)."""
+    from utils.binance_api import get_binance_api
+    from utils.ohlcv_buffer import OHLCVRing
+
+    api = get_binance_api()
+    res = await api.fetch_many(api.get_klines, list(symbols), interval=interval, limit=limit)
+    out: Dict[str, pd.DataFrame] = {}
+    for sym, kl in res.items():
+        if isinstance(kl, Exception) or not kl:
+            continue
+        df = OHLCVRing.from_klines(kl[:-1]).frame()  # son bar açık
+        df.attrs.update({"symbol": sym, "interval": interval, "closed": True})
+        out[sym] = df
+    return out
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="TA parametre taraması")
+    ap.add_argument("symbols", nargs="*", default=CONFIG.BINANCE.SCAN_SYMBOLS)
+    ap.add_argument("--interval", default="1h")
+    ap.add_argument("--limit", type=int, default=1000)
+    ap.add_argument("--processes", type=int, default=None)
+    ap.add_argument("--fee", type=float, default=0.0004)
+    ap.add_argument("--top", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    history = asyncio.run(load_history(args.symbols, args.interval, args.limit))
+    table = run_sweep(history, processes=args.processes, fee=args.fee, interval=args.interval)
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(summarize(table).head(args.top).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,12 @@ import pandas as pd
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import asyncio
 import math
+import threading
+from collections import deque
 from typing import Dict, Optional, Tuple
 
 from utils.config import CONFIG
+from utils.indicator_cache import bar_cached, interval_to_ms
 
 # ------------------------------------------------------------
 # İç yardımcılar
@@ -363,45 +366,91 @@ async def calculate_io_functions() -> dict:
     return results
 
 
-def _run_asyncio(coro):
+# Paylaşılan CPU executor (her çağrıda yeni thread havuzu açılmaz)
+_TA_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+def _get_ta_executor() -> ThreadPoolExecutor:
+    global _TA_EXECUTOR
+    if _TA_EXECUTOR is None:
+        _TA_EXECUTOR = ThreadPoolExecutor(max_workers=_get_max_workers(default=2), thread_name_prefix="ta-cpu")
+    return _TA_EXECUTOR
+
+
+async def iter_ta_hybrid(df: pd.DataFrame, max_workers: Optional[int] = None, cpu: bool = True, io: bool = True):
     """
-    Jupyter / Bot / Web server ortamlarında güvenli asyncio çalıştırma.
-    - Çalışan bir loop varsa yeni loop açar.
+    Async generator: her indikatör bittikçe (name, value) üretir.
+      - CPU-bound: executor'da (çağıranın loop'u bloklanmaz)
+      - I/O-bound: çağıranın loop'unda, CPU işleriyle eşzamanlı
+    max_workers verilirse bu çağrıya özel executor açılır, yoksa paylaşılan kullanılır.
+    cpu / io: sadece bir grubu çalıştırmak için (bar cache'i sadece CPU grubunu tutar).
     """
+    loop = asyncio.get_running_loop()
+    own_executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers and cpu else None
+    executor = own_executor or _get_ta_executor()
+
+    futures: Dict[asyncio.Future, Tuple[str, str]] = {}
+    for name, func in (CPU_FUNCTIONS.items() if cpu else ()):
+        # Yan etki oluşturan fonksiyonlara izolasyon
+        arg_df = df.copy(deep=True) if name in MUTATING_FUNCTIONS else df
+        futures[loop.run_in_executor(executor, func, arg_df)] = (name, "CPU")
+    for name, func in (IO_FUNCTIONS.items() if io else ()):
+        futures[asyncio.ensure_future(func())] = (name, "I/O")
+
+    pending = set(futures)
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # yeni event loop oluştur ve orada çalıştır
-            new_loop = asyncio.new_event_loop()
-            try:
-                asyncio.set_event_loop(new_loop)
-                return new_loop.run_until_complete(coro)
-            finally:
-                new_loop.close()
-                asyncio.set_event_loop(loop)
-        else:
-            return loop.run_until_complete(coro)
-    except RuntimeError:
-        # loop yoksa
-        new_loop = asyncio.new_event_loop()
-        try:
-            asyncio.set_event_loop(new_loop)
-            return new_loop.run_until_complete(coro)
-        finally:
-            new_loop.close()
-            asyncio.set_event_loop(None)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                name, kind = futures[fut]
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    res = None
+                    print(f"[{kind} TA ERROR] {name} hesaplanamadı: {e}")
+                yield name, res
+    finally:
+        for fut in pending:
+            fut.cancel()
+        if own_executor is not None:
+            own_executor.shutdown(wait=False)
+
+
+@bar_cached("ta_cpu", ignore=("max_workers",))
+async def _cpu_ta_async(df: pd.DataFrame, max_workers: Optional[int] = None) -> dict:
+    """Sadece CPU indikatörleri — bar anahtarlı cache burada (kapanmış barlar değişmez)."""
+    results: dict = {}
+    async for name, res in iter_ta_hybrid(df, max_workers=max_workers, io=False):
+        results[name] = res
+    return results
 
 
-def calculate_all_ta_hybrid(df: pd.DataFrame, max_workers: Optional[int] = None) -> dict:
+async def calculate_all_ta_hybrid_async(df: pd.DataFrame, max_workers: Optional[int] = None) -> dict:
     """
-    Tüm TA'leri hibrit olarak hesaplar:
-      - CPU-bound: ThreadPoolExecutor
-      - I/O-bound: asyncio
+    calculate_all_ta_hybrid'in async sürümü; bot handler'larından bunu await edin.
+    CPU indikatörleri bar cache'inden (aynı kapanmış bar → tekrar hesap yok); IO_FUNCTIONS (ağ)
+    her çağrıda taze çekilir — bar süresince (1d'de bir gün) donmuş değer dönmez.
     Dönen sonuç: { indicator_name: value_or_series_or_df }
     """
-    cpu_results = calculate_cpu_functions(df, max_workers=max_workers)
-    io_results = _run_asyncio(calculate_io_functions())
-    return {**cpu_results, **io_results}
+    async def io_part() -> dict:
+        return {name: res async for name, res in iter_ta_hybrid(df, cpu=False)}
+
+    cpu_res, io_res = await asyncio.gather(_cpu_ta_async(df, max_workers=max_workers), io_part())
+    return {**cpu_res, **io_res}
+
+
+def calculate_all_ta_hybrid(df: pd.DataFrame, max_workers: Optional[int] = None) -> dict:
+    """
+    Senkron ince sarmalayıcı (shim). Çalışan bir loop içinden çağrılırsa
+    iç içe loop açmaz; işi ayrı bir thread'deki kendi loop'unda yürütür.
+    Async koddan calculate_all_ta_hybrid_async kullanın.
+    """
+    coro = calculate_all_ta_hybrid_async(df, max_workers=max_workers)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
 
 
 # =============================================================
@@ -416,40 +465,229 @@ def calculate_all_ta_hybrid(df: pd.DataFrame, max_workers: Optional[int] = None)
 # =============================================================
 
 # --- 1) Kalman: 1D random-walk
-def kalman_filter_series(prices: pd.Series, q: Optional[float] = None, r: Optional[float] = None) -> pd.Series:
-    """
-    Minimal 1D random-walk Kalman.
-    Q: process noise, R: measurement noise (CONFIG.TA'dan gelir)
-    """
+# Q/R sabit olduğunda kazanç dizisi veriden bağımsızdır ve kararlı duruma
+# (steady-state) yakınsar. Geçiş bölümünün kazançları Riccati (Möbius) özyinelemesinin
+# kapalı formuyla, filtre değerleri cumprod ile vektörel hesaplanır; kalan kısım
+# sabit kazançlı EWM'dir: x_t = (1-k) x_{t-1} + k z_t.
+# KalmanState: (sembol, interval) başına kalıcı durum — alpha_ta ilk çağrıda geçmişle ısıtır,
+# kapanan barlar (kline_pipeline) O(1) ilerletir; sonraki çağrılar tüm seriyi yeniden filtrelemez.
+
+_KALMAN_TOL = 1e-9     # kazanç yakınsama toleransı (göreli)
+_KALMAN_TAIL = 64      # durumda tutulan son filtre değerleri (kf_score için ≥ 21)
+
+
+def _kalman_params(q: Optional[float], r: Optional[float]) -> Tuple[float, float]:
     if q is None:
         q = getattr(CONFIG.TA, "KALMAN_Q", 1e-5)
     if r is None:
         r = getattr(CONFIG.TA, "KALMAN_R", 1e-2)
+    return float(q), float(r)
+
+
+def kalman_steady_state(q: float, r: float) -> Tuple[float, float]:
+    """Riccati çözümü: (k_ss, p_ss) — p_ss güncelleme sonrası varyans."""
+    p_prior = (q + math.sqrt(q * q + 4.0 * q * r)) / 2.0
+    k = p_prior / (p_prior + r)
+    return k, (1.0 - k) * p_prior
+
+
+def kalman_gain_sequence(q: float, r: float, n: int, p0: float = 1.0,
+                         tol: float = _KALMAN_TOL) -> Tuple[np.ndarray, float]:
+    """
+    Geçiş (transient) kazanç dizisi; |k_t - k_ss| <= tol * k_ss olunca durur.
+    Önsel varyans s_{t+1} = s_t r / (s_t + r) + q bir Möbius dönüşümü: sabit noktalar s± için
+    (s_t - s+) / (s_t - s-) = K^t (s_1 - s+) / (s_1 - s-), K = (s- + r) / (s+ + r) → döngüsüz.
+    Döndürür: (gains, p_last) — len(gains) <= n, p_last son adımın sonsal varyansı.
+    """
+    if n <= 0:
+        return np.empty(0, dtype=float), p0
+    k_ss, _ = kalman_steady_state(q, r)
+    s1 = p0 + q
+    root = math.sqrt(q * q + 4.0 * q * r)
+    s_hi, s_lo = (q + root) / 2.0, (q - root) / 2.0
+    if q <= 0:
+        # q=0: kazanç sıfıra gider (kararlı durum yok) → doğrudan özyineleme
+        s = np.empty(n)
+        s[0] = s1
+        for i in range(1, n):
+            s[i] = s[i - 1] * r / (s[i - 1] + r)
+    else:
+        K = (s_lo + r) / (s_hi + r)
+        z = ((s1 - s_hi) / (s1 - s_lo)) * K ** np.arange(n, dtype=float)
+        s = (s_hi - z * s_lo) / (1.0 - z)
+    gains = s / (s + r)
+    done = np.flatnonzero(np.abs(gains - k_ss) <= tol * k_ss)
+    t = int(done[0]) + 1 if len(done) else n
+    gains = gains[:t]
+    return gains, float((1.0 - gains[-1]) * s[t - 1])
+
+
+def _kalman_transient(vals: np.ndarray, gains: np.ndarray, x0: float) -> np.ndarray:
+    """x_i = (1-g_i) x_{i-1} + g_i z_i, vektörel: A_i = Π(1-g) ile x_i = A_i (x0 + Σ g_j z_j / A_j)."""
+    a = np.cumprod(1.0 - gains)
+    if not len(a) or a[-1] < 1e-200:
+        out = np.empty(len(gains))
+        x = x0
+        for i in range(len(gains)):
+            x = x + gains[i] * (vals[i] - x)
+            out[i] = x
+        return out
+    return a * (x0 + np.cumsum(gains * vals[:len(gains)] / a))
 
-    x = 0.0
-    p = 1.0
-    out = []
-    initialized = False
-
-    vals = prices.fillna(method="ffill").values
-    for z in vals:
-        z = float(z)
-        if not initialized:
-            x = z
-            initialized = True
-
-        # predict
-        x_prior = x
-        p_prior = p + q
-
-        # update
-        k = p_prior / (p_prior + r)
-        x = x_prior + k * (z - x_prior)
-        p = (1 - k) * p_prior
-        out.append(x)
+
+def kalman_filter_series(prices: pd.Series, q: Optional[float] = None, r: Optional[float] = None) -> pd.Series:
+    """
+    Minimal 1D random-walk Kalman.
+    Q: process noise, R: measurement noise (CONFIG.TA'dan gelir)
+    Geçiş kazançları birebir (kapalı form), sonrası steady-state EWM (vektörel).
+    """
+    q, r = _kalman_params(q, r)
+    vals = prices.ffill().to_numpy(dtype=float)
+    n = len(vals)
+    if n == 0:
+        return pd.Series([], index=prices.index, name="kalman", dtype=float)
+
+    gains, _ = kalman_gain_sequence(q, r, n)
+    t = len(gains)
+    out = np.empty(n, dtype=float)
+    out[:t] = _kalman_transient(vals, gains, vals[0])
+    if t < n:
+        k_ss, _ = kalman_steady_state(q, r)
+        tail = pd.Series(np.concatenate(([out[t - 1]], vals[t:])))
+        out[t:] = tail.ewm(alpha=k_ss, adjust=False).mean().to_numpy()[1:]
     return pd.Series(out, index=prices.index, name="kalman")
 
 
+class KalmanState:
+    """
+    Sembol/interval başına kalıcı Kalman durumu: kapanan her bar için O(1) güncelleme.
+    Aynı open_time ikinci kez gelirse yok sayılır (WS tekrarları); bar atlanırsa durum
+    geçersizlenir (x=None) ve bir sonraki sync() geçmişten yeniden ısıtır.
+    """
+    __slots__ = ("q", "r", "step_ms", "x", "p", "last_open_time", "_tail_t", "_tail_x", "lock")
+
+    def __init__(self, step_ms: int = 0, q: Optional[float] = None, r: Optional[float] = None):
+        self.q, self.r = _kalman_params(q, r)
+        self.step_ms = int(step_ms)
+        self.x: Optional[float] = None
+        self.p = 1.0
+        self.last_open_time: Optional[int] = None
+        self._tail_t: deque = deque(maxlen=_KALMAN_TAIL)
+        self._tail_x: deque = deque(maxlen=_KALMAN_TAIL)
+        self.lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.x is not None
+
+    def update(self, z: float, open_time: Optional[int] = None) -> Optional[float]:
+        if self.x is None:
+            return None   # ısıtılmamış: tek bardan başlamak yerine sync() geçmişle başlatır
+        if open_time is not None and self.last_open_time is not None:
+            if open_time <= self.last_open_time:
+                return self.x
+            if self.step_ms and open_time != self.last_open_time + self.step_ms:
+                self.x = None   # bar atlandı
+                return None
+        p_prior = self.p + self.q
+        k = p_prior / (p_prior + self.r)
+        self.x = self.x + k * (float(z) - self.x)
+        self.p = (1 - k) * p_prior
+        self.last_open_time = open_time
+        self._tail_t.append(open_time)
+        self._tail_x.append(self.x)
+        return self.x
+
+    def seed(self, prices: pd.Series, open_times: Optional[np.ndarray] = None) -> pd.Series:
+        """Geçmişle ısıt: vektörel filtreyi çalıştırıp son durumu alır. Döndürür: filtre serisi."""
+        kf = kalman_filter_series(prices, self.q, self.r)
+        n = len(kf)
+        self._tail_t.clear()
+        self._tail_x.clear()
+        if not n or not np.isfinite(kf.iloc[-1]):
+            self.x = None
+            return kf
+        gains, p = kalman_gain_sequence(self.q, self.r, n)
+        self.x = float(kf.iloc[-1])
+        self.p = p if len(gains) == n else kalman_steady_state(self.q, self.r)[1]
+        m = min(n, _KALMAN_TAIL)
+        times = open_times[-m:] if open_times is not None else [None] * m
+        self._tail_t.extend(int(t) if t is not None else None for t in times)
+        self._tail_x.extend(kf.to_numpy()[-m:])
+        self.last_open_time = int(open_times[-1]) if open_times is not None else None
+        return kf
+
+    def sync(self, prices: pd.Series, open_times: np.ndarray) -> Optional[pd.Series]:
+        """
+        Kapanmış bar çerçevesiyle hizala: durum geride ise yeni barlar O(1) eklenir, hiç yoksa / çerçevede
+        bulunamıyorsa geçmişten ısıtılır. Döndürür: prices indeksinde filtre serisi (ısıtma dışında sadece
+        son _KALMAN_TAIL değer dolu, öncesi NaN); çerçeve durumdan eskiyse None (durum değişmez).
+        """
+        n = len(prices)
+        if n == 0:
+            return None
+        last = int(open_times[-1])
+        if self.x is not None and self.last_open_time is not None:
+            if last < self.last_open_time:
+                return None
+            pos = int(np.searchsorted(open_times, self.last_open_time))
+            if pos < n and int(open_times[pos]) == self.last_open_time and n - 1 - pos <= _KALMAN_TAIL:
+                vals = prices.to_numpy(dtype=float)
+                for i in range(pos + 1, n):
+                    if self.update(vals[i], int(open_times[i])) is None:
+                        break
+                if self.x is not None and self.last_open_time == last:
+                    return self._aligned(prices, open_times)
+        return self.seed(prices, open_times)
+
+    def _aligned(self, prices: pd.Series, open_times: np.ndarray) -> pd.Series:
+        out = np.full(len(prices), np.nan)
+        tail_t = np.fromiter(self._tail_t, dtype=np.int64, count=len(self._tail_t))
+        idx = np.searchsorted(open_times, tail_t)
+        ok = (idx < len(open_times)) & (open_times[np.minimum(idx, len(open_times) - 1)] == tail_t)
+        out[idx[ok]] = np.fromiter(self._tail_x, dtype=float, count=len(self._tail_x))[ok]
+        return pd.Series(out, index=prices.index, name="kalman")
+
+
+_KALMAN_STATES: Dict[Tuple[str, str], KalmanState] = {}
+_KALMAN_LOCK = threading.Lock()
+
+
+def get_kalman_state(symbol: str, interval: str, create: bool = True) -> Optional[KalmanState]:
+    key = (symbol.upper(), interval)
+    st = _KALMAN_STATES.get(key)
+    if st is None and create:
+        with _KALMAN_LOCK:
+            st = _KALMAN_STATES.get(key)
+            if st is None:
+                st = _KALMAN_STATES[key] = KalmanState(interval_to_ms(interval))
+    return st
+
+
+def update_kalman_state(symbol: str, interval: str, close: float, open_time: Optional[int] = None) -> Optional[float]:
+    """Kapanan bar (kline_pipeline); sadece alpha_ta'nın ısıttığı durumlar ilerler. Güncel filtre değeri."""
+    st = get_kalman_state(symbol, interval, create=False)
+    if st is None:
+        return None
+    with st.lock:
+        return st.update(close, open_time)
+
+
+def kalman_for_frame(df: pd.DataFrame, px: pd.Series) -> pd.Series:
+    """
+    Kapanmış bar çerçevesi (attrs symbol/interval/closed + open_time) → kalıcı durumdan filtre;
+    aksi halde (kısmi bar, attrs yok, durumdan eski çerçeve) tüm seri üzerinde vektörel filtre.
+    """
+    symbol, interval = df.attrs.get("symbol"), df.attrs.get("interval")
+    if symbol and interval and df.attrs.get("closed") and "open_time" in df.columns and len(px):
+        st = get_kalman_state(str(symbol), str(interval))
+        with st.lock:
+            kf = st.sync(px, df["open_time"].to_numpy(dtype=np.int64))
+        if kf is not None:
+            return kf
+    return kalman_filter_series(px)
+
+
 # --- 2) Hilbert: amp & inst_freq (SciPy varsa onu, yoksa FFT fallback)
 def _hilbert_fallback(x: np.ndarray) -> np.ndarray:
     n = len(x)
@@ -478,27 +716,100 @@ def hilbert_features(prices: pd.Series) -> dict:
 
 
 # --- 3) Entropy measures (ApEn, SampEn, Permutation)
-def _phi(m: int, r: float, series: np.ndarray) -> float:
+# n×n×m mesafe tensörü kurulmaz: şablonlar ilk koordinata göre sıralanır,
+# her sorgu bloğu için sadece |x0_i - x0_j| <= r aralığındaki adaylar
+# (searchsorted) ENTROPY_BLOCK × ENTROPY_BLOCK karolar halinde taranır.
+# Bellek O(n + block^2); n'den bağımsız olarak sınırlı kalır.
+#
+# Yaklaşık mod (max_templates = k > 0): sayım yalnızca rastgele seçilen k
+# sorgu şablonu için yapılır (aday kümesi tam kalır). Her c_i/N ∈ [0, 1]
+# olduğundan Hoeffding ile, 1-δ olasılıkla:
+#   - SampEn eşleşme oranları (B/N², A/N²): |p̂ - p| <= sqrt(ln(2/δ) / (2k))
+#   - ApEn phi (log C_i ∈ [-ln N, 0]):     |φ̂ - φ| <= ln(N) * sqrt(ln(2/δ) / (2k))
+# Örn. k=500, δ=0.05 → oran hatası <= ~0.061. Maliyet O(k·n) yerine O(n²).
+
+def _embed(s: np.ndarray, m: int) -> np.ndarray:
+    """(n-m+1, m) boyutlu, kopyasız gömme (delay embedding) görünümü."""
+    return np.lib.stride_tricks.sliding_window_view(s, m)
+
+
+def _radius_counts(x: np.ndarray, r: float, rows: Optional[np.ndarray] = None,
+                   block: Optional[int] = None) -> np.ndarray:
+    """
+    Chebyshev mesafesi <= r olan şablon sayısı (kendisi dahil).
+    rows verilirse sadece o satırlar için sayar (yaklaşık mod).
+    """
+    block = max(1, int(block or getattr(CONFIG.TA, "ENTROPY_BLOCK", 256)))
+    m = x.shape[1]
+    order = np.argsort(x[:, 0], kind="stable")
+    xs = np.ascontiguousarray(x[order])
+    key = xs[:, 0]
+
+    q = xs if rows is None else np.ascontiguousarray(x[rows])
+    q_order = np.arange(len(q)) if rows is None else np.argsort(q[:, 0], kind="stable")
+    qs = q if rows is None else q[q_order]
+
+    counts = np.zeros(len(q), dtype=np.int64)
+    for start in range(0, len(qs), block):
+        qb = qs[start:start + block]
+        lo = int(np.searchsorted(key, qb[0, 0] - r, side="left"))
+        hi = int(np.searchsorted(key, qb[-1, 0] + r, side="right"))
+        acc = np.zeros(len(qb), dtype=np.int64)
+        for j0 in range(lo, hi, block):
+            xb = xs[j0:min(j0 + block, hi)]
+            mask = np.abs(qb[:, None, 0] - xb[None, :, 0]) <= r
+            for k in range(1, m):
+                mask &= np.abs(qb[:, None, k] - xb[None, :, k]) <= r
+            acc += mask.sum(axis=1)
+        counts[q_order[start:start + block]] = acc
+    return counts
+
+
+def _sample_rows(n_rows: int, max_templates: int) -> Optional[np.ndarray]:
+    # Deterministik örnekleme: aynı seri → aynı sonuç
+    if max_templates <= 0 or max_templates >= n_rows:
+        return None
+    rng = np.random.default_rng(0)
+    return np.sort(rng.choice(n_rows, size=max_templates, replace=False))
+
+
+def _resolve_max_templates(max_templates: Optional[int]) -> int:
+    if max_templates is None:
+        max_templates = getattr(CONFIG.TA, "ENTROPY_MAX_TEMPLATES", 0)
+    return int(max_templates or 0)
+
+
+def _phi(m: int, r: float, series: np.ndarray, max_templates: int = 0) -> float:
     n = len(series)
     if n <= m + 1:
         return np.inf
-    x = np.array([series[i:i+m] for i in range(n - m + 1)])
-    # pairwise Chebyshev distances
-    d = np.max(np.abs(x[:, None, :] - x[None, :, :]), axis=2)
-    C = (d <= r).sum(axis=1) / (n - m + 1)
+    x = _embed(series, m)
+    rows = _sample_rows(len(x), max_templates)
+    C = _radius_counts(x, r, rows=rows) / (n - m + 1)
     C = C[C > 0]
     return np.sum(np.log(C)) / (len(C) + 1e-12) if len(C) else np.inf
 
-def approximate_entropy(series: pd.Series, m: Optional[int] = None, r: Optional[float] = None) -> float:
+def approximate_entropy(series: pd.Series, m: Optional[int] = None, r: Optional[float] = None,
+                        max_templates: Optional[int] = None) -> float:
+    """
+    Approximate Entropy (ApEn). max_templates > 0 → örneklemeli yaklaşık mod
+    (hata sınırı yukarıda); None → CONFIG.TA.ENTROPY_MAX_TEMPLATES.
+    """
     s = series.dropna().values.astype(float)
     if len(s) < 5:
         return np.nan
     m = CONFIG.TA.ENTROPY_M if m is None else m
     if r is None:
         r = CONFIG.TA.ENTROPY_R_FACTOR * np.std(s)
-    return float(_phi(m, r, s) - _phi(m+1, r, s))
+    k = _resolve_max_templates(max_templates)
+    return float(_phi(m, r, s, k) - _phi(m+1, r, s, k))
 
-def sample_entropy(series: pd.Series, m: Optional[int] = None, r: Optional[float] = None) -> float:
+def sample_entropy(series: pd.Series, m: Optional[int] = None, r: Optional[float] = None,
+                   max_templates: Optional[int] = None) -> float:
+    """
+    Sample Entropy (SampEn). max_templates > 0 → örneklemeli yaklaşık mod
+    (hata sınırı yukarıda); None → CONFIG.TA.ENTROPY_MAX_TEMPLATES.
+    """
     s = series.dropna().values.astype(float)
     if len(s) < 5:
         return np.nan
@@ -506,32 +817,139 @@ def sample_entropy(series: pd.Series, m: Optional[int] = None, r: Optional[float
     if r is None:
         r = CONFIG.TA.ENTROPY_R_FACTOR * np.std(s)
     n = len(s)
-    xm = np.array([s[i:i+m] for i in range(n-m)])
-    xm1 = np.array([s[i:i+m+1] for i in range(n-m-1)])
-    def count_sim(x, tol):
-        d = np.max(np.abs(x[:, None, :] - x[None, :, :]), axis=2)
-        return (d <= tol).sum() - len(x)
-    B = count_sim(xm, r)
-    A = count_sim(xm1, r)
+    xm = _embed(s, m)[:n-m]
+    xm1 = _embed(s, m+1)[:n-m-1]
+    if len(xm1) < 1:
+        return np.nan
+    # Aynı sorgu şablonları hem m hem m+1 için kullanılır (oran tutarlılığı)
+    rows = _sample_rows(len(xm1), _resolve_max_templates(max_templates))
+    if rows is None:
+        B = int(_radius_counts(xm, r).sum()) - len(xm)
+        A = int(_radius_counts(xm1, r).sum()) - len(xm1)
+    else:
+        k = len(rows)
+        B = (_radius_counts(xm, r, rows=rows).sum() - k) * (len(xm) / k)
+        A = (_radius_counts(xm1, r, rows=rows).sum() - k) * (len(xm1) / k)
     if B <= 0 or A <= 0:
         return np.nan
     return float(-np.log(A / B))
 
+def _lehmer_codes(windows: np.ndarray) -> np.ndarray:
+    """
+    (N, m) pencerelerin ordinal desenlerini [0, m!) aralığında tamsayıya
+    (Lehmer kodu) çevirir: tek argsort + tek karşılaştırma tensörü (N×m×m).
+    """
+    m = windows.shape[1]
+    perm = np.argsort(windows, axis=1, kind="stable")
+    # L_i = #{j > i : perm_j < perm_i}
+    upper = np.triu(np.ones((m, m), dtype=bool), k=1)
+    lehmer = ((perm[:, :, None] > perm[:, None, :]) & upper).sum(axis=2)
+    weights = np.array([math.factorial(m - 1 - i) for i in range(m)], dtype=np.int64)
+    return lehmer.astype(np.int64) @ weights
+
 def permutation_entropy(series: pd.Series, m: Optional[int] = None) -> float:
     s = series.dropna().values.astype(float)
     m = 3 if m is None else m
     if len(s) < m:
         return np.nan
-    patterns = {}
-    for i in range(len(s) - m + 1):
-        pat = tuple(np.argsort(s[i:i+m]))
-        patterns[pat] = patterns.get(pat, 0) + 1
-    p = np.array(list(patterns.values()), dtype=float)
+    codes = _lehmer_codes(np.lib.stride_tricks.sliding_window_view(s, m))
+    counts = np.bincount(codes, minlength=math.factorial(m))
+    p = counts[counts > 0].astype(float)
     p /= p.sum()
     return float(-np.sum(p * np.log(p + 1e-12)) / np.log(math.factorial(m)))
 
 
+class RollingPermutationEntropy:
+    """
+    Kayan pencereli permutation entropy; her yeni bar O(m log m).
+    Desen sayıları ve S = Σ c·ln(c) artımlı tutulur: H = ln(W) - S/W.
+    window=None → kümülatif (tüm geçmiş); kodlar saklanmaz, sadece sayılar (bellek sabit).
+    """
+    __slots__ = ("m", "window", "_vals", "_codes", "_counts", "_total", "_slog", "_weights")
+
+    def __init__(self, m: Optional[int] = None, window: Optional[int] = None):
+        self.m = 3 if m is None else m
+        self.window = window
+        self._vals = deque(maxlen=self.m)
+        self._codes = deque()   # sadece pencere varken (düşülecek kodlar)
+        self._counts = np.zeros(math.factorial(self.m), dtype=np.int64)
+        self._total = 0
+        self._slog = 0.0
+        self._weights = np.array([math.factorial(self.m - 1 - i) for i in range(self.m)], dtype=np.int64)
+
+    @staticmethod
+    def _clogc(c: int) -> float:
+        return c * math.log(c) if c > 0 else 0.0
+
+    def _bump(self, code: int, delta: int) -> None:
+        c = int(self._counts[code])
+        self._slog += self._clogc(c + delta) - self._clogc(c)
+        self._counts[code] = c + delta
+
+    def update(self, value: float) -> float:
+        """Yeni kapanışı ekler, güncel normalize entropiyi döner (yetersiz veri → nan)."""
+        self._vals.append(float(value))
+        if len(self._vals) == self.m:
+            perm = np.argsort(np.fromiter(self._vals, dtype=float, count=self.m), kind="stable")
+            lehmer = (perm[:, None] > perm[None, :]) & np.triu(np.ones((self.m, self.m), dtype=bool), k=1)
+            code = int(lehmer.sum(axis=1) @ self._weights)
+            self._bump(code, +1)
+            self._total += 1
+            if self.window is not None:
+                self._codes.append(code)
+                if len(self._codes) > self.window:
+                    self._bump(self._codes.popleft(), -1)
+                    self._total -= 1
+        return self.value
+
+    def extend(self, values) -> float:
+        for v in values:
+            self.update(v)
+        return self.value
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts.copy()
+
+    @property
+    def value(self) -> float:
+        w = self._total
+        if w == 0:
+            return np.nan
+        h = math.log(w) - self._slog / w
+        return float(max(h, 0.0) / math.log(math.factorial(self.m)))
+
+
 # --- 4) Rejim tespiti (heuristic trendiness skoru)
+def rolling_slope(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Kayan pencerede lineer trend eğimi (np.polyfit(idx, x, 1)[0] ile aynı),
+    prefix-sum ile O(n). İlk window-1 değer nan.
+    NaN içeren pencereler nan (rolling(window).apply ile aynı); NaN sonraki pencerelere taşmaz.
+    """
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if window < 2 or n < window:
+        return out
+    valid = np.isfinite(x)
+    if not valid.any():
+        return out
+    # NaN'lar 0 olarak toplanır, pencere başına geçerli sayı ayrıca tutulur
+    xc = np.where(valid, x - np.mean(x[valid]), 0.0)  # eğim sabit kaymaya duyarsız; sayısal kararlılık
+    k = np.arange(n, dtype=float)
+    cs = np.concatenate(([0.0], np.cumsum(xc)))
+    cks = np.concatenate(([0.0], np.cumsum(k * xc)))
+    cnt = np.concatenate(([0], np.cumsum(valid)))
+    s_x = cs[window:] - cs[:-window]
+    s_kx = cks[window:] - cks[:-window]
+    full = (cnt[window:] - cnt[:-window]) == window
+    start = np.arange(n - window + 1, dtype=float)
+    jbar = (window - 1) / 2.0
+    s_jj = window * (window * window - 1) / 12.0
+    out[window - 1:] = np.where(full, (s_kx - (start + jbar) * s_x) / s_jj, np.nan)
+    return out
+
 def detect_regime(df: pd.DataFrame, window: Optional[int] = None) -> pd.Series:
     """
     Basit rejim skoru: trendiness ~ trend_z - penalty(vol_z)
@@ -544,11 +962,7 @@ def detect_regime(df: pd.DataFrame, window: Optional[int] = None) -> pd.Series:
     ret = px.pct_change()
     vol = ret.rolling(window).std()
     # pencere içinde lineer trend eğimi
-    def slope(x):
-        idx = np.arange(len(x))
-        b, a = np.polyfit(idx, x, 1)
-        return b
-    trend = px.rolling(window).apply(slope, raw=True)
+    trend = pd.Series(rolling_slope(px.to_numpy(), window), index=px.index)
     # normalize (robust-ish)
     def zscore(s):
         m = s.rolling(window).mean()
@@ -561,46 +975,142 @@ def detect_regime(df: pd.DataFrame, window: Optional[int] = None) -> pd.Series:
 
 
 # --- 5) Lead-Lag: max xcorr lag (opsiyonel referans)
+# Tüm gecikmeler tek FFT ile: çapraz çarpım toplamları rfft/irfft'ten,
+# her gecikmenin örtüşen segment ortalama/varyansı prefix-sum'lardan gelir.
+# Böylece sonuç her gecikme için np.corrcoef ile birebir aynıdır.
+
+_LEADLAG_EMPTY = {"lag": 0, "corr": 0.0, "score": 0.0}
+
+
+def _returns(series: pd.Series) -> np.ndarray:
+    return series.pct_change().dropna().to_numpy(dtype=float)
+
+
+def _xcorr_lags(X: np.ndarray, y: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    X: (N, L) hedef getirileri, y: (L,) referans.
+    Döndürür: (N, 2*max_lag+1) Pearson korelasyonları, sütunlar lag=-max_lag..max_lag
+    (lag>0: corr(x[lag:], y[:-lag]); lag<0: corr(x[:lag], y[-lag:])). Tanımsız → nan.
+    """
+    N, L = X.shape
+    # Pearson afine dönüşüme duyarsız: bir kez standardize et (sayısal kararlılık)
+    X = (X - X.mean(axis=1, keepdims=True)) / (X.std(axis=1, keepdims=True) + 1e-300)
+    y = (y - y.mean()) / (y.std() + 1e-300)
+
+    nfft = 1 << int(2 * L - 1).bit_length()
+    cross = np.fft.irfft(np.fft.rfft(X, nfft, axis=1) * np.conj(np.fft.rfft(y, nfft))[None, :], nfft, axis=1)
+
+    zero = np.zeros((N, 1))
+    cx = np.hstack([zero, np.cumsum(X, axis=1)])
+    cxx = np.hstack([zero, np.cumsum(X * X, axis=1)])
+    cy = np.concatenate([[0.0], np.cumsum(y)])
+    cyy = np.concatenate([[0.0], np.cumsum(y * y)])
+
+    lags = np.arange(-max_lag, max_lag + 1)
+    n = (L - np.abs(lags)).astype(float)
+    # x segmenti [xs, xs+n), y segmenti [ys, ys+n)
+    xs = np.where(lags > 0, lags, 0)
+    ys = np.where(lags < 0, -lags, 0)
+    sxy = cross[:, lags % nfft]
+    sx = cx[:, xs + n.astype(int)] - cx[:, xs]
+    sxx = cxx[:, xs + n.astype(int)] - cxx[:, xs]
+    sy = cy[ys + n.astype(int)] - cy[ys]
+    syy = cyy[ys + n.astype(int)] - cyy[ys]
+
+    cov = sxy - sx * sy / n
+    vx = sxx - sx * sx / n
+    vy = syy - sy * sy / n
+    tiny = 1e-10 * n
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.sqrt(vx * vy)
+    corr[(vx <= tiny) | (vy <= tiny)[None, :].repeat(N, axis=0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _best_lag(corr_row: np.ndarray, max_lag: int) -> dict:
+    a = np.where(np.isfinite(corr_row), np.abs(corr_row), 0.0)
+    i = int(np.argmax(a))
+    if a[i] <= 0.0:
+        return dict(_LEADLAG_EMPTY)
+    best_corr = float(corr_row[i])
+    return {"lag": i - max_lag, "corr": best_corr, "score": float(np.tanh(best_corr))}
+
+
+def leadlag_xcorr_batch(targets: Dict[str, pd.Series], reference: pd.Series,
+                        max_lag: Optional[int] = None) -> Dict[str, dict]:
+    """
+    Tüm evren için referansa (örn. BTC) karşı lead-lag: sembol başına {lag, corr, score}.
+    Getiriler bir kez hesaplanır; aynı uzunluktaki seriler tek FFT çağrısında işlenir.
+    """
+    max_lag = CONFIG.TA.LEADLAG_MAX_LAG if max_lag is None else max_lag
+    y_full = _returns(reference)
+    out: Dict[str, dict] = {}
+    groups: Dict[int, list] = {}
+    for sym, s in targets.items():
+        x = _returns(s)
+        L = min(len(x), len(y_full))
+        if L < max_lag + 5:
+            out[sym] = dict(_LEADLAG_EMPTY)
+            continue
+        groups.setdefault(L, []).append((sym, x[-L:]))
+    for L, items in groups.items():
+        X = np.vstack([x for _, x in items])
+        corr = _xcorr_lags(X, y_full[-L:], max_lag)
+        for (sym, _), row in zip(items, corr):
+            out[sym] = _best_lag(row, max_lag)
+    return out
+
+
 def leadlag_xcorr(target: pd.Series, reference: pd.Series, max_lag: Optional[int] = None) -> dict:
     """
     target ve reference getirileri arasında [-max_lag, max_lag] gecikmede
     maksimum korelasyonu bulur. Skoru [-1,1]'e sıkıştırır.
     """
+    return leadlag_xcorr_batch({"_": target}, reference, max_lag=max_lag)["_"]
+
+
+def leadlag_matrix(series: Dict[str, pd.Series], max_lag: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Evren için tam ikili lead-lag matrisi (ortak son L getiri üzerinde).
+    Döndürür: {"lag": DataFrame, "corr": DataFrame}; satır=hedef, sütun=referans.
+    lag > 0 → satırdaki sembol sütundakini lag bar geriden takip ediyor.
+    """
     max_lag = CONFIG.TA.LEADLAG_MAX_LAG if max_lag is None else max_lag
-    x = target.pct_change().dropna().values
-    y = reference.pct_change().dropna().values
-    L = min(len(x), len(y))
-    if L < max_lag + 5:
-        return {"lag": 0, "corr": 0.0, "score": 0.0}
-    x = x[-L:]; y = y[-L:]
-    best_corr, best_lag = 0.0, 0
-    for lag in range(-max_lag, max_lag+1):
-        if lag < 0:
-            corr = np.corrcoef(x[:lag], y[-lag:])[0,1]
-        elif lag > 0:
-            corr = np.corrcoef(x[lag:], y[:-lag])[0,1]
-        else:
-            corr = np.corrcoef(x, y)[0,1]
-        if np.isfinite(corr) and abs(corr) > abs(best_corr):
-            best_corr, best_lag = float(corr), lag
-    score = float(np.tanh(best_corr))  # [-1,1]
-    return {"lag": int(best_lag), "corr": float(best_corr), "score": score}
+    rets = {sym: _returns(s) for sym, s in series.items()}
+    syms = [s for s, r in rets.items() if len(r) >= max_lag + 5]
+    lag_df = pd.DataFrame(0, index=syms, columns=syms, dtype=int)
+    corr_df = pd.DataFrame(0.0, index=syms, columns=syms)
+    if not syms:
+        return {"lag": lag_df, "corr": corr_df}
+    L = min(len(rets[s]) for s in syms)
+    X = np.vstack([rets[s][-L:] for s in syms])
+    for j, ref in enumerate(syms):
+        corr = _xcorr_lags(X, X[j], max_lag)
+        for i, sym in enumerate(syms):
+            best = _best_lag(corr[i], max_lag)
+            lag_df.iat[i, j] = best["lag"]
+            corr_df.iat[i, j] = best["corr"]
+    return {"lag": lag_df, "corr": corr_df}
 
 
 # --- 6) Birleşik skorlayıcı + sinyal
-def compute_alpha_ta(df: pd.DataFrame, ref_series: Optional[pd.Series] = None) -> dict:
+def compute_alpha_ta(df: pd.DataFrame, ref_series: Optional[pd.Series] = None,
+                     leadlag: Optional[dict] = None) -> dict:
     """
+    leadlag: önceden (toplu) hesaplanmış {lag, corr, score}; verilirse ref_series kullanılmaz.
     Döndürür:
       {
         "score": float in [-1,1],
         "detail": {...},
         "series": {"kalman": Series, "regime_score": Series}
       }
+    Kapanmış bar çerçevesinde (attrs symbol/interval/closed) Kalman kalıcı durumdan gelir:
+    series["kalman"] ilk çağrıda tam seri, sonrakilerde sadece son _KALMAN_TAIL değer (öncesi NaN).
     """
     try:
         px = df["close"].astype(float)
-        # Kalman
-        kf = kalman_filter_series(px)
+        # Kalman (canlı sembol/interval için kalıcı durumdan; seri sadece son _KALMAN_TAIL değer olabilir)
+        kf = kalman_for_frame(df, px)
         kf_err = (px - kf).rolling(20).std()
         kf_score = float(np.tanh((kf.diff().iloc[-1]) / (float(kf_err.iloc[-1]) + 1e-9))) if len(kf) > 21 else 0.0
 
@@ -628,7 +1138,10 @@ def compute_alpha_ta(df: pd.DataFrame, ref_series: Optional[pd.Series] = None) -
         regime_score = float(np.clip(reg.iloc[-1] if len(reg) else 0.0, -1.0, 1.0))
 
         # Lead-Lag (opsiyonel)
-        if isinstance(ref_series, pd.Series) and len(ref_series) >= len(px)//2:
+        if leadlag is not None:
+            leadlag_score = float(leadlag.get("score", 0.0))
+            leadlag_detail = leadlag
+        elif isinstance(ref_series, pd.Series) and len(ref_series) >= len(px)//2:
             ll = leadlag_xcorr(px, ref_series)
             leadlag_score = ll["score"]
             leadlag_detail = ll
@@ -666,8 +1179,10 @@ def compute_alpha_ta(df: pd.DataFrame, ref_series: Optional[pd.Series] = None) -
         return {"score": 0.0, "detail": {}, "series": {}}
 
 
-def alpha_signal(df: pd.DataFrame, ref_series: Optional[pd.Series] = None) -> dict:
-    res = compute_alpha_ta(df, ref_series=ref_series)
+@bar_cached("alpha_signal")
+def alpha_signal(df: pd.DataFrame, ref_series: Optional[pd.Series] = None,
+                 leadlag: Optional[dict] = None) -> dict:
+    res = compute_alpha_ta(df, ref_series=ref_series, leadlag=leadlag)
     s = res["score"]
     if s >= CONFIG.TA.ALPHA_LONG_THRESHOLD:
         sig = 1
@@ -690,6 +1205,7 @@ TA_FUNCTIONS = {
 # --------------------------
 # 7) generate_signals & scan_market (örnek kullanım)
 # --------------------------
+@bar_cached("generate_signals")
 def generate_signals(df: pd.DataFrame, ref_series: Optional[pd.Series] = None) -> dict:
     """
     Basit klasik TA kararı + alpha_ta sinyali beraber.
@@ -754,14 +1270,29 @@ def scan_market(market_data: Dict[str, pd.DataFrame], ref_close: Optional[pd.Ser
     Çoklu sembol taraması:
       market_data: { "BTCUSDT": df, "ETHUSDT": df, ... }
       ref_close  : opsiyonel referans seri (örn. BTC close) lead-lag için
+    Sembol başına alpha_signal bar anahtarlı cache'ten gelir (df.attrs symbol/interval varsa).
     """
     results: Dict[str, dict] = {}
+
+    # Lead-lag tüm semboller için tek seferde (FFT, referans getirileri bir kez)
+    leadlags: Dict[str, dict] = {}
+    if isinstance(ref_close, pd.Series):
+        targets = {
+            sym: df["close"].astype(float) for sym, df in market_data.items()
+            if isinstance(df, pd.DataFrame) and not df.empty and len(ref_close) >= len(df) // 2
+        }
+        try:
+            leadlags = leadlag_xcorr_batch(targets, ref_close) if targets else {}
+        except Exception as e:
+            print(f"[SCAN LEADLAG ERROR] {e}")
+
     for symbol, df in market_data.items():
         if not isinstance(df, pd.DataFrame) or df.empty:
             results[symbol] = {"alpha_ta": {"score": 0.0, "signal": 0}}
             continue
         try:
-            results[symbol] = alpha_signal(df, ref_series=ref_close)
+            ll = leadlags.get(symbol)
+            results[symbol] = alpha_signal(df, ref_series=None if ll is not None else ref_close, leadlag=ll)
         except Exception as e:
             print(f"[SCAN ERROR] {symbol}: {e}")
             results[symbol] = {"alpha_ta": {"score": 0.0, "signal": 0}}
@@ -0,0 +1,263 @@
+# utils/trade_store.py
+# Sembol bazlı yerel aggTrades deposu + sayfalı (fromId) eşzamanlı indirici
+# - Depo: data/trades/<SYMBOL>.bin — sabit boy kayıt (id i8, ts i8, price f8, qty f8, m bool = 33 byte),
+#   id'ye göre sıralı ve kesintisiz; sona ekleme (append-only), okuma np.memmap ile kopyasız
+# - İndirme: son id'den itibaren sayfalar fromId ile paralel istenir (id'ler ardışık olduğundan
+#   sayfa başlangıçları önceden bilinir); global eşzamanlılık BinanceHTTPClient semaforunda
+# - İlk çalıştırma / eksik geçmiş: önce en yeni sayfalar (kısa pencereler hemen doğru), sonra
+#   bütçe kaldıkça geriye doğru doldurma (backfill) — sonraki çalıştırmalar kalanını tamamlar
+# - İstek bütçesi: sembol başına çalıştırmada en fazla TRADE_STORE_MAX_PAGES sayfa, ayrıca tüm semboller
+#   için ortak RequestBudget (TRADE_STORE_RUN_PAGES istek; _latest_id / _id_at dahil) → /io yenilemesi
+#   Binance ağırlık limitini aşmaz; geçmiş küçük adımlarla çalıştırmalar boyunca büyür
+# - Dosya yazma/sıkıştırma/okuma asyncio.to_thread ile (event loop bloklanmaz)
+# - Saklama süresi (TRADE_STORE_RETENTION_H) aşılınca dosya sıkıştırılır (eski kayıtlar atılır)
+# - arrays(symbol, since) → io_utils.TradeArrays (cashflow pencereleri için); coverage = depo kapsamı:
+#   ilk kaydın ts'i → (son senkronda en yeni id'ye yetişildiyse) senkron zamanı, değilse son kaydın ts'i.
+#   Sıfırlama / yetişememe durumunda io_utils kapsanmayan pencereleri işaretler (yanlış oran üretilmez)
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.config import CONFIG
+from utils.io_utils import TradeArrays
+
+LOG = logging.getLogger("trade_store")
+LOG.addHandler(logging.NullHandler())
+
+TRADE_DTYPE = np.dtype([("id", "<i8"), ("ts", "<i8"), ("price", "<f8"), ("qty", "<f8"), ("m", "?")])
+PAGE = 1000   # /api/v3/aggTrades limit üst sınırı
+
+
+def _empty() -> np.ndarray:
+    return np.empty(0, dtype=TRADE_DTYPE)
+
+
+def agg_to_records(rows: List[Dict[str, Any]]) -> np.ndarray:
+    """REST aggTrades ({a, p, q, T, m}) → TRADE_DTYPE dizisi."""
+    out = np.empty(len(rows), dtype=TRADE_DTYPE)
+    if not rows:
+        return out
+    out["id"] = [r["a"] for r in rows]
+    out["ts"] = [r["T"] for r in rows]
+    out["price"] = np.array([r["p"] for r in rows], dtype=float)
+    out["qty"] = np.array([r["q"] for r in rows], dtype=float)
+    out["m"] = [bool(r["m"]) for r in rows]
+    return out
+
+
+class RequestBudget:
+    """Bir senkronizasyon turunda tüm semboller için ortak istek (sayfa) bütçesi."""
+    __slots__ = ("remaining", "used")
+
+    def __init__(self, requests: Optional[int] = None):
+        self.remaining = int(CONFIG.IO.TRADE_STORE_RUN_PAGES if requests is None else requests)
+        self.used = 0
+
+    def take(self, n: int = 1) -> int:
+        """En fazla n istek ayırır; döndürür: ayrılan sayı (0 → bütçe bitti)."""
+        n = max(0, min(int(n), self.remaining))
+        self.remaining -= n
+        self.used += n
+        return n
+
+
+class TradeStore:
+    """Append-only sembol dosyaları."""
+
+    def __init__(self, root: Optional[str] = None, retention_hours: Optional[float] = None):
+        self.root = root or CONFIG.IO.TRADE_STORE_DIR
+        self.retention_ms = int((retention_hours if retention_hours is not None
+                                 else CONFIG.IO.TRADE_STORE_RETENTION_H) * 3_600_000)
+        self._synced: Dict[str, int] = {}   # sembol → depo en yeni id'ye yetiştiği son an (ms)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}.bin")
+
+    def load(self, symbol: str) -> np.ndarray:
+        """Kopyasız (memmap) okuma; dosya yoksa boş dizi."""
+        p = self.path(symbol)
+        if not os.path.exists(p) or os.path.getsize(p) < TRADE_DTYPE.itemsize:
+            return _empty()
+        n = os.path.getsize(p) // TRADE_DTYPE.itemsize
+        return np.memmap(p, dtype=TRADE_DTYPE, mode="r", shape=(n,))
+
+    def bounds(self, symbol: str) -> Optional[Tuple[int, int, int]]:
+        """(ilk id, son id, ilk ts) veya None."""
+        rec = self.load(symbol)
+        if not len(rec):
+            return None
+        return int(rec["id"][0]), int(rec["id"][-1]), int(rec["ts"][0])
+
+    def mark_synced(self, symbol: str, ts_ms: int) -> None:
+        self._synced[symbol.upper()] = int(ts_ms)
+
+    def coverage(self, symbol: str, rec: Optional[np.ndarray] = None) -> Optional[Tuple[int, int]]:
+        """(başlangıç ms, bitiş ms): aradaki tüm trade'ler depoda; boş depoda None."""
+        rec = self.load(symbol) if rec is None else rec
+        if not len(rec):
+            return None
+        last = int(rec["ts"][-1])
+        return int(rec["ts"][0]), max(last, self._synced.get(symbol.upper(), last))
+
+    def append(self, symbol: str, rec: np.ndarray) -> None:
+        if len(rec):
+            with open(self.path(symbol), "ab") as f:
+                f.write(np.ascontiguousarray(rec, dtype=TRADE_DTYPE).tobytes())
+
+    def rewrite(self, symbol: str, rec: np.ndarray) -> None:
+        if not len(rec):
+            self._synced.pop(symbol.upper(), None)   # sıfırlama: eski senkron anı artık geçersiz
+        tmp = self.path(symbol) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(np.ascontiguousarray(rec, dtype=TRADE_DTYPE).tobytes())
+        os.replace(tmp, self.path(symbol))
+
+    def prepend(self, symbol: str, rec: np.ndarray) -> None:
+        if len(rec):
+            self.rewrite(symbol, np.concatenate([rec, np.asarray(self.load(symbol))]))
+
+    def compact(self, symbol: str, now_ms: Optional[int] = None) -> bool:
+        """Saklama süresinin 2 katından eski kayıt varsa süre dışını atar."""
+        rec = self.load(symbol)
+        if not len(rec):
+            return False
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        if int(rec["ts"][0]) >= now_ms - 2 * self.retention_ms:
+            return False
+        i = int(np.searchsorted(rec["ts"], now_ms - self.retention_ms, side="left"))
+        keep = np.array(rec[i:])
+        del rec
+        self.rewrite(symbol, keep)
+        return True
+
+    def arrays(self, symbol: str, since_ms: Optional[int] = None) -> TradeArrays:
+        rec = self.load(symbol)
+        i = int(np.searchsorted(rec["ts"], since_ms, side="left")) if since_ms is not None and len(rec) else 0
+        sub = rec[i:]
+        # boş depo hiçbir pencereyi kapsamaz: sıfır uzunluklu aralık (None "bilinmiyor" demek olurdu)
+        now = int(time.time() * 1000)
+        cov = self.coverage(symbol, rec) or (now, now)
+        return TradeArrays(np.array(sub["ts"]), np.array(sub["qty"]), np.array(sub["price"]), np.array(sub["m"]),
+                           coverage=cov)
+
+
+class AggTradeDownloader:
+    """fromId sayfalarıyla eşzamanlı, artımlı aggTrades senkronizasyonu."""
+
+    def __init__(self, api, store: Optional[TradeStore] = None, max_pages: Optional[int] = None):
+        self.api = api
+        self.store = store or TradeStore()
+        self.max_pages = int(max_pages if max_pages is not None else CONFIG.IO.TRADE_STORE_MAX_PAGES)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def _page(self, symbol: str, from_id: int, to_id: int) -> np.ndarray:
+        rows = await self.api.get_agg_trades(symbol, limit=PAGE, from_id=from_id)
+        rec = agg_to_records(rows or [])
+        return rec[(rec["id"] >= from_id) & (rec["id"] <= to_id)]
+
+    async def _range(self, symbol: str, first: int, last: int) -> np.ndarray:
+        """[first, last] id aralığı; sayfalar paralel, sonuç id sıralı ve kesintisiz olmalı."""
+        starts = range(first, last + 1, PAGE)
+        pages = await asyncio.gather(*[self._page(symbol, s, min(s + PAGE - 1, last)) for s in starts])
+        rec = np.concatenate(pages) if pages else _empty()
+        if len(rec) and (rec["id"][0] != first or np.any(np.diff(rec["id"]) != 1)):
+            # eksik sayfa (hata / boş yanıt): ilk boşluğa kadar olan kısım kullanılır
+            gaps = np.flatnonzero(np.diff(rec["id"]) != 1)
+            rec = rec[:gaps[0] + 1] if rec["id"][0] == first and len(gaps) else rec[:0]
+        return rec
+
+    async def _latest_id(self, symbol: str) -> Optional[int]:
+        rows = await self.api.get_agg_trades(symbol, limit=1)
+        return int(rows[-1]["a"]) if rows else None
+
+    async def _id_at(self, symbol: str, ts_ms: int) -> Optional[int]:
+        rows = await self.api.get_agg_trades(symbol, limit=1, start_time=ts_ms, end_time=ts_ms + 3_600_000)
+        return int(rows[0]["a"]) if rows else None
+
+    async def sync(self, symbol: str, lookback_ms: Optional[int] = None,
+                   budget: Optional[RequestBudget] = None) -> Dict[str, Any]:
+        """
+        Yeni id'leri indirir (+ sayfa hakkı kalırsa geriye doldurur). budget: turun ortak istek bütçesi
+        (verilmezse bu sembole özel). Döndürür: indirilen kayıt sayıları.
+        """
+        symbol = symbol.upper()
+        budget = budget or RequestBudget(self.max_pages + 3)
+        lock = self._locks.setdefault(symbol, asyncio.Lock())
+        async with lock:
+            now = int(time.time() * 1000)
+            lookback_ms = lookback_ms or max(CONFIG.IO.CASHFLOW_TIMEFRAMES.values()) * 60_000
+            if not budget.take(1):
+                return {"symbol": symbol, "new": 0, "backfill": 0, "skipped": True}
+            latest = await self._latest_id(symbol)
+            if latest is None:
+                return {"symbol": symbol, "new": 0, "backfill": 0}
+            pages_left = self.max_pages
+            b = self.store.bounds(symbol)
+
+            # ileri (yeni id'ler) — sembol hakkıyla kapanamayacak boşluk → depo en yeni sayfalarla sıfırdan
+            if b is None or latest - b[1] > self.max_pages * PAGE:
+                pages = budget.take(pages_left)
+                pages_left -= pages
+                if b is not None:
+                    await asyncio.to_thread(self.store.rewrite, symbol, _empty())
+                first = max(0, latest - pages * PAGE + 1)
+                if budget.take(1):
+                    start_id = await self._id_at(symbol, now - lookback_ms)
+                    if start_id is not None:
+                        first = max(first, start_id)
+                new = await self._range(symbol, first, latest) if pages else _empty()
+            elif latest > b[1]:
+                # ortak bütçe kısaysa baştan itibaren alınabildiği kadar (süreklilik korunur, kalan sonraki tur)
+                pages = budget.take(min(pages_left, -(-(latest - b[1]) // PAGE)))
+                pages_left -= pages
+                new = await self._range(symbol, b[1] + 1, min(latest, b[1] + pages * PAGE)) if pages else _empty()
+            else:
+                new = _empty()
+            await asyncio.to_thread(self.store.append, symbol, new)
+            head = int(new["id"][-1]) if len(new) else (b[1] if b is not None else -1)
+            if head >= latest:
+                self.store.mark_synced(symbol, now)
+
+            # geriye doldurma: depo lookback'i kapsamıyorsa, en yeniden eskiye (kalan sayfa hakkı kadar)
+            filled = 0
+            b = self.store.bounds(symbol)
+            if b is not None and b[2] > now - lookback_ms and pages_left > 0 and b[0] > 0 and budget.take(1):
+                target = await self._id_at(symbol, now - lookback_ms)
+                if target is not None and target < b[0]:
+                    pages = budget.take(min(pages_left, -(-(b[0] - target) // PAGE)))
+                    if pages:
+                        lo = max(target, b[0] - pages * PAGE)
+                        old = await self._range(symbol, lo, b[0] - 1)
+                        if len(old) and old["id"][-1] == b[0] - 1:
+                            await asyncio.to_thread(self.store.prepend, symbol, old)
+                            filled = len(old)
+
+            await asyncio.to_thread(self.store.compact, symbol, now)
+            return {"symbol": symbol, "new": int(len(new)), "backfill": filled}
+
+    async def sync_many(self, symbols: List[str], lookback_ms: Optional[int] = None,
+                        budget: Optional[RequestBudget] = None) -> Dict[str, Any]:
+        budget = budget or RequestBudget()
+        res = await asyncio.gather(*[self.sync(s, lookback_ms, budget) for s in symbols], return_exceptions=True)
+        for s, r in zip(symbols, res):
+            if isinstance(r, Exception):
+                LOG.warning("aggTrades sync failed %s: %s", s, r)
+        return dict(zip(symbols, res))
+
+
+_DOWNLOADER: Optional[AggTradeDownloader] = None
+
+
+def get_downloader(api) -> AggTradeDownloader:
+    global _DOWNLOADER
+    if _DOWNLOADER is None:
+        _DOWNLOADER = AggTradeDownloader(api)
+    return _DOWNLOADER